@@ -0,0 +1,3 @@
+"""
+SIC-SIT Benchmark Scripts
+"""
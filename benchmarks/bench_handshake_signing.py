@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+SIT Handshake Signing Benchmark
+===============================
+比較握手訊息簽名的兩條正規化路徑：
+
+- baseline: to_dict() → 移除 signature → json.dumps(sort_keys=True) → hmac.new
+- fast:     專用正規化編碼器 → 預載金鑰 HMAC 物件 copy()
+
+計時前先確認兩條路徑對基準訊息產生逐字元相同的正規化結果與簽名；
+完整的邊界案例在 test_optimized_components.py 的 test_sit_canonical_encoding。
+
+Run:
+    python benchmarks/bench_handshake_signing.py [--iterations 20000]
+"""
+
+import sys
+import os
+import json
+import hmac
+import time
+import hashlib
+import argparse
+from typing import Any, Callable, Dict, List
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validators.sit_handshake import (
+    SIT_Handshake, SIT_SYN, SIT_SYN_ACK, SIT_ACK, _canonical_message
+)
+
+
+def baseline_sign(secret_key: bytes, message: Any) -> str:
+    """優化前的簽名路徑"""
+    data = message.to_dict()
+    data_copy = {k: v for k, v in data.items() if k != 'signature'}
+    payload = json.dumps(data_copy, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hmac.new(secret_key, payload, hashlib.sha256).hexdigest()
+
+
+def build_messages() -> List[Any]:
+    """建立涵蓋各種欄位內容的握手訊息"""
+    requester = SIT_Handshake(secret_key="bench-secret", entity_id="requester-001")
+    responder = SIT_Handshake(secret_key="bench-secret", entity_id="responder-001")
+
+    syn = requester.create_syn(
+        intent_scope="查詢用戶資料 \"quoted\" \\ back\nslash",
+        semantic_boundary={
+            "data_types": ["profile", "transaction"],
+            "time_range": "last_30_days",
+            "nested": {"b": 1.5, "a": None, "ok": True},
+        },
+        constraints={"max_tokens": 1000, "allowed_operations": ["READ"]}
+    )
+    syn_ack, _ = responder.process_syn(syn, modified_constraints={"max_tokens": 500})
+    ack, _ = requester.process_syn_ack(syn_ack)
+
+    empty_syn = SIT_SYN(
+        session_id="s-empty", requester_id="r", intent_scope="", semantic_boundary={}
+    )
+    declined = SIT_ACK(
+        session_id="s-declined", session_token="t", syn_ack_signature=None,
+        confirmed=False, semantic_mode="shared-😀"
+    )
+    return [syn, syn_ack, ack, empty_syn, declined]
+
+
+def check_equivalence(secret_key: bytes, messages: List[Any]):
+    """兩條路徑必須產生相同的正規化內容與簽名"""
+    for message in messages:
+        data = {k: v for k, v in message.to_dict().items() if k != 'signature'}
+        expected = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        actual = _canonical_message(message)
+        assert actual == expected, f"{type(message).__name__}: {actual!r} != {expected!r}"
+
+
+def time_per_call(func: Callable[[], Any], iterations: int, repeats: int = 5) -> float:
+    """單次呼叫微秒數（取多輪中最快的一輪，降低雜訊）"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def run(iterations: int) -> Dict[str, Dict[str, float]]:
+    handshake = SIT_Handshake(secret_key="bench-secret", entity_id="bench")
+    messages = build_messages()
+    check_equivalence(handshake.secret_key, messages)
+
+    results = {}
+    for message in messages[:3]:
+        name = type(message).__name__
+        assert baseline_sign(handshake.secret_key, message) == handshake._sign_message(message)
+        baseline = time_per_call(lambda: baseline_sign(handshake.secret_key, message), iterations)
+        fast = time_per_call(lambda: handshake._sign_message(message), iterations)
+        results[name] = {"baseline_us": baseline, "fast_us": fast, "speedup": baseline / fast}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SIT handshake signing benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("=== SIT 握手簽名基準測試 ===\n")
+    # run() 在計時前斷言兩條路徑一致，通過後才回報
+    results = run(args.iterations)
+    print("正規化結果一致性: ✓\n")
+    print(f"{'訊息':<14}{'baseline (µs)':>16}{'fast (µs)':>12}{'speedup':>10}")
+    for name, row in results.items():
+        print(f"{name:<14}{row['baseline_us']:>16.2f}{row['fast_us']:>12.2f}{row['speedup']:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
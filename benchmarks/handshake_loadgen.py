@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+SIT Handshake Load Generator
+============================
+在單一行程內模擬 N 個請求者與 M 個接收者，以目標速率驅動完整的
+SYN → SYN-ACK → ACK 三次握手，並注入故障：
+
+- invalid:    竄改 SYN 簽名，預期 SIGNATURE_INVALID
+- timeout:    SYN 時間戳早於 ttl（重新簽名），預期 TIMEOUT
+- retransmit: 同一 SYN 重送一次，預期仍成功且命中驗證快取
+
+延遲自「排定送出時間」起算，而非實際開始時間：接收者跟不上目標速率時，
+排隊等待也計入延遲（避免 coordinated omission）。
+
+報告: handshakes/sec、延遲百分位、接收者會話表記憶體、驗證快取命中率。
+用於估算接收者容量，以及偵測 validators/sit_handshake.py 的效能退化
+（--fail-below 低於門檻或出現非預期結果時以非零狀態結束）。
+
+Run:
+    python benchmarks/handshake_loadgen.py [--requesters 8] [--responders 2]
+        [--handshakes 20000] [--rate 0] [--invalid 0.01] [--timeout 0.01]
+        [--retransmit 0.05] [--syn-cookies] [--json results.json]
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError
+
+
+SECRET_KEY = "loadgen-secret"
+
+# 注入的故障類型 -> 預期錯誤（None 表示預期成功）
+EXPECTED = {
+    "ok": None,
+    "retransmit": None,
+    "invalid": SIT_HandshakeError.SIGNATURE_INVALID,
+    "timeout": SIT_HandshakeError.TIMEOUT,
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近排名法百分位（輸入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def choose_fault(rng: random.Random, invalid: float, timeout: float, retransmit: float) -> str:
+    roll = rng.random()
+    if roll < invalid:
+        return "invalid"
+    if roll < invalid + timeout:
+        return "timeout"
+    if roll < invalid + timeout + retransmit:
+        return "retransmit"
+    return "ok"
+
+
+def one_handshake(
+    requester: SIT_Handshake,
+    responder: SIT_Handshake,
+    fault: str,
+    index: int
+) -> Optional[SIT_HandshakeError]:
+    """執行一次握手，回傳第一個錯誤（成功為 None）"""
+    syn = requester.create_syn(
+        intent_scope=f"load test #{index}",
+        semantic_boundary={"data_types": ["profile"], "time_range": "last_30_days"},
+        constraints={"max_tokens": 1000}
+    )
+    if fault == "invalid":
+        syn.signature = ("0" if syn.signature[0] != "0" else "1") + syn.signature[1:]
+    elif fault == "timeout":
+        syn.timestamp = (
+            datetime.utcnow() - timedelta(seconds=syn.ttl_seconds + 1)
+        ).isoformat() + "Z"
+        syn.signature = requester._sign_message(syn)
+
+    syn_ack, error = responder.process_syn(syn)
+    if error:
+        return error
+    if fault == "retransmit":
+        syn_ack, error = responder.process_syn(syn)
+        if error:
+            return error
+
+    ack, error = requester.process_syn_ack(syn_ack)
+    if error:
+        return error
+
+    session, error = responder.process_ack(ack)
+    return error
+
+
+def run(
+    requesters: int = 8,
+    responders: int = 2,
+    handshakes: int = 20000,
+    rate: float = 0.0,
+    invalid: float = 0.01,
+    timeout: float = 0.01,
+    retransmit: float = 0.05,
+    syn_cookies: bool = False,
+    trace_memory: bool = False,
+    seed: int = 0
+) -> Dict:
+    rng = random.Random(seed)
+    requester_pool = [
+        SIT_Handshake(secret_key=SECRET_KEY, entity_id=f"requester-{i:03d}")
+        for i in range(requesters)
+    ]
+    responder_pool = [
+        SIT_Handshake(secret_key=SECRET_KEY, entity_id=f"responder-{i:03d}", syn_cookies=syn_cookies)
+        for i in range(responders)
+    ]
+
+    if trace_memory:
+        tracemalloc.start()
+
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    unexpected: Counter = Counter()
+
+    start = time.perf_counter()
+    for index in range(handshakes):
+        scheduled = start + index / rate if rate > 0 else time.perf_counter()
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        fault = choose_fault(rng, invalid, timeout, retransmit)
+        requester = requester_pool[index % requesters]
+        responder = responder_pool[rng.randrange(responders)]
+
+        error = one_handshake(requester, responder, fault, index)
+        latencies.append((time.perf_counter() - scheduled) * 1e6)
+
+        outcome = error.value if error else "OK"
+        outcomes[f"{fault}:{outcome}"] += 1
+        if error != EXPECTED[fault]:
+            unexpected[f"{fault}:{outcome}"] += 1
+    elapsed = time.perf_counter() - start
+
+    memory_peak = None
+    if trace_memory:
+        memory_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies.sort()
+    tables = [handshake.get_memory_stats() for handshake in responder_pool]
+    cache_hits = sum(stats["verify_cache"]["hits"] for stats in tables)
+    cache_misses = sum(stats["verify_cache"]["misses"] for stats in tables)
+
+    return {
+        "config": {
+            "requesters": requesters,
+            "responders": responders,
+            "handshakes": handshakes,
+            "rate": rate,
+            "invalid": invalid,
+            "timeout": timeout,
+            "retransmit": retransmit,
+            "syn_cookies": syn_cookies,
+        },
+        "elapsed_s": elapsed,
+        "handshakes_per_sec": handshakes / elapsed if elapsed else 0.0,
+        "latency_us": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "p999": percentile(latencies, 99.9),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "outcomes": dict(outcomes),
+        "unexpected": dict(unexpected),
+        "responder_tables": {
+            "pending": sum(stats["pending"]["size"] for stats in tables),
+            "established": sum(stats["established"]["size"] for stats in tables),
+            "approx_bytes": sum(
+                stats[name]["approx_bytes"]
+                for stats in tables
+                for name in ("pending", "established", "tickets", "channels")
+            ),
+        },
+        "verify_cache": {
+            "hits": cache_hits,
+            "misses": cache_misses,
+            "hit_rate": cache_hits / (cache_hits + cache_misses) if cache_hits + cache_misses else 0.0,
+        },
+        "tracemalloc_peak_bytes": memory_peak,
+    }
+
+
+def print_report(results: Dict):
+    config = results["config"]
+    print("=== SIT 握手負載測試 ===\n")
+    print(f"請求者 {config['requesters']} / 接收者 {config['responders']} / "
+          f"握手 {config['handshakes']} / 目標速率 {config['rate'] or '無上限'}"
+          f"{' / SYN cookie' if config['syn_cookies'] else ''}\n")
+
+    print(f"吞吐量: {results['handshakes_per_sec']:.0f} handshakes/sec "
+          f"({results['elapsed_s']:.2f} s)")
+    latency = results["latency_us"]
+    print("延遲 (µs): " + "  ".join(f"{name}={value:.0f}" for name, value in latency.items()))
+
+    print("\n結果:")
+    for outcome, count in sorted(results["outcomes"].items()):
+        print(f"  {outcome:<28}{count:>8}")
+    if results["unexpected"]:
+        print(f"  ✗ 非預期結果: {results['unexpected']}")
+
+    tables = results["responder_tables"]
+    cache = results["verify_cache"]
+    print(f"\n接收者會話表: pending={tables['pending']} established={tables['established']} "
+          f"≈{tables['approx_bytes'] / 1024:.0f} KiB")
+    print(f"驗證快取: hits={cache['hits']} misses={cache['misses']} hit_rate={cache['hit_rate']:.1%}")
+    if results["tracemalloc_peak_bytes"] is not None:
+        print(f"tracemalloc 峰值: {results['tracemalloc_peak_bytes'] / 1024 / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SIT handshake load generator")
+    parser.add_argument("--requesters", type=int, default=8)
+    parser.add_argument("--responders", type=int, default=2)
+    parser.add_argument("--handshakes", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=0.0, help="handshakes/sec，0 表示不限速")
+    parser.add_argument("--invalid", type=float, default=0.01, help="竄改簽名的比例")
+    parser.add_argument("--timeout", type=float, default=0.01, help="過期 SYN 的比例")
+    parser.add_argument("--retransmit", type=float, default=0.05, help="重送 SYN 的比例")
+    parser.add_argument("--syn-cookies", action="store_true")
+    parser.add_argument("--trace-memory", action="store_true", help="以 tracemalloc 量測峰值（會降低吞吐量）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="將結果寫入 JSON 檔")
+    parser.add_argument("--fail-below", type=float, default=0.0,
+                        help="吞吐量低於此值（handshakes/sec）時以狀態 1 結束")
+    args = parser.parse_args()
+
+    results = run(
+        requesters=args.requesters,
+        responders=args.responders,
+        handshakes=args.handshakes,
+        rate=args.rate,
+        invalid=args.invalid,
+        timeout=args.timeout,
+        retransmit=args.retransmit,
+        syn_cookies=args.syn_cookies,
+        trace_memory=args.trace_memory,
+        seed=args.seed
+    )
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if results["unexpected"] or results["handshakes_per_sec"] < args.fail_below:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+SIC Routing Simulator
+=====================
+以合成的節點群（10k–100k 個 SemanticNode）與意圖串流重播路由，
+逐一量測每個 RoutingStrategy：
+
+- 節點群: 領域（1–2 個）、語言、能力各自隨機組合；每個節點有基礎負載、
+  延遲與正弦負載曲線（振幅、週期相位各異）；--embeddings 時帶群聚的語義向量
+- 意圖串流: 意圖樣板依 Zipf 分布抽樣（熱門意圖重複出現，快取才有意義），
+  中英文各半，部分帶必要能力與會話 ID；--embeddings 時帶主題向量加雜訊
+- 遙測: 每 --tick 個意圖推進一次時間，抽樣 --telemetry 比例的節點回報負載曲線；
+  選中的節點以 begin_request 登記，保持 --in-flight 個進行中請求，
+  完成時以 report_latency 回報（LEAST_OUTSTANDING / AFFINITY 依此運作）
+
+報告: 每個策略的 decisions/sec、route() 延遲百分位、節點負載分配的
+Gini 係數（全體節點，含未被選中者）、被選中的節點數、決策 / 距離 / 意圖特徵
+快取命中率。每個策略使用新建的路由器，快取互不影響。
+--fail-below 任一策略的 decisions/sec 低於門檻時以非零狀態結束，可作為
+core/semantic_routing.py 效能退化的檢查。
+
+Run:
+    python benchmarks/routing_simulator.py [--nodes 10000] [--intents 20000]
+        [--strategies NEAREST,MULTIPATH,...] [--embeddings] [--dim 64]
+        [--sharded domain|cluster] [--broadcast-intents 200] [--seed 0]
+        [--decision-cache-ttl 1.0]
+        [--json results.json]
+"""
+
+import sys
+import os
+import json
+import math
+import time
+import random
+import argparse
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy
+from core.sharded_router import SIC_ShardedRouter, ShardPartition
+
+
+DOMAINS = ["finance", "medical", "legal", "technical", "creative", "general"]
+LANGUAGES = ["zh", "en", "ja"]
+CAPABILITIES = ["reasoning", "coding", "analysis", "translation", "multimodal", "chinese", "summarization"]
+
+# 意圖樣板的領域關鍵字（與 DEFAULT_DOMAIN_KEYWORDS 一致，讓意圖特徵偵測得到領域）
+INTENT_WORDS = {
+    "finance": (["交易", "投資", "股票"], ["transaction", "finance"]),
+    "medical": (["醫療", "診斷", "病患"], ["medical", "health"]),
+    "legal": (["法律", "合約", "訴訟"], ["legal", "contract"]),
+    "technical": (["程式", "系統", "代碼"], ["code", "technical"]),
+    "creative": (["創作", "故事", "設計"], ["creative", "story"]),
+    "general": (["問題", "說明"], ["question", "help"]),
+}
+
+LOAD_PERIOD_TICKS = 60   # 負載曲線週期（tick）
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近排名法百分位（輸入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def gini(values: List[float]) -> float:
+    """Gini 係數：0 為完全平均，趨近 1 為集中於少數節點"""
+    array = np.sort(np.asarray(values, dtype=np.float64))
+    total = array.sum()
+    if len(array) == 0 or total == 0:
+        return 0.0
+    ranks = np.arange(1, len(array) + 1)
+    return float(2.0 * (ranks * array).sum() / (len(array) * total) - (len(array) + 1) / len(array))
+
+
+# ========== 合成資料 ==========
+
+def build_fleet(
+    count: int,
+    rng: random.Random,
+    centers: Optional[np.ndarray]
+) -> Tuple[List[Dict], List[Tuple[float, float, float]]]:
+    """
+    產生節點參數與負載曲線
+
+    Returns:
+        (SemanticNode 關鍵字參數列表, 每個節點的 (基礎負載, 振幅, 相位))
+    """
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    specs = []
+    curves = []
+    for i in range(count):
+        domains = rng.sample(DOMAINS, rng.choice((1, 1, 2)))
+        languages = rng.sample(LANGUAGES, rng.choice((1, 2, 2, 3)))
+        capabilities = rng.sample(CAPABILITIES, rng.randint(1, 3))
+        base = rng.uniform(0.05, 0.6)
+        curves.append((base, rng.uniform(0.0, 0.35), rng.random()))
+        profile: Dict = {}
+        if centers is not None:
+            center = centers[DOMAINS.index(domains[0])]
+            profile["embedding"] = (center + 0.35 * np_rng.standard_normal(len(center))).tolist()
+        specs.append({
+            "node_id": f"node-{i:06d}",
+            "model_type": rng.choice(("claude", "gpt", "gemini", "qwen", "llama")),
+            "capabilities": capabilities,
+            "semantic_profile": profile,
+            "domains": domains,
+            "languages": languages,
+            "load": base,
+            "latency_ms": rng.lognormvariate(math.log(150), 0.5),
+        })
+    return specs, curves
+
+
+def build_intents(
+    templates: int,
+    rng: random.Random,
+    centers: Optional[np.ndarray]
+) -> List[Dict]:
+    """產生意圖樣板（文字、必要能力、向量）"""
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    intents = []
+    for i in range(templates):
+        domain = rng.choice(DOMAINS)
+        zh_words, en_words = INTENT_WORDS[domain]
+        if rng.random() < 0.5:
+            text = f"{rng.choice(zh_words)}{rng.choice(zh_words)}請求 #{i}"
+        else:
+            text = f"{rng.choice(en_words)} {rng.choice(en_words)} request #{i}"
+        required = rng.sample(CAPABILITIES, 1) if rng.random() < 0.3 else None
+        embedding = None
+        if centers is not None:
+            embedding = (centers[DOMAINS.index(domain)] + 0.35 * np_rng.standard_normal(centers.shape[1])).tolist()
+        intents.append({"intent": text, "required": required, "embedding": embedding})
+    return intents
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    return [1.0 / (rank + 1) ** exponent for rank in range(count)]
+
+
+# ========== 重播 ==========
+
+def make_router(sharded: Optional[str], seed: int, decision_cache_ttl: float):
+    if sharded is None:
+        return SIC_Router(seed=seed, decision_cache_ttl=decision_cache_ttl)
+    partition = ShardPartition.CLUSTER if sharded == "cluster" else ShardPartition.DOMAIN
+    return SIC_ShardedRouter(partition=partition, seed=seed, decision_cache_ttl=decision_cache_ttl)
+
+
+def cache_stats(router) -> Dict:
+    """彙總決策、距離、意圖特徵快取（分片路由器加總各分片）"""
+    routers = list(router.shards.values()) if isinstance(router, SIC_ShardedRouter) else [router]
+    profilers = [shard.profiler for shard in routers]
+    if isinstance(router, SIC_ShardedRouter):
+        profilers.append(router.profiler)
+
+    def rate(hits: int, misses: int) -> Dict:
+        return {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+    return {
+        "decision_cache": rate(
+            sum(shard.route_cache.hits for shard in routers),
+            sum(shard.route_cache.misses for shard in routers)
+        ),
+        "distance_cache": rate(
+            sum(shard.cache_hits for shard in routers),
+            sum(shard.cache_misses for shard in routers)
+        ),
+        "intent_profiler": rate(
+            sum(profiler.hits for profiler in profilers),
+            sum(profiler.misses for profiler in profilers)
+        ),
+    }
+
+
+def replay(
+    strategy: RoutingStrategy,
+    specs: List[Dict],
+    curves: List[Tuple[float, float, float]],
+    intents: List[Dict],
+    stream: List[int],
+    sessions: List[Optional[str]],
+    sharded: Optional[str],
+    tick: int,
+    telemetry: float,
+    in_flight: int,
+    seed: int,
+    decision_cache_ttl: float
+) -> Dict:
+    """以新建的路由器重播意圖串流，量測單一策略"""
+    rng = random.Random(seed)
+    router = make_router(sharded, seed, decision_cache_ttl)
+
+    start = time.perf_counter()
+    for spec in specs:
+        router.register_node(SemanticNode(**spec))
+    register_s = time.perf_counter() - start
+
+    node_ids = [spec["node_id"] for spec in specs]
+    assigned: Counter = Counter()
+    pending: deque = deque()
+    latencies: List[float] = []
+    empty = 0
+    telemetry_batch = max(1, int(len(specs) * telemetry))
+
+    for index, template in enumerate(stream):
+        if index and index % tick == 0:
+            # 推進時間：抽樣節點回報負載曲線上的值
+            phase = index / tick / LOAD_PERIOD_TICKS
+            for slot in rng.sample(range(len(specs)), telemetry_batch):
+                base, amplitude, offset = curves[slot]
+                load = base + amplitude * math.sin(2 * math.pi * (phase + offset))
+                router.report_load(node_ids[slot], min(1.0, max(0.0, load)))
+
+        intent = intents[template]
+        begin = time.perf_counter_ns()
+        decision = router.route(
+            intent["intent"],
+            strategy=strategy,
+            required_capabilities=intent["required"],
+            intent_embedding=intent["embedding"],
+            session_id=sessions[index]
+        )
+        latencies.append((time.perf_counter_ns() - begin) / 1000)
+
+        if not decision.selected_nodes:
+            empty += 1
+            continue
+        for node in decision.selected_nodes:
+            assigned[node.node_id] += 1
+            router.begin_request(node.node_id)
+            pending.append(node)
+        while len(pending) > in_flight:
+            node = pending.popleft()
+            router.report_latency(node.node_id, node.latency_ms * rng.uniform(0.8, 1.3))
+
+    while pending:
+        node = pending.popleft()
+        router.report_latency(node.node_id, node.latency_ms)
+
+    route_s = sum(latencies) / 1e6
+    latencies.sort()
+    counts = [assigned.get(node_id, 0) for node_id in node_ids]
+    if isinstance(router, SIC_ShardedRouter):
+        router.close()
+    return {
+        "routes": len(stream),
+        "register_s": register_s,
+        "decisions_per_sec": len(stream) / route_s if route_s else 0.0,
+        "latency_us": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "gini": gini(counts),
+        "nodes_used": sum(1 for count in counts if count),
+        "max_share": max(counts) / max(sum(counts), 1),
+        "empty_decisions": empty,
+        "caches": cache_stats(router),
+    }
+
+
+def run(
+    nodes: int = 10000,
+    intents: int = 20000,
+    templates: int = 2000,
+    zipf: float = 1.1,
+    strategies: Optional[List[RoutingStrategy]] = None,
+    embeddings: bool = False,
+    dim: int = 64,
+    sharded: Optional[str] = None,
+    broadcast_intents: int = 200,
+    sessions: int = 500,
+    tick: int = 100,
+    telemetry: float = 0.01,
+    in_flight: int = 256,
+    seed: int = 0,
+    decision_cache_ttl: float = 0.0
+) -> Dict:
+    rng = random.Random(seed)
+    strategies = strategies or list(RoutingStrategy)
+    centers = None
+    if embeddings:
+        centers = np.random.default_rng(seed).standard_normal((len(DOMAINS), dim))
+
+    specs, curves = build_fleet(nodes, rng, centers)
+    pool = build_intents(templates, rng, centers)
+    stream = rng.choices(range(templates), weights=zipf_weights(templates, zipf), k=intents)
+    session_ids = [f"session-{rng.randrange(sessions)}" if rng.random() < 0.5 else None for _ in stream]
+
+    results = {}
+    for strategy in strategies:
+        # BROADCAST 每次選中所有候選，只重播前 broadcast_intents 個意圖
+        count = min(intents, broadcast_intents) if strategy == RoutingStrategy.BROADCAST else intents
+        results[strategy.value] = replay(
+            strategy, specs, curves, pool, stream[:count], session_ids[:count],
+            sharded, tick, telemetry, in_flight, seed, decision_cache_ttl
+        )
+
+    return {
+        "config": {
+            "nodes": nodes,
+            "intents": intents,
+            "templates": templates,
+            "zipf": zipf,
+            "embeddings": embeddings,
+            "dim": dim if embeddings else None,
+            "sharded": sharded,
+            "broadcast_intents": broadcast_intents,
+            "tick": tick,
+            "telemetry": telemetry,
+            "in_flight": in_flight,
+            "seed": seed,
+            "decision_cache_ttl": decision_cache_ttl,
+        },
+        "strategies": results,
+    }
+
+
+def print_report(results: Dict):
+    config = results["config"]
+    print("=== SIC 路由模擬 ===\n")
+    print(f"節點 {config['nodes']} / 意圖 {config['intents']}（樣板 {config['templates']}, "
+          f"Zipf {config['zipf']}）/ {'向量 ' + str(config['dim']) + ' 維' if config['embeddings'] else '啟發式評分'}"
+          f"{' / 分片: ' + config['sharded'] if config['sharded'] else ''}\n")
+
+    print(f"{'策略':<20}{'dec/s':>10}{'p50 µs':>10}{'p99 µs':>10}{'Gini':>8}"
+          f"{'節點數':>8}{'最大占比':>9}{'決策快取':>9}{'距離快取':>9}{'特徵快取':>9}{'註冊 s':>9}")
+    for name, stats in results["strategies"].items():
+        caches = stats["caches"]
+        print(f"{name:<20}{stats['decisions_per_sec']:>10.0f}"
+              f"{stats['latency_us']['p50']:>10.0f}{stats['latency_us']['p99']:>10.0f}"
+              f"{stats['gini']:>8.3f}{stats['nodes_used']:>8}{stats['max_share']:>9.1%}"
+              f"{caches['decision_cache']['hit_rate']:>9.1%}{caches['distance_cache']['hit_rate']:>9.1%}"
+              f"{caches['intent_profiler']['hit_rate']:>9.1%}{stats['register_s']:>9.2f}")
+        if stats["empty_decisions"]:
+            print(f"  {stats['empty_decisions']} 個意圖沒有可用節點")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SIC routing simulator")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--intents", type=int, default=20000)
+    parser.add_argument("--templates", type=int, default=2000, help="意圖樣板數")
+    parser.add_argument("--zipf", type=float, default=1.1, help="意圖熱門程度的 Zipf 指數")
+    parser.add_argument("--strategies", help="以逗號分隔的 RoutingStrategy（預設全部）")
+    parser.add_argument("--embeddings", action="store_true", help="節點與意圖帶語義向量")
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--sharded", choices=("domain", "cluster"), help="改用 SIC_ShardedRouter")
+    parser.add_argument("--broadcast-intents", type=int, default=200, help="BROADCAST 重播的意圖數")
+    parser.add_argument("--sessions", type=int, default=500, help="會話 ID 數（一半的意圖帶會話）")
+    parser.add_argument("--tick", type=int, default=100, help="每幾個意圖推進一次負載曲線")
+    parser.add_argument("--telemetry", type=float, default=0.01, help="每個 tick 回報負載的節點比例")
+    parser.add_argument("--in-flight", type=int, default=256, help="同時進行中的請求數")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decision-cache-ttl", type=float, default=0.0,
+                        help="路由決策快取的有效秒數（預設 0 停用）")
+    parser.add_argument("--json", help="將結果寫入 JSON 檔")
+    parser.add_argument("--fail-below", type=float, default=0.0,
+                        help="任一策略 decisions/sec 低於此值時以狀態 1 結束（不含 BROADCAST）")
+    args = parser.parse_args()
+
+    strategies = None
+    if args.strategies:
+        strategies = [RoutingStrategy[name.strip().upper()] for name in args.strategies.split(",")]
+
+    results = run(
+        nodes=args.nodes,
+        intents=args.intents,
+        templates=args.templates,
+        zipf=args.zipf,
+        strategies=strategies,
+        embeddings=args.embeddings,
+        dim=args.dim,
+        sharded=args.sharded,
+        broadcast_intents=args.broadcast_intents,
+        sessions=args.sessions,
+        tick=args.tick,
+        telemetry=args.telemetry,
+        in_flight=args.in_flight,
+        seed=args.seed,
+        decision_cache_ttl=args.decision_cache_ttl
+    )
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    slow = [
+        name for name, stats in results["strategies"].items()
+        if name != RoutingStrategy.BROADCAST.value and stats["decisions_per_sec"] < args.fail_below
+    ]
+    if slow:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,15 @@
 """SIC-SIT Core"""
-from .semantic_routing import SIC_Router, SemanticNode, RouteDecision, RoutingStrategy
+from .semantic_routing import (
+    SIC_Router, SemanticNode, RouteDecision, RoutingStrategy,
+    CircuitState, FailoverError, FailoverResult,
+    DispatchMode, DispatchError, DispatchResult, dispatch_async
+)
+from .semantic_index import SIC_IVFIndex
+from .intent_profiler import SIC_IntentProfiler
+from .hash_ring import SIC_HashRing
+from .semantic_path import SIC_PathPlanner
+from .decision_cache import SIC_DecisionCache
+from .sharded_router import SIC_ShardedRouter, ShardPartition
 
 # Alias
 SemanticRouter = SIC_Router
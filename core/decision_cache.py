@@ -0,0 +1,222 @@
+"""
+SIC-DCC — Route Decision Cache
+路由決策快取
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: 路由器的 fast-path 轉送快取（route cache / flow cache）
+
+功能:
+- 以 (策略, 必要能力, 意圖特徵指紋) 分桶
+- 沒有意圖向量時桶內精確比對；有向量時桶內以餘弦相似度查詢，超過門檻即命中
+  （近似重複的意圖共用同一個決策）
+- LRU + TTL 淘汰；節點集合版本改變時整個快取失效
+- 命中時由呼叫端驗證決策仍有效（例如選中的節點仍可用），失效即刪除
+
+作者: Claude (尾德)
+日期: 2026-01-20
+版本: 1.0.0
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class _CacheEntry:
+    bucket: int
+    row: Optional[int]   # 向量矩陣中的列；精確比對的項目為 None
+    decision: Any
+    expires_at: float
+
+
+class SIC_DecisionCache:
+    """
+    路由決策快取
+
+    回傳的決策在多次路由間共用，呼叫端不可修改
+    """
+
+    # 配置
+    SIZE = 1024           # 快取的決策數
+    TTL_SECONDS = 1.0     # 決策有效期（負載 / 延遲變化在此時間內不反映）
+    SIMILARITY = 0.98     # 意圖向量的餘弦相似度門檻
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        ttl: Optional[float] = None,
+        similarity: Optional[float] = None
+    ):
+        """
+        初始化決策快取
+
+        Args:
+            size: 快取大小（預設 SIZE）
+            ttl: 決策有效秒數（預設 TTL_SECONDS；0 表示停用快取）
+            similarity: 意圖向量的餘弦相似度門檻（預設 SIMILARITY）
+        """
+        self.size = size or self.SIZE
+        self.ttl = self.TTL_SECONDS if ttl is None else ttl
+        self.similarity = self.SIMILARITY if similarity is None else similarity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def clear(self, version: Optional[Hashable] = None):
+        """清空快取並設定節點集合版本"""
+        self._version = version
+        self._entries: "OrderedDict[int, _CacheEntry]" = OrderedDict()
+        self._buckets: Dict[Hashable, int] = {}
+        self._exact: Dict[int, int] = {}  # 桶 -> 精確比對項目
+        self._vectors: Optional[np.ndarray] = None
+        self._row_bucket = np.full(self.size, -1, dtype=np.int64)
+        self._row_entry = [0] * self.size
+        self._free_rows = list(range(self.size - 1, -1, -1))
+        self._next_id = 0
+
+    # ========== 查詢 ==========
+
+    def get(
+        self,
+        bucket: Hashable,
+        vector: Optional[Sequence[float]],
+        version: Hashable,
+        valid: Optional[Callable[[Any], bool]] = None
+    ) -> Optional[Any]:
+        """
+        查詢快取的決策
+
+        Args:
+            bucket: 分桶鍵
+            vector: 意圖向量（None 表示桶內精確比對）
+            version: 目前的節點集合版本
+            valid: 決策 -> 是否仍有效；無效的項目會被刪除
+        """
+        with self._lock:
+            if version != self._version:
+                self.clear(version)
+            bucket_id = self._buckets.get(bucket)
+            entry_id = None
+            if bucket_id is not None:
+                if vector is None:
+                    entry_id = self._exact.get(bucket_id)
+                elif self._vectors is not None:
+                    entry_id = self._nearest(bucket_id, self._normalize(vector))
+
+            entry = self._entries.get(entry_id) if entry_id is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.monotonic() or (valid is not None and not valid(entry.decision)):
+                self._remove(entry_id)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return entry.decision
+
+    def put(
+        self,
+        bucket: Hashable,
+        vector: Optional[Sequence[float]],
+        version: Hashable,
+        decision: Any
+    ):
+        """寫入決策（超過容量時淘汰最久未用的項目）"""
+        with self._lock:
+            if version != self._version:
+                self.clear(version)
+            if vector is not None:
+                normalized = self._normalize(vector)
+                if self._vectors is not None and self._vectors.shape[1] != normalized.shape[0]:
+                    self.clear(version)  # 向量維度改變（更換 embedder）
+                if self._vectors is None:
+                    self._vectors = np.zeros((self.size, normalized.shape[0]), dtype=np.float32)
+            bucket_id = self._buckets.setdefault(bucket, len(self._buckets))
+            if vector is None:
+                old = self._exact.get(bucket_id)
+                if old is not None:
+                    self._remove(old)
+
+            entry_id = self._next_id
+            self._next_id += 1
+            row = None
+            if vector is not None:
+                while not self._free_rows:
+                    self._evict()
+                row = self._free_rows.pop()
+                self._vectors[row] = normalized
+                self._row_bucket[row] = bucket_id
+                self._row_entry[row] = entry_id
+            else:
+                self._exact[bucket_id] = entry_id
+
+            self._entries[entry_id] = _CacheEntry(
+                bucket=bucket_id,
+                row=row,
+                decision=decision,
+                expires_at=time.monotonic() + self.ttl
+            )
+            while len(self._entries) > self.size:
+                self._evict()
+
+    def stats(self) -> Dict:
+        """取得快取統計"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.size,
+            "ttl": self.ttl,
+            "similarity": self.similarity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # ========== 內部 ==========
+
+    def _nearest(self, bucket_id: int, q: np.ndarray) -> Optional[int]:
+        """桶內相似度最高且超過門檻的項目"""
+        if q.shape[0] != self._vectors.shape[1]:
+            return None
+        rows = np.flatnonzero(self._row_bucket == bucket_id)
+        if len(rows) == 0:
+            return None
+        similarities = self._vectors[rows] @ q
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity:
+            return None
+        return self._row_entry[int(rows[best])]
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 0 else v
+
+    def _evict(self):
+        entry_id = next(iter(self._entries))
+        self._remove(entry_id)
+        self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        if entry.row is not None:
+            self._row_bucket[entry.row] = -1
+            self._free_rows.append(entry.row)
+        elif self._exact.get(entry.bucket) == entry_id:
+            del self._exact[entry.bucket]
@@ -0,0 +1,115 @@
+"""
+SIC-RING — Consistent Hash Ring
+一致性雜湊環
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: ECMP 的流量雜湊 —— 同一條流（會話）固定走同一條路徑
+
+功能:
+- 每個節點在環上放置多個虛擬節點，分布均勻
+- 新增 / 移除節點只重新對應該節點負責的區段（約 1/n 的鍵）
+- 自鍵的位置順時針走訪相異的節點，呼叫端可依容量 / 過濾條件跳過（bounded load）
+- 環於變更後延遲重建（NumPy 排序），查詢為一次二分搜尋 (bisect)
+
+作者: Claude (尾德)
+日期: 2026-01-16
+版本: 1.0.0
+"""
+
+import bisect
+import hashlib
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+def hash64(key: str) -> int:
+    """穩定的 64 位元雜湊（不受 PYTHONHASHSEED 影響，跨行程一致）"""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SIC_HashRing:
+    """
+    一致性雜湊環（虛擬節點）
+    """
+
+    # 配置
+    VNODES = 100  # 每個節點的虛擬節點數
+
+    def __init__(self, vnodes: Optional[int] = None):
+        """
+        初始化雜湊環
+
+        Args:
+            vnodes: 每個節點的虛擬節點數（預設 VNODES）
+        """
+        self.vnodes = vnodes or self.VNODES
+        self._points: Dict[str, List[int]] = {}  # 節點 -> 虛擬節點位置
+        self._ring: List[int] = []
+        self._owners: List[str] = []
+        self._dirty = False
+        self.rebuild_count = 0
+
+    def add(self, node: str):
+        """加入節點（已存在時不變）"""
+        if node in self._points:
+            return
+        self._points[node] = [hash64(f"{node}#{i}") for i in range(self.vnodes)]
+        self._dirty = True
+
+    def remove(self, node: str) -> bool:
+        """移除節點"""
+        if self._points.pop(node, None) is None:
+            return False
+        self._dirty = True
+        return True
+
+    def walk(self, key: str) -> Iterator[str]:
+        """自鍵在環上的位置順時針走訪相異的節點（第一個即為該鍵的對應節點）"""
+        if self._dirty:
+            self._rebuild()
+        size = len(self._owners)
+        if not size:
+            return
+        start = bisect.bisect_left(self._ring, hash64(key))
+        seen = set()
+        owners = self._owners
+        for offset in range(size):
+            owner = owners[(start + offset) % size]
+            if owner not in seen:
+                seen.add(owner)
+                yield owner
+                if len(seen) == len(self._points):
+                    return
+
+    def get(self, key: str) -> Optional[str]:
+        """鍵對應的節點"""
+        return next(self.walk(key), None)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._points
+
+    def stats(self) -> Dict:
+        """取得雜湊環統計"""
+        return {
+            "nodes": len(self._points),
+            "vnodes": self.vnodes,
+            "points": sum(len(points) for points in self._points.values()),
+            "rebuild_count": self.rebuild_count,
+        }
+
+    def _rebuild(self):
+        """以所有虛擬節點重建排序後的環"""
+        owners = [node for node, points in self._points.items() for _ in points]
+        ring = np.fromiter(
+            (point for points in self._points.values() for point in points),
+            dtype=np.uint64, count=len(owners)
+        )
+        order = np.argsort(ring, kind="stable")
+        self._ring = ring[order].tolist()
+        self._owners = [owners[i] for i in order.tolist()]
+        self._dirty = False
+        self.rebuild_count += 1
@@ -0,0 +1,209 @@
+"""
+SIC-PRF — Intent Profiler
+意圖特徵擷取器
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: 封包分類器 (packet classifier)，在轉送前一次解析出標頭欄位
+
+功能:
+- 領域關鍵字編譯為單一 Aho-Corasick 自動機，一次掃描意圖即找出所有命中的領域
+- 關鍵字可於執行期擴充（重建自動機並清空快取）
+- 以預先編譯的正規表示式偵測中日韓文字
+- 以意圖字串為鍵的 LRU 特徵快取
+
+作者: Claude (尾德)
+日期: 2026-01-14
+版本: 1.0.0
+"""
+
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# 預設領域關鍵字（比對前一律轉小寫）
+DEFAULT_DOMAIN_KEYWORDS: Dict[str, List[str]] = {
+    "finance": ["交易", "帳戶", "金融", "投資", "股票", "transaction", "finance"],
+    "medical": ["醫療", "健康", "診斷", "病患", "medical", "health"],
+    "legal": ["法律", "合約", "訴訟", "legal", "contract"],
+    "technical": ["程式", "代碼", "API", "系統", "code", "technical"],
+    "creative": ["創作", "故事", "設計", "creative", "story"],
+}
+
+_CJK_PATTERN = re.compile("[\u4e00-\u9fff]")
+
+
+def profile_fingerprint(intent_profile: Dict) -> Tuple:
+    """意圖特徵中影響語義距離的部分（領域提示、語言）"""
+    return (
+        tuple(sorted(intent_profile.get("domain_hints", ()))),
+        intent_profile.get("language"),
+    )
+
+
+class SIC_IntentProfiler:
+    """
+    意圖特徵擷取器（每個路由器建立一次）
+
+    回傳的特徵會被快取並在多次路由間共用，呼叫端不可修改
+    （集合欄位為 frozenset）；快取的 LRU 操作以鎖保護，可由多執行緒共用
+    """
+
+    # 配置
+    CACHE_SIZE = 4096  # 特徵快取保留的意圖數
+
+    def __init__(
+        self,
+        domain_keywords: Optional[Dict[str, Iterable[str]]] = None,
+        cache_size: Optional[int] = None
+    ):
+        """
+        初始化擷取器
+
+        Args:
+            domain_keywords: 領域 -> 關鍵字（預設 DEFAULT_DOMAIN_KEYWORDS）
+            cache_size: 特徵快取大小（預設 CACHE_SIZE）
+        """
+        self.domain_keywords: Dict[str, List[str]] = {}
+        self.cache_size = cache_size or self.CACHE_SIZE
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compile_count = 0
+
+        for domain, keywords in (domain_keywords or DEFAULT_DOMAIN_KEYWORDS).items():
+            self._merge(domain, keywords)
+        self._compile()
+
+    # ========== 關鍵字 ==========
+
+    def add_keywords(self, domain: str, keywords: Iterable[str]):
+        """新增領域關鍵字（重建自動機；已快取的特徵失效）"""
+        self._merge(domain, keywords)
+        self._compile()
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _merge(self, domain: str, keywords: Iterable[str]):
+        existing = self.domain_keywords.setdefault(domain, [])
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword and keyword not in existing:
+                existing.append(keyword)
+
+    def _compile(self):
+        """
+        建立 Aho-Corasick 自動機
+
+        _goto[state] 為字元轉移，_fail[state] 為失敗連結，
+        _output[state] 為該狀態（含失敗鏈上所有後綴）命中的領域位元遮罩
+        """
+        self._domains = list(self.domain_keywords)
+        goto: List[Dict[str, int]] = [{}]
+        output: List[int] = [0]
+        for bit, domain in enumerate(self._domains):
+            for keyword in self.domain_keywords[domain]:
+                state = 0
+                for ch in keyword:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        output.append(0)
+                    state = nxt
+                output[state] |= 1 << bit
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                output[nxt] |= output[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+        self._domain_sets: Dict[int, FrozenSet[str]] = {}
+        self.compile_count += 1
+
+    def match_domains(self, text: str) -> FrozenSet[str]:
+        """一次掃描找出文字（需已轉小寫）命中的所有領域"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        found = 0
+        for ch in text:
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            found |= output[state]
+
+        domains = self._domain_sets.get(found)
+        if domains is None:
+            domains = frozenset(
+                domain for bit, domain in enumerate(self._domains) if found >> bit & 1
+            )
+            self._domain_sets[found] = domains
+        return domains
+
+    # ========== 特徵 ==========
+
+    def profile(self, intent: str) -> Dict:
+        """
+        計算意圖的語義特徵（快取版本）
+
+        這是簡化版實作。生產環境應該使用：
+        - 真正的 embedding 模型
+        - 語義折疊 (Semantic Folding)
+        """
+        # get → move_to_end → popitem 之間不可被其他執行緒插入或淘汰
+        with self._cache_lock:
+            cached = self._cache.get(intent)
+            if cached is not None:
+                self._cache.move_to_end(intent)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        profile = {
+            "keywords": frozenset(),
+            "domain_hints": self.match_domains(intent.lower()),
+            "complexity": min(len(intent) / 100, 1.0),
+            "language": "zh" if _CJK_PATTERN.search(intent) else "en",
+        }
+        profile["fingerprint"] = profile_fingerprint(profile)
+
+        with self._cache_lock:
+            self._cache[intent] = profile
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return profile
+
+    def stats(self) -> Dict:
+        """取得擷取器統計"""
+        total = self.hits + self.misses
+        return {
+            "domains": len(self._domains),
+            "keywords": sum(len(keywords) for keywords in self.domain_keywords.values()),
+            "states": len(self._goto),
+            "compile_count": self.compile_count,
+            "cached": len(self._cache),
+            "max_cached": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,329 @@
+"""
+SIC-IDX — Semantic Vector Index
+語義向量索引（IVF 近似最近鄰）
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: 路由表的最長前綴匹配，但匹配的是「語義向量」
+
+功能:
+- 餘弦距離（向量於寫入時正規化，距離 = 1 - 內積）
+- 項目數未超過門檻時以 NumPy 精確搜尋（連續記憶體上的一次矩陣乘法）
+- 超過門檻後以球面 k-means 分群建立倒排表 (IVF)，查詢只掃描最近的 nprobe 個群
+- 寫入 O(nlist) 指派到最近的群；項目數倍增時重新分群
+- 刪除採墓碑標記，墓碑過多時壓縮
+- 查詢可帶過濾條件（可用性、能力），不足 k 筆時倍增掃描範圍（只掃描新加入的群）
+
+作者: Claude (尾德)
+日期: 2026-01-12
+版本: 1.0.0
+"""
+
+import math
+import heapq
+import random
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def spherical_kmeans(
+    sample: np.ndarray,
+    k: int,
+    iterations: int,
+    rng: random.Random
+) -> np.ndarray:
+    """
+    球面 k-means（樣本需已正規化）
+
+    以隨機樣本為初始中心；空群以隨機樣本重新播種
+
+    Returns:
+        (k, dim) 正規化後的群中心
+    """
+    sample_size = len(sample)
+    centroids = sample[rng.sample(range(sample_size), k)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        if empty.any():
+            sums[empty] = sample[rng.sample(range(sample_size), int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+        centroids = sums / np.maximum(norms, 1e-12)[:, None]
+    return centroids
+
+
+class SIC_IVFIndex:
+    """
+    IVF 近似最近鄰索引（NumPy）
+
+    以字串鍵（node_id）索引向量；同一鍵重複寫入視為更新
+    """
+
+    # 配置
+    EXACT_THRESHOLD = 2048       # 未超過此數量時精確搜尋（不分群）
+    NPROBE = 8                   # 查詢掃描的群數
+    KMEANS_ITERATIONS = 10
+    TRAIN_SAMPLES_PER_LIST = 64  # 分群時每群取樣數上限
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        seed: int = 0
+    ):
+        """
+        初始化索引
+
+        Args:
+            dim: 向量維度（None 表示由第一個寫入的向量決定）
+            nprobe: 查詢掃描的群數
+            seed: 分群取樣的亂數種子
+        """
+        self.dim = dim
+        self.nprobe = nprobe or self.NPROBE
+        self._rng = random.Random(seed)
+        self.train_count = 0
+        self.clear()
+
+    # ========== 寫入 ==========
+
+    def add(self, key: str, vector: Sequence[float]):
+        """寫入或更新向量"""
+        v = self._normalize(vector)
+        if key in self._ids:
+            self.remove(key)
+
+        if self._size == self._vectors.shape[0]:
+            self._grow(max(16, 2 * self._size))
+        node = self._size
+        self._vectors[node] = v
+        self._alive[node] = True
+        self._size += 1
+        self._keys.append(key)
+        self._ids[key] = node
+
+        if self._centroids is not None:
+            cell = int(np.argmax(self._centroids @ v))
+            self._lists[cell].append(node)
+            self._list_arrays[cell] = None
+
+    def remove(self, key: str) -> bool:
+        """移除向量（墓碑標記；墓碑多於存活項目時壓縮）"""
+        node = self._ids.pop(key, None)
+        if node is None:
+            return False
+        self._keys[node] = None
+        self._alive[node] = False
+        self._deleted += 1
+
+        if not self._ids:
+            self.clear()
+        elif self._deleted > len(self._ids) and self._deleted > self.EXACT_THRESHOLD:
+            self._compact()
+        return True
+
+    def clear(self):
+        """清空索引（保留維度）"""
+        self._vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._size = 0
+        # 內部 id -> 鍵（墓碑為 None）
+        self._keys: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._deleted = 0
+        # 倒排表（分群前為 None）
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: List[Optional[np.ndarray]] = []
+        self._trained_size = 0
+
+    # ========== 查詢 ==========
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 10,
+        filter: Optional[Callable[[str], bool]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        查詢 top-k 最近鄰
+
+        Args:
+            query: 查詢向量
+            k: 回傳數量
+            filter: 鍵過濾條件，只回傳 filter(key) 為真的項目
+            nprobe: 掃描群數（預設 self.nprobe）
+
+        Returns:
+            [(key, cosine_distance), ...] 依距離遞增
+        """
+        if not self._ids or k <= 0:
+            return []
+        q = self._normalize(query)
+        live = len(self._ids)
+        if live <= self.EXACT_THRESHOLD:
+            return self._exact(q, k, filter)
+        if self._centroids is None or live > 2 * self._trained_size:
+            self._train()
+
+        nlist = len(self._lists)
+        nprobe = min(nprobe or self.nprobe, nlist)
+        order = np.argsort(-(self._centroids @ q)).tolist()
+        results: List[Tuple[str, float]] = []
+        scanned = 0
+        while True:
+            nodes = np.concatenate([self._list_array(cell) for cell in order[scanned:nprobe]])
+            # 各群互斥，合併新掃描群的 top-k 與既有結果即為整體 top-k
+            results = heapq.nsmallest(
+                k, results + self._rank(q, nodes, k, filter), key=lambda hit: hit[1]
+            )
+            if len(results) == k or nprobe == nlist:
+                return results
+            # 過濾或墓碑使結果不足：擴大掃描範圍，只掃描新加入的群
+            scanned, nprobe = nprobe, min(2 * nprobe, nlist)
+
+    def distance(self, key: str, query: Sequence[float]) -> Optional[float]:
+        """單一項目與查詢向量的餘弦距離；鍵不存在回傳 None"""
+        node = self._ids.get(key)
+        if node is None:
+            return None
+        return float(1.0 - self._vectors[node] @ self._normalize(query))
+
+    def vector(self, key: str) -> Optional[np.ndarray]:
+        """項目的正規化向量（唯讀檢視）；鍵不存在回傳 None"""
+        node = self._ids.get(key)
+        if node is None:
+            return None
+        return self._vectors[node]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def stats(self) -> Dict:
+        """取得索引統計"""
+        return {
+            "size": len(self._ids),
+            "deleted": self._deleted,
+            "dim": self.dim,
+            "nlist": len(self._lists),
+            "nprobe": self.nprobe,
+            "trained_size": self._trained_size,
+            "train_count": self.train_count,
+            "bytes": self._vectors.nbytes + self._alive.nbytes
+                + (self._centroids.nbytes if self._centroids is not None else 0),
+        }
+
+    # ========== 內部 ==========
+
+    def _normalize(self, vector: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        if self.dim is None:
+            self.dim = v.shape[0]
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+        if v.shape[0] != self.dim:
+            raise ValueError(f"向量維度 {v.shape[0]} 與索引維度 {self.dim} 不符")
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm > 0 else v
+
+    def _grow(self, capacity: int):
+        """擴充向量陣列（容量倍增）"""
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._vectors = vectors
+        self._alive = alive
+
+    def _list_array(self, cell: int) -> np.ndarray:
+        """倒排表的 NumPy 版本（寫入後延遲重建）"""
+        array = self._list_arrays[cell]
+        if array is None:
+            array = np.array(self._lists[cell], dtype=np.int64)
+            self._list_arrays[cell] = array
+        return array
+
+    def _rank(
+        self,
+        q: np.ndarray,
+        nodes: Optional[np.ndarray],
+        k: int,
+        filter: Optional[Callable[[str], bool]]
+    ) -> List[Tuple[str, float]]:
+        """
+        對候選 id 計算距離並取 top-k（墓碑距離設為無限大）
+
+        nodes 為 None 表示全部項目，直接在連續記憶體上相乘，不做 fancy indexing 複製
+        """
+        if nodes is None:
+            distances = 1.0 - self._vectors[:self._size] @ q
+            distances[~self._alive[:self._size]] = np.inf
+            count = self._size
+        else:
+            distances = 1.0 - self._vectors[nodes] @ q
+            distances[~self._alive[nodes]] = np.inf
+            count = len(nodes)
+        if count == 0:
+            return []
+        if filter is None and k < count:
+            top = np.argpartition(distances, k)[:k]
+            order = top[np.argsort(distances[top])]
+        else:
+            order = np.argsort(distances)
+
+        results = []
+        for index in order.tolist():
+            distance = float(distances[index])
+            if distance == math.inf:
+                break
+            key = self._keys[index if nodes is None else nodes[index]]
+            if filter is None or filter(key):
+                results.append((key, distance))
+                if len(results) == k:
+                    break
+        return results
+
+    def _exact(
+        self,
+        q: np.ndarray,
+        k: int,
+        filter: Optional[Callable[[str], bool]]
+    ) -> List[Tuple[str, float]]:
+        """精確搜尋"""
+        return self._rank(q, None, k, filter)
+
+    def _train(self):
+        """
+        球面 k-means 分群並重建倒排表
+
+        nlist ≈ sqrt(n)；以取樣向量分群，再一次矩陣乘法指派全部項目
+        """
+        nodes = np.fromiter(self._ids.values(), dtype=np.int64, count=len(self._ids))
+        nlist = max(1, int(math.sqrt(len(nodes))))
+        sample_size = min(len(nodes), nlist * self.TRAIN_SAMPLES_PER_LIST)
+        sample = self._vectors[self._rng.sample(nodes.tolist(), sample_size)]
+
+        centroids = spherical_kmeans(sample, nlist, self.KMEANS_ITERATIONS, self._rng)
+
+        assignment = np.argmax(self._vectors[nodes] @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self._lists = [nodes[order[bounds[i]:bounds[i + 1]]].tolist() for i in range(nlist)]
+        self._list_arrays = [None] * nlist
+        self._centroids = centroids.astype(np.float32)
+        self._trained_size = len(nodes)
+        self.train_count += 1
+
+    def _compact(self):
+        """以存活項目重建陣列，清除墓碑"""
+        live = [(key, self._vectors[node].copy()) for key, node in self._ids.items()]
+        self.clear()
+        self._grow(max(16, len(live)))
+        for key, vector in live:
+            self.add(key, vector)
@@ -0,0 +1,355 @@
+"""
+SIC-PATH — Semantic Path Planner
+語義路徑規劃
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: 鏈路狀態路由 (OSPF) —— 拓撲變更時重建圖，以最短路徑樹回答查詢
+
+功能:
+- 節點間的語義轉換建為加權圖：邊權 = 每跳成本 + 節點語義距離
+  （雙方都有 embedding 時用角距離，否則用領域重疊）
+- 語言是圖的狀態：節點只接收自己支援的語言；具翻譯能力的節點可改變輸出語言
+  （例如 中文節點 → 中英翻譯節點 → 英文法律節點）
+- 每個節點只保留最近的 NEIGHBORS 個相容鄰居（稀疏圖）
+- 終點為以目標語言輸出、且與目標意圖距離不超過 GOAL_DISTANCE 的節點
+- 以目標為根的反向 Dijkstra 最短路徑樹，依目標快取；起點成本依來源快取；
+  拓撲變更（build）時全部失效
+- 跳數上限或節點不可用使樹上的路徑不適用時，以樹距離為啟發式做 A*
+  （樹距離是不受限制時的精確剩餘成本，必為下界，且不小於角距離下界）
+
+作者: Claude (尾德)
+日期: 2026-01-18
+版本: 1.0.0
+"""
+
+import heapq
+import math
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SIC_PathPlanner:
+    """
+    語義路徑規劃器
+
+    節點集合變更時呼叫 build()；查詢以 find_path() 進行
+    """
+
+    # 配置
+    HOP_COST = 0.1                       # 每多經過一個節點的固定成本
+    NEIGHBORS = 16                       # 每個（節點, 輸出語言）保留的鄰居數
+    GOAL_DISTANCE = 0.2                  # 與目標意圖距離不超過此值的節點才能作為終點
+    TREE_CACHE_SIZE = 64                 # 快取的最短路徑樹數（依目標）與起點數（依來源）
+    TRANSLATION_CAPABILITY = "translation"
+
+    def __init__(self):
+        self._nodes: List = []
+        self._state_node: List[int] = []
+        self._state_lang: List[str] = []
+        self._states: Dict[Tuple[int, str], int] = {}
+        self._edges: List[List[Tuple[int, float]]] = []
+        self._reverse: List[List[Tuple[int, float]]] = []
+        self._accepts: List[Tuple[str, ...]] = []
+        self._translators: List[bool] = []
+        self._trees: "OrderedDict[Hashable, Tuple[List[float], List[int], List[float]]]" = OrderedDict()
+        self._starts: "OrderedDict[Hashable, List[Tuple[int, float]]]" = OrderedDict()
+        self.build_count = 0
+        self.tree_hits = 0
+        self.tree_misses = 0
+        self.astar_searches = 0
+
+    # ========== 圖 ==========
+
+    def build(self, nodes: Sequence, vectors: Dict[str, np.ndarray]):
+        """
+        以目前的節點重建轉換圖，並清空最短路徑樹快取
+
+        Args:
+            nodes: SemanticNode 串列
+            vectors: node_id -> 已正規化的語義向量（沒有的節點以領域重疊計算距離）
+        """
+        self._nodes = list(nodes)
+        self._trees.clear()
+        self._starts.clear()
+        self.build_count += 1
+        count = len(self._nodes)
+
+        languages = sorted({lang for node in self._nodes for lang in node.languages})
+        # 未宣告語言的節點視為接受任何語言
+        self._accepts = [tuple(node.languages) or tuple(languages) for node in self._nodes]
+        self._translators = [self.TRANSLATION_CAPABILITY in node.capabilities for node in self._nodes]
+
+        self._states = {}
+        self._state_node = []
+        self._state_lang = []
+        for i, accepts in enumerate(self._accepts):
+            for lang in accepts:
+                self._states[(i, lang)] = len(self._state_node)
+                self._state_node.append(i)
+                self._state_lang.append(lang)
+        self._edges = [[] for _ in self._state_node]
+        self._reverse = [[] for _ in self._state_node]
+        if count < 2:
+            return
+
+        domain_bits: Dict[str, int] = {}
+        for node in self._nodes:
+            for domain in node.domains:
+                domain_bits.setdefault(domain, len(domain_bits))
+        domains = np.zeros((count, max(len(domain_bits), 1)), dtype=np.int32)
+        for i, node in enumerate(self._nodes):
+            domains[i, [domain_bits[domain] for domain in node.domains]] = 1
+
+        accepts = np.zeros((count, max(len(languages), 1)), dtype=bool)
+        lang_column = {lang: column for column, lang in enumerate(languages)}
+        for i, langs in enumerate(self._accepts):
+            accepts[i, [lang_column[lang] for lang in langs]] = True
+
+        has_vector = np.array([node.node_id in vectors for node in self._nodes], dtype=bool)
+        dim = len(next(iter(vectors.values()))) if vectors else 0
+        matrix = np.zeros((count, dim), dtype=np.float32)
+        for i, node in enumerate(self._nodes):
+            if has_vector[i]:
+                matrix[i] = vectors[node.node_id]
+
+        k = min(self.NEIGHBORS, count - 1)
+        for i in range(count):
+            distances = np.maximum(0.0, 0.4 - 0.2 * (domains @ domains[i]))
+            if has_vector[i]:
+                cosine = np.clip(matrix @ matrix[i], -1.0, 1.0)
+                distances = np.where(has_vector, np.arccos(cosine) / math.pi, distances)
+            distances[i] = np.inf
+
+            for lang in self._accepts[i]:
+                source = self._states[(i, lang)]
+                row = np.where(accepts[:, lang_column[lang]], distances, np.inf)
+                for j in np.argpartition(row, k - 1)[:k].tolist():
+                    distance = float(row[j])
+                    if distance == math.inf:
+                        continue
+                    weight = self.HOP_COST + distance
+                    outputs = self._accepts[j] if self._translators[j] else (lang,)
+                    for output in outputs:
+                        target = self._states[(j, output)]
+                        self._edges[source].append((target, weight))
+                        self._reverse[target].append((source, weight))
+
+    # ========== 查詢 ==========
+
+    def find_path(
+        self,
+        source_key: Hashable,
+        target_key: Hashable,
+        source_language: str,
+        target_language: str,
+        start_cost: Callable[[object], float],
+        terminal_cost: Callable[[object], float],
+        max_hops: int,
+        admissible: Optional[Callable[[str], bool]] = None
+    ) -> Tuple[List, float]:
+        """
+        尋找成本最低的語義路徑
+
+        路徑成本 = start_cost(第一個節點) + Σ(HOP_COST + 節點間距離) + terminal_cost(最後一個節點)；
+        第一個節點需接受來源語言，最後一個節點需以目標語言輸出且 terminal_cost 不超過
+        GOAL_DISTANCE（沒有節點符合時放寬為只要求目標語言）
+
+        Args:
+            source_key / target_key: 來源 / 目標的快取鍵（同一鍵的 start_cost / terminal_cost 必須相同）
+            start_cost / terminal_cost: 節點與來源 / 目標意圖的距離（不可為負）
+            max_hops: 路徑最多經過的節點數
+            admissible: node_id -> 是否可用（不可用的節點不出現在路徑上）
+
+        Returns:
+            (節點串列, 路徑成本)；找不到時為 ([], inf)
+        """
+        if not self._state_node or max_hops <= 0:
+            return [], math.inf
+        remaining, next_state, terminal = self._tree(target_key, target_language, terminal_cost)
+
+        starts = self._starts.get(source_key)
+        if starts is None:
+            starts = self._start_states(source_language, start_cost)
+            self._starts[source_key] = starts
+            if len(self._starts) > self.TREE_CACHE_SIZE:
+                self._starts.popitem(last=False)
+        else:
+            self._starts.move_to_end(source_key)
+        best_cost, best_state = math.inf, -1
+        for state, cost in starts:
+            if cost + remaining[state] < best_cost:
+                best_cost, best_state = cost + remaining[state], state
+        if best_state < 0:
+            return [], math.inf
+
+        states = [best_state]
+        while next_state[states[-1]] >= 0:
+            states.append(next_state[states[-1]])
+        path = self._collapse(states)
+        if len(path) <= max_hops and (
+            admissible is None or all(admissible(node.node_id) for node in path)
+        ):
+            return path, best_cost
+
+        return self._astar(starts, remaining, terminal, max_hops, admissible)
+
+    def stats(self) -> Dict:
+        """取得規劃器統計"""
+        return {
+            "nodes": len(self._nodes),
+            "states": len(self._state_node),
+            "edges": sum(len(edges) for edges in self._edges),
+            "trees": len(self._trees),
+            "build_count": self.build_count,
+            "tree_hits": self.tree_hits,
+            "tree_misses": self.tree_misses,
+            "astar_searches": self.astar_searches,
+        }
+
+    # ========== 內部 ==========
+
+    def _tree(
+        self,
+        target_key: Hashable,
+        target_language: str,
+        terminal_cost: Callable[[object], float]
+    ) -> Tuple[List[float], List[int], List[float]]:
+        """
+        以目標為根的反向 Dijkstra 最短路徑樹（快取）
+
+        Returns:
+            (各狀態到目標的最低成本, 各狀態的下一個狀態（-1 表示在此結束）, 各狀態的結束成本)
+        """
+        tree = self._trees.get(target_key)
+        if tree is not None:
+            self._trees.move_to_end(target_key)
+            self.tree_hits += 1
+            return tree
+        self.tree_misses += 1
+
+        size = len(self._state_node)
+        sinks = [s for s in range(size) if self._state_lang[s] == target_language]
+        if not sinks:
+            sinks = list(range(size))  # 沒有節點支援目標語言：不限制輸出語言
+
+        node_costs: Dict[int, float] = {}
+        for s in sinks:
+            i = self._state_node[s]
+            if i not in node_costs:
+                node_costs[i] = terminal_cost(self._nodes[i])
+        goals = [s for s in sinks if node_costs[self._state_node[s]] <= self.GOAL_DISTANCE]
+        terminal = [math.inf] * size
+        for s in goals or sinks:
+            terminal[s] = node_costs[self._state_node[s]]
+
+        remaining = list(terminal)
+        next_state = [-1] * size
+        heap = [(cost, s) for s, cost in enumerate(terminal) if cost < math.inf]
+        heapq.heapify(heap)
+        while heap:
+            cost, s = heapq.heappop(heap)
+            if cost > remaining[s]:
+                continue
+            for predecessor, weight in self._reverse[s]:
+                candidate = cost + weight
+                if candidate < remaining[predecessor]:
+                    remaining[predecessor] = candidate
+                    next_state[predecessor] = s
+                    heapq.heappush(heap, (candidate, predecessor))
+
+        tree = (remaining, next_state, terminal)
+        self._trees[target_key] = tree
+        if len(self._trees) > self.TREE_CACHE_SIZE:
+            self._trees.popitem(last=False)
+        return tree
+
+    def _start_states(
+        self,
+        source_language: str,
+        start_cost: Callable[[object], float]
+    ) -> List[Tuple[int, float]]:
+        """接受來源語言的節點的起始狀態與成本"""
+        known = any(source_language in accepts for accepts in self._accepts)
+        starts = []
+        for i, node in enumerate(self._nodes):
+            accepts = self._accepts[i]
+            if known and source_language not in accepts:
+                continue
+            cost = start_cost(node)
+            if self._translators[i] or not known:
+                starts.extend((self._states[(i, lang)], cost) for lang in accepts)
+            else:
+                starts.append((self._states[(i, source_language)], cost))
+        return starts
+
+    def _astar(
+        self,
+        starts: List[Tuple[int, float]],
+        remaining: List[float],
+        terminal: List[float],
+        max_hops: int,
+        admissible: Optional[Callable[[str], bool]]
+    ) -> Tuple[List, float]:
+        """
+        限制跳數與可用節點的 A*（啟發式為最短路徑樹的剩餘成本）
+
+        搜尋狀態為 (圖狀態, 已經過節點數)；到達可結束的狀態時以結束成本推入終點
+        """
+        self.astar_searches += 1
+        nodes = self._nodes
+        allowed: Dict[int, bool] = {}
+
+        def usable(state: int) -> bool:
+            i = self._state_node[state]
+            if i not in allowed:
+                allowed[i] = admissible is None or admissible(nodes[i].node_id)
+            return allowed[i]
+
+        GOAL = -1
+        best: Dict[Tuple[int, int], float] = {}
+        parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {}
+        heap: List[Tuple[float, float, int, int]] = []
+        for state, cost in starts:
+            if remaining[state] < math.inf and usable(state) and cost < best.get((state, 1), math.inf):
+                best[(state, 1)] = cost
+                parent[(state, 1)] = None
+                heapq.heappush(heap, (cost + remaining[state], cost, state, 1))
+
+        while heap:
+            _, cost, state, hops = heapq.heappop(heap)
+            if state == GOAL:
+                key = parent[(GOAL, hops)]
+                states = []
+                while key is not None:
+                    states.append(key[0])
+                    key = parent[key]
+                return self._collapse(states[::-1]), cost
+            if cost > best.get((state, hops), math.inf):
+                continue
+
+            if terminal[state] < math.inf:
+                total = cost + terminal[state]
+                if total < best.get((GOAL, hops), math.inf):
+                    best[(GOAL, hops)] = total
+                    parent[(GOAL, hops)] = (state, hops)
+                    heapq.heappush(heap, (total, total, GOAL, hops))
+            if hops >= max_hops:
+                continue
+            for successor, weight in self._edges[state]:
+                candidate = cost + weight
+                key = (successor, hops + 1)
+                if remaining[successor] == math.inf or candidate >= best.get(key, math.inf):
+                    continue
+                if not usable(successor):
+                    continue
+                best[key] = candidate
+                parent[key] = (state, hops)
+                heapq.heappush(heap, (candidate + remaining[successor], candidate, successor, hops + 1))
+
+        return [], math.inf
+
+    def _collapse(self, states: List[int]) -> List:
+        """狀態序列轉為節點序列"""
+        return [self._nodes[self._state_node[s]] for s in states]
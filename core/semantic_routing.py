@@ -6,7 +6,7 @@ USCA 協議棧位置: L2 (Network Layer)
 類比: IP Router，但路由依據是「語義距離」而非「網路拓撲」
 
 核心功能（老翔需求）:
-- 以語義距離（cosine / KL / HNSW）判斷路徑
+- 以語義距離（cosine / KL / 向量索引）判斷路徑
 - 以"語境相似度"選擇最短語義路徑
 - 向量 Mesh routing（像 IP mesh，但以 meaning 走）
 - 動態語境路由（context-aware routing）
@@ -19,15 +19,51 @@ USCA 協議棧位置: L2 (Network Layer)
 """
 
 import math
+import time
+import asyncio
+import random
 import hashlib
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
-from functools import lru_cache
-from functools import lru_cache
-import json
-import json
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import itertools
+
+import numpy as np
+
+try:
+    from .semantic_index import SIC_IVFIndex
+    from .intent_profiler import SIC_IntentProfiler, profile_fingerprint
+    from .hash_ring import SIC_HashRing, hash64
+    from .semantic_path import SIC_PathPlanner
+    from .decision_cache import SIC_DecisionCache
+except ImportError:  # 直接以腳本執行（python core/semantic_routing.py）
+    from semantic_index import SIC_IVFIndex
+    from intent_profiler import SIC_IntentProfiler, profile_fingerprint
+    from hash_ring import SIC_HashRing, hash64
+    from semantic_path import SIC_PathPlanner
+    from decision_cache import SIC_DecisionCache
+
+
+def _resize(array: np.ndarray, rows: int, cols: Optional[int] = None) -> np.ndarray:
+    """以零值擴充陣列的列數（與行數）；已足夠時原樣回傳"""
+    if cols is None:
+        if len(array) >= rows:
+            return array
+        grown = np.zeros(rows, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+    old_rows, old_cols = array.shape
+    if old_rows >= rows and old_cols >= cols:
+        return array
+    if cols > old_cols:
+        cols = max(8, cols, 2 * old_cols)
+    grown = np.zeros((max(rows, old_rows), max(cols, old_cols)), dtype=array.dtype)
+    grown[:old_rows, :old_cols] = array
+    return grown
 
 
 class RoutingStrategy(Enum):
@@ -37,15 +73,52 @@ class RoutingStrategy(Enum):
     MULTIPATH = "MULTIPATH"       # 多路徑
     FAILOVER = "FAILOVER"         # 故障轉移
     CONTEXT_AWARE = "CONTEXT_AWARE"  # 語境感知
+    POWER_OF_TWO = "POWER_OF_TWO"  # 前 k 名候選中隨機取二，選綜合分數較低者
+    WEIGHTED_RANDOM = "WEIGHTED_RANDOM"  # 依綜合分數倒數加權隨機
+    LEAST_OUTSTANDING = "LEAST_OUTSTANDING"  # 進行中請求最少
+    AFFINITY = "AFFINITY"  # 會話黏著：一致性雜湊（有界負載）
+
+
+class CircuitState(Enum):
+    """節點斷路器狀態"""
+    CLOSED = "CLOSED"         # 正常
+    OPEN = "OPEN"             # 斷路：不接受路由
+    HALF_OPEN = "HALF_OPEN"   # 試探：允許少量請求
+
+
+class FailoverError(Enum):
+    """route_with_failover 錯誤"""
+    NO_NODES = "NO_NODES"                    # 沒有可用節點
+    ALL_FAILED = "ALL_FAILED"                # 所有嘗試都失敗
+    DEADLINE_EXCEEDED = "DEADLINE_EXCEEDED"  # 期限內沒有成功的結果
+
+
+class DispatchMode(Enum):
+    """dispatch 的結果收集方式"""
+    FIRST = "FIRST"      # 第一個成功的回應即完成
+    QUORUM = "QUORUM"    # k 個成功的回應即完成（k-of-n）
+    ALL = "ALL"          # 等待所有選中節點
+
+
+class DispatchError(Enum):
+    """dispatch 錯誤"""
+    NO_NODES = "NO_NODES"                    # 決策沒有選中節點
+    INSUFFICIENT = "INSUFFICIENT"            # 成功的回應少於所需（其餘皆失敗）
+    DEADLINE_EXCEEDED = "DEADLINE_EXCEEDED"  # 期限到時成功的回應仍少於所需
 
 
 @dataclass
 class SemanticNode:
-    """語義節點（模型/服務端點）"""
+    """
+    語義節點（模型/服務端點）
+    
+    註冊後 load / available / latency_ms 須經由路由器的 update_node_load 或
+    report_* 更新，直接賦值不會反映到路由使用的節點陣列
+    """
     node_id: str
     model_type: str              # claude, gpt, gemini, qwen, etc.
     capabilities: List[str]      # 能力標籤
-    semantic_profile: Dict       # 語義特徵向量（簡化版）
+    semantic_profile: Dict       # 語義特徵（"embedding" 鍵為語義向量，供向量索引使用）
     load: float = 0.0            # 當前負載 0-1
     available: bool = True
     latency_ms: float = 0.0
@@ -55,6 +128,34 @@ class SemanticNode:
     languages: List[str] = field(default_factory=list)  # 支援語言
 
 
+@dataclass
+class NodeTelemetry:
+    """
+    節點遙測狀態（指數加權移動平均）
+    
+    寫入端（report_*）持有節點自己的 lock；路由只讀取同步後的
+    SemanticNode 欄位與節點陣列，不加鎖
+    """
+    load: float = 0.0
+    latency_ms: float = 0.0
+    error_rate: float = 0.0
+    latency_samples: int = 0
+    load_samples: int = 0
+    requests: int = 0
+    errors: int = 0
+    outstanding: int = 0  # begin_request 後尚未回報結果的請求數
+    last_report: Optional[float] = None  # time.monotonic()
+    
+    # 斷路器
+    circuit: CircuitState = CircuitState.CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    probes: int = 0  # 半開狀態已放行的試探請求數
+    
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=128), repr=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
 @dataclass
 class RouteDecision:
     """路由決策結果"""
@@ -65,6 +166,28 @@ class RouteDecision:
     alternatives: List[SemanticNode] = field(default_factory=list)
 
 
+@dataclass
+class FailoverResult:
+    """route_with_failover 的執行結果"""
+    result: Any
+    node: Optional[SemanticNode]                 # 產生結果的節點
+    error: Optional[FailoverError] = None
+    attempts: List[str] = field(default_factory=list)  # 依啟動順序的 node_id
+    failures: List[Tuple[str, BaseException]] = field(default_factory=list)
+    hedged: bool = False                         # 是否送出過對沖請求
+
+
+@dataclass
+class DispatchResult:
+    """dispatch 的執行結果"""
+    results: List[Tuple[SemanticNode, Any]] = field(default_factory=list)  # 依完成順序
+    error: Optional[DispatchError] = None
+    attempts: List[str] = field(default_factory=list)  # 依啟動順序的 node_id
+    failures: List[Tuple[str, BaseException]] = field(default_factory=list)
+    cancelled: List[str] = field(default_factory=list)  # 已達所需數量而取消的 node_id
+    timed_out: List[str] = field(default_factory=list)  # 期限到時仍未完成的 node_id
+
+
 class SIC_Router:
     """
     SIC 語義路由器
@@ -75,16 +198,131 @@ class SIC_Router:
     - 動態語境感知路由
     
     市場價值：「向量世界的 Cisco」— 老翔
+    
+    節點的 semantic_profile 帶有 "embedding" 且能取得意圖向量時（route 傳入
+    intent_embedding，或建構時提供 embedder），route 以向量索引查詢 top-k
+    候選再套用負載/延遲懲罰，不再逐一評分所有節點
     """
     
-    def __init__(self):
+    # 配置
+    ANN_TOP_K = 32  # 向量索引查詢的候選數
+    DISTANCE_CACHE_SIZE = 1024  # 距離快取保留的意圖指紋數
+    DECISION_TOP_K = 4  # 決策需要的候選數（選擇 + 3 個備選）
+    TELEMETRY_ALPHA = 0.3  # 遙測 EWMA 中最新樣本的權重
+    SPREAD_TOLERANCE = 0.15  # 分散 / 黏著策略的候選與最佳距離的容許差（小於一個領域匹配）
+    AFFINITY_LOAD_FACTOR = 1.25  # 有界負載：節點進行中請求數上限為平均的此倍數
+    AFFINITY_MAX_PROBES = 64  # 雜湊環上最多檢查的節點數
+    BREAKER_FAILURES = 5  # 連續失敗（含逾時）達此次數即斷路
+    BREAKER_OPEN_SECONDS = 5.0  # 斷路多久後進入半開試探
+    BREAKER_PROBES = 1  # 半開時放行的試探請求數（由 begin_request 扣除）
+    FAILOVER_MAX_ATTEMPTS = 3  # 主節點 + 備選節點的嘗試上限
+    FAILOVER_DEADLINE_SECONDS = 30.0
+    FAILOVER_WORKERS = 16  # route_with_failover 執行緒池大小
+    HEDGE_PERCENTILE = 0.95  # 對沖延遲取主節點近期延遲的此百分位
+    HEDGE_MIN_SAMPLES = 20  # 延遲樣本不足時不對沖
+    DISPATCH_CONCURRENCY = 32  # dispatch 同時進行的請求數上限
+    
+    # 在語義相近的候選間分散流量的策略
+    SPREAD_STRATEGIES = (
+        RoutingStrategy.POWER_OF_TWO,
+        RoutingStrategy.WEIGHTED_RANDOM,
+        RoutingStrategy.LEAST_OUTSTANDING,
+    )
+    
+    def __init__(
+        self,
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+        ann_top_k: Optional[int] = None,
+        domain_keywords: Optional[Dict[str, List[str]]] = None,
+        seed: Optional[int] = None,
+        decision_cache_ttl: float = 0.0
+    ):
+        """
+        初始化路由器
+        
+        Args:
+            embedder: 意圖文字 -> 語義向量（需與節點 embedding 同一模型、同維度）
+            ann_top_k: 向量索引查詢的候選數（預設 ANN_TOP_K）
+            domain_keywords: 意圖領域偵測的關鍵字（預設 DEFAULT_DOMAIN_KEYWORDS）
+            seed: 隨機分散策略的亂數種子
+            decision_cache_ttl: 路由決策快取的有效秒數（預設 0 停用）；啟用後命中的決策
+                在 ttl 內不反映負載 / 延遲變化（只在選中節點不可用時失效）
+        """
         self.nodes: Dict[str, SemanticNode] = {}
         self.routing_table: Dict[str, List[str]] = {}  # domain -> [node_ids]
-        self.route_cache: Dict[str, RouteDecision] = {}
+        # 路由決策快取：近似重複的意圖直接取用先前的決策
+        self.route_cache = SIC_DecisionCache(ttl=decision_cache_ttl)
+        
+        # 意圖特徵擷取器（關鍵字自動機只編譯一次，特徵以 LRU 快取）
+        self.profiler = SIC_IntentProfiler(domain_keywords)
+        
+        # 節點遙測（report_latency / report_load / report_error）
+        self._telemetry: Dict[str, NodeTelemetry] = {}
+        self._open_circuits: Dict[str, NodeTelemetry] = {}
+        self._rng = random.Random(seed)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # 會話黏著的一致性雜湊環
+        self.affinity_ring = SIC_HashRing()
+        
+        # 語義路徑規劃：節點註冊 / 註銷時拓撲版本遞增，轉換圖延遲重建
+        self.topology_version = 0
+        self.path_planner = SIC_PathPlanner()
+        self._planned_version: Optional[int] = None
+        
+        self.embedder = embedder
+        self.ann_top_k = ann_top_k or self.ANN_TOP_K
+        # 帶 embedding 的節點進向量索引，其餘節點以關鍵字啟發式評分
+        self.embedding_index = SIC_IVFIndex()
+        self._unindexed: Dict[str, SemanticNode] = {}
+        
+        # 距離快取: 意圖指紋 -> {node_id: (節點版本, 語義距離)}
+        self._distance_cache: "OrderedDict[Tuple, Dict[str, Tuple[int, float]]]" = OrderedDict()
+        self._distance_lock = threading.Lock()  # 保護快取的 LRU 順序、淘汰與統計
+        self._node_versions: Dict[str, int] = {}
+        self._versions = itertools.count(1)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_invalidations = 0
+        
+        # 能力 / 領域 / 語言位元索引：名稱 -> 位元位置，node_id -> 位元遮罩
+        self._capability_bits: Dict[str, int] = {}
+        self._domain_bits: Dict[str, int] = {}
+        self._language_bits: Dict[str, int] = {}
+        self._capability_masks: Dict[str, int] = {}
+        self._domain_masks: Dict[str, int] = {}
+        
+        # 節點陣列（struct-of-arrays），以槽位為索引；register_node / update_node_load 時同步
+        # 矩陣的列為節點槽位，行為位元（能力矩陣的每一行即該能力的倒排索引）
+        self._slot_ids: List[Optional[str]] = []
+        self._slot_nodes: List[Optional[SemanticNode]] = []
+        self._slot_of: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._occupied = np.zeros(0, dtype=bool)
+        self._available = np.zeros(0, dtype=bool)
+        self._load = np.zeros(0, dtype=np.float64)
+        self._latency = np.zeros(0, dtype=np.float64)
+        self._outstanding = np.zeros(0, dtype=np.int64)
+        self._capability_matrix = np.zeros((0, 0), dtype=bool)
+        self._domain_matrix = np.zeros((0, 0), dtype=bool)
+        self._language_matrix = np.zeros((0, 0), dtype=bool)
     
     def register_node(self, node: SemanticNode):
-        """註冊語義節點"""
+        """註冊語義節點（重複註冊同一 node_id 視為更新）"""
+        if node.node_id in self.nodes:
+            self.unregister_node(node.node_id)
         self.nodes[node.node_id] = node
+        self._node_versions[node.node_id] = next(self._versions)
+        self._telemetry[node.node_id] = NodeTelemetry(load=node.load, latency_ms=node.latency_ms)
+        self._index_node(node)
+        self.affinity_ring.add(node.node_id)
+        self.topology_version += 1
+        
+        embedding = self._node_embedding(node)
+        if embedding is not None:
+            self.embedding_index.add(node.node_id, embedding)
+        else:
+            self._unindexed[node.node_id] = node
         
         # 更新路由表
         for domain in node.domains:
@@ -97,18 +335,392 @@ class SIC_Router:
         """註銷語義節點"""
         if node_id in self.nodes:
             node = self.nodes.pop(node_id)
+            self._node_versions.pop(node_id, None)
+            self._telemetry.pop(node_id, None)
+            self._open_circuits.pop(node_id, None)
+            self._invalidate_node(node_id)
+            self._unindex_node(node_id)
+            self.affinity_ring.remove(node_id)
+            self.topology_version += 1
+            self.embedding_index.remove(node_id)
+            self._unindexed.pop(node_id, None)
             for domain in node.domains:
                 if domain in self.routing_table:
                     self.routing_table[domain] = [
                         n for n in self.routing_table[domain] if n != node_id
                     ]
     
+    def update_node_load(
+        self,
+        node_id: str,
+        load: Optional[float] = None,
+        latency_ms: Optional[float] = None,
+        available: Optional[bool] = None
+    ) -> bool:
+        """
+        直接設定節點的負載 / 延遲 / 可用性（遙測 EWMA 自設定值繼續累積）
+        
+        這些欄位不進距離快取（每次路由即時套用），更新後不需失效快取；
+        路由使用的節點陣列只在此處與 report_* 同步，請勿直接修改節點欄位。
+        領域、語言、embedding 等語義欄位變更請重新 register_node
+        
+        Returns:
+            節點是否存在
+        """
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return False
+        with telemetry.lock:
+            if load is not None:
+                telemetry.load = load
+            if latency_ms is not None:
+                telemetry.latency_ms = latency_ms
+            return self._publish(node_id, telemetry, load, latency_ms, available)
+    
+    def add_domain_keywords(self, domain: str, keywords: List[str]):
+        """
+        擴充意圖領域偵測的關鍵字
+    
+        距離快取以意圖指紋為鍵，不受影響；只有意圖特徵快取需要重建
+        """
+        self.profiler.add_keywords(domain, keywords)
+    
+    # ========== 節點遙測 ==========
+    
+    def begin_request(self, node_id: str) -> bool:
+        """
+        登記一個送往節點的請求（LEAST_OUTSTANDING 依此計數）
+        
+        每次 begin_request 之後應以 report_latency 或 report_error 回報結果
+        （或以 cancel_request 撤銷）。半開節點的試探名額在此扣除，而非在 route()
+        選中時：route() 的結果不一定被送出（BROADCAST 子集、快取命中後放棄等），
+        在選中時扣除會讓未送出的試探永久佔用名額
+        """
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return False
+        with telemetry.lock:
+            telemetry.outstanding += 1
+            if telemetry.circuit == CircuitState.HALF_OPEN:
+                # 試探名額用完時，結果回報前不再接受路由（_publish 更新可用性）
+                telemetry.probes += 1
+            return self._publish(node_id, telemetry, None, None, None)
+    
+    def cancel_request(self, node_id: str) -> bool:
+        """
+        撤銷一個沒有結果的 begin_request（請求被取消）
+        
+        只減少進行中請求數並歸還半開試探名額，不計入延遲、錯誤率與斷路器
+        """
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return False
+        with telemetry.lock:
+            if telemetry.outstanding:
+                telemetry.outstanding -= 1
+            if telemetry.circuit == CircuitState.HALF_OPEN and telemetry.probes:
+                telemetry.probes -= 1
+            return self._publish(node_id, telemetry, None, None, None)
+    
+    def report_latency(self, node_id: str, latency_ms: float) -> bool:
+        """回報一次成功請求的延遲（延遲 EWMA；錯誤率以成功樣本衰減）"""
+        return self._observe(node_id, latency_ms=latency_ms, error=False)
+    
+    def report_error(self, node_id: str, latency_ms: Optional[float] = None) -> bool:
+        """
+        回報一次失敗請求（計入斷路器）
+        
+        逾時等帶有延遲的失敗也應傳入 latency_ms，避免快速失敗的節點看起來延遲很低
+        """
+        return self._observe(node_id, latency_ms=latency_ms, error=True)
+    
+    def report_load(self, node_id: str, load: float) -> bool:
+        """回報節點負載取樣（0-1）"""
+        return self._observe(node_id, load=load)
+    
+    def get_node_telemetry(self, node_id: str) -> Optional[Dict]:
+        """取得節點遙測快照；節點不存在回傳 None"""
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return None
+        with telemetry.lock:
+            return {
+                "load": telemetry.load,
+                "latency_ms": telemetry.latency_ms,
+                "error_rate": telemetry.error_rate,
+                "requests": telemetry.requests,
+                "errors": telemetry.errors,
+                "load_samples": telemetry.load_samples,
+                "outstanding": telemetry.outstanding,
+                "circuit": telemetry.circuit.value,
+                "consecutive_failures": telemetry.consecutive_failures,
+                "age_s": time.monotonic() - telemetry.last_report
+                    if telemetry.last_report is not None else None,
+            }
+    
+    def _observe(
+        self,
+        node_id: str,
+        latency_ms: Optional[float] = None,
+        load: Optional[float] = None,
+        error: Optional[bool] = None
+    ) -> bool:
+        """
+        將一個樣本併入 EWMA 並同步到節點
+        
+        可由多個執行緒同時呼叫：每個節點一把鎖，不同節點的回報互不阻塞。
+        第一個樣本直接取代註冊時的靜態值
+        """
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return False
+        alpha = self.TELEMETRY_ALPHA
+        with telemetry.lock:
+            if latency_ms is not None:
+                weight = alpha if telemetry.latency_samples else 1.0
+                telemetry.latency_ms += weight * (latency_ms - telemetry.latency_ms)
+                telemetry.latency_samples += 1
+                telemetry.recent_latencies.append(latency_ms)
+            if load is not None:
+                weight = alpha if telemetry.load_samples else 1.0
+                telemetry.load += weight * (load - telemetry.load)
+                telemetry.load_samples += 1
+            if error is not None:
+                if telemetry.outstanding:
+                    telemetry.outstanding -= 1
+                telemetry.requests += 1
+                telemetry.errors += error
+                telemetry.error_rate += alpha * (float(error) - telemetry.error_rate)
+                self._update_circuit(node_id, telemetry, error)
+            telemetry.last_report = time.monotonic()
+            return self._publish(
+                node_id,
+                telemetry,
+                telemetry.load if load is not None else None,
+                telemetry.latency_ms if latency_ms is not None else None,
+                None
+            )
+    
+    def _publish(
+        self,
+        node_id: str,
+        telemetry: NodeTelemetry,
+        load: Optional[float],
+        latency_ms: Optional[float],
+        available: Optional[bool]
+    ) -> bool:
+        """
+        將數值寫入節點欄位與節點陣列（呼叫端持有 telemetry.lock）
+        
+        每個欄位是單一值的替換，路由讀到的是更新前或更新後的值，不會是半更新的狀態
+        """
+        node = self.nodes.get(node_id)
+        slot = self._slot_of.get(node_id)
+        if node is None or slot is None or self._telemetry.get(node_id) is not telemetry:
+            return False  # 回報期間節點被註銷或重新註冊
+        if load is not None:
+            node.load = load
+            self._load[slot] = load
+        if latency_ms is not None:
+            node.latency_ms = latency_ms
+            self._latency[slot] = latency_ms
+        if available is not None:
+            node.available = available
+        self._outstanding[slot] = telemetry.outstanding
+        # 陣列中的可用性 = 節點設定 AND 斷路器放行
+        self._available[slot] = node.available and (
+            telemetry.circuit == CircuitState.CLOSED
+            or telemetry.circuit == CircuitState.HALF_OPEN and telemetry.probes < self.BREAKER_PROBES
+        )
+        return True
+    
+    # ========== 斷路器 ==========
+    
+    def _update_circuit(self, node_id: str, telemetry: NodeTelemetry, error: bool):
+        """
+        依請求結果轉換斷路器狀態（呼叫端持有 telemetry.lock）
+        
+        CLOSED 連續失敗 BREAKER_FAILURES 次 -> OPEN；
+        HALF_OPEN 試探成功 -> CLOSED，失敗 -> OPEN
+        """
+        if not error:
+            telemetry.consecutive_failures = 0
+            if telemetry.circuit == CircuitState.HALF_OPEN:
+                telemetry.circuit = CircuitState.CLOSED
+            return
+        telemetry.consecutive_failures += 1
+        if (telemetry.circuit == CircuitState.HALF_OPEN
+                or telemetry.circuit == CircuitState.CLOSED
+                and telemetry.consecutive_failures >= self.BREAKER_FAILURES):
+            telemetry.circuit = CircuitState.OPEN
+            telemetry.opened_at = time.monotonic()
+            self._open_circuits[node_id] = telemetry
+    
+    def _probe_circuits(self):
+        """將斷路時間已滿的節點轉為半開，重新接受少量路由"""
+        now = time.monotonic()
+        for node_id, telemetry in list(self._open_circuits.items()):
+            if now - telemetry.opened_at < self.BREAKER_OPEN_SECONDS:
+                continue
+            with telemetry.lock:
+                if telemetry.circuit == CircuitState.OPEN and now - telemetry.opened_at >= self.BREAKER_OPEN_SECONDS:
+                    telemetry.circuit = CircuitState.HALF_OPEN
+                    telemetry.probes = 0
+                    self._publish(node_id, telemetry, None, None, None)
+                if self._open_circuits.get(node_id) is telemetry and telemetry.circuit != CircuitState.OPEN:
+                    del self._open_circuits[node_id]
+    
+    # ========== 故障轉移 ==========
+    
+    def route_with_failover(
+        self,
+        call: Callable[[SemanticNode, float], Any],
+        intent: str,
+        context: Optional[Dict] = None,
+        required_capabilities: Optional[List[str]] = None,
+        intent_embedding: Optional[Sequence[float]] = None,
+        deadline_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        hedge: bool = True,
+        hedge_delay_ms: Optional[float] = None
+    ) -> FailoverResult:
+        """
+        路由並執行請求：主節點失敗時依序改送備選節點，主節點過慢時送出對沖請求
+        
+        call(node, timeout_seconds) 在執行緒池中執行，timeout_seconds 為剩餘期限，
+        call 應以此限制自身的 I/O；拋出例外視為失敗。每次嘗試的延遲與結果都會
+        回報到遙測與斷路器（超過期限才完成的呼叫視為逾時失敗）
+        
+        Args:
+            call: 對節點執行請求
+            deadline_seconds: 整體期限（預設 FAILOVER_DEADLINE_SECONDS）
+            max_attempts: 嘗試的節點數上限（預設 FAILOVER_MAX_ATTEMPTS）
+            hedge: 主節點超過對沖延遲仍未完成時，同時送往下一個節點（最多一次）
+            hedge_delay_ms: 對沖延遲（預設為主節點近期延遲的 HEDGE_PERCENTILE 百分位；
+                樣本不足 HEDGE_MIN_SAMPLES 時不對沖）
+        
+        Returns:
+            FailoverResult；期限到時仍在執行的嘗試會在背景完成並回報遙測
+        """
+        decision = self.route(
+            intent, context, RoutingStrategy.FAILOVER, required_capabilities, intent_embedding
+        )
+        candidates = (decision.selected_nodes + decision.alternatives)[
+            :max_attempts or self.FAILOVER_MAX_ATTEMPTS
+        ]
+        if not candidates:
+            return FailoverResult(result=None, node=None, error=FailoverError.NO_NODES)
+        
+        outcome = FailoverResult(result=None, node=None)
+        deadline = time.monotonic() + (deadline_seconds or self.FAILOVER_DEADLINE_SECONDS)
+        executor = self._get_executor()
+        pending: Dict[Future, SemanticNode] = {}
+        
+        def launch() -> Optional[float]:
+            """送出下一個候選，回傳對沖時間點"""
+            node = candidates[len(outcome.attempts)]
+            outcome.attempts.append(node.node_id)
+            pending[executor.submit(self._attempt, call, node, deadline)] = node
+            if not hedge or outcome.hedged or len(outcome.attempts) >= len(candidates):
+                return None
+            delay_ms = hedge_delay_ms if hedge_delay_ms is not None else self._hedge_delay(node.node_id)
+            return None if delay_ms is None else time.monotonic() + delay_ms / 1000
+        
+        hedge_at = launch()
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                outcome.error = FailoverError.DEADLINE_EXCEEDED
+                return outcome
+            timeout = deadline - now if hedge_at is None else max(0.0, min(deadline, hedge_at) - now)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                node = pending.pop(future)
+                exception = future.exception()
+                if exception is None:
+                    outcome.result = future.result()
+                    outcome.node = node
+                    return outcome
+                outcome.failures.append((node.node_id, exception))
+            
+            if done:
+                # 故障轉移：沒有進行中的嘗試時立即改送下一個候選
+                if not pending and len(outcome.attempts) < len(candidates):
+                    hedge_at = launch()
+            elif hedge_at is not None and time.monotonic() >= hedge_at:
+                outcome.hedged = True
+                hedge_at = launch()
+        
+        outcome.error = FailoverError.ALL_FAILED
+        return outcome
+    
+    async def dispatch(
+        self,
+        decision: RouteDecision,
+        call: Callable[[SemanticNode], Awaitable[Any]],
+        mode: DispatchMode = DispatchMode.ALL,
+        quorum: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_alternatives: bool = True
+    ) -> "DispatchResult":
+        """非同步扇出執行路由決策（見 dispatch_async）"""
+        return await dispatch_async(
+            self, decision, call, mode, quorum, concurrency, timeout, use_alternatives
+        )
+    
+    def _attempt(self, call: Callable[[SemanticNode, float], Any], node: SemanticNode, deadline: float) -> Any:
+        """執行一次嘗試並回報遙測（在執行緒池中執行）"""
+        start = time.monotonic()
+        timeout = deadline - start
+        if timeout <= 0:
+            raise TimeoutError(f"{node.node_id}: 期限已過，未送出")
+        self.begin_request(node.node_id)
+        try:
+            result = call(node, timeout)
+        except BaseException:
+            self.report_error(node.node_id, (time.monotonic() - start) * 1000)
+            raise
+        elapsed = time.monotonic() - start
+        if elapsed > timeout:
+            self.report_error(node.node_id, elapsed * 1000)
+        else:
+            self.report_latency(node.node_id, elapsed * 1000)
+        return result
+    
+    def _hedge_delay(self, node_id: str) -> Optional[float]:
+        """主節點近期延遲的 HEDGE_PERCENTILE 百分位（毫秒）；樣本不足回傳 None"""
+        telemetry = self._telemetry.get(node_id)
+        if telemetry is None:
+            return None
+        with telemetry.lock:
+            samples = sorted(telemetry.recent_latencies)
+        if len(samples) < self.HEDGE_MIN_SAMPLES:
+            return None
+        return samples[int(self.HEDGE_PERCENTILE * (len(samples) - 1))]
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.FAILOVER_WORKERS, thread_name_prefix="sic-router"
+            )
+        return self._executor
+    
+    def close(self):
+        """關閉 route_with_failover 的執行緒池（不等待背景中的嘗試）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
     def route(
         self,
         intent: str,
         context: Optional[Dict] = None,
         strategy: RoutingStrategy = RoutingStrategy.NEAREST,
-        required_capabilities: Optional[List[str]] = None
+        required_capabilities: Optional[List[str]] = None,
+        intent_embedding: Optional[Sequence[float]] = None,
+        session_id: Optional[str] = None
     ) -> RouteDecision:
         """
         執行語義路由
@@ -118,20 +730,105 @@ class SIC_Router:
             context: 語境上下文
             strategy: 路由策略
             required_capabilities: 必要能力
+            intent_embedding: 意圖的語義向量（未提供時使用 embedder）
+            session_id: 會話 / 對話 ID（AFFINITY 策略的雜湊鍵）
         
         Returns:
             RouteDecision 路由決策
+        
+        直接使用決策送出請求的呼叫端必須對每個實際送往的節點呼叫 begin_request，
+        並以 report_latency / report_error 回報結果：斷路器的半開試探名額只在
+        begin_request 時扣除，未登記的請求不受 BREAKER_PROBES 限制，半開節點
+        在第一個結果回報前會持續被選中。route_with_failover 與 dispatch_async
+        已自行登記
         """
+        if self._open_circuits:
+            self._probe_circuits()
+        
         # 計算意圖的語義特徵
         intent_profile = self._compute_intent_profile(intent, context)
+        query = self._intent_embedding(intent, intent_embedding)
         
-        # 過濾可用節點
-        candidates = [
-            node for node in self.nodes.values()
-            if node.available and self._meets_requirements(node, required_capabilities)
-        ]
+        # 決策快取（隨機分散與會話黏著策略每次重新選擇，不快取）
+        cacheable = (
+            self.route_cache.enabled
+            and strategy not in self.SPREAD_STRATEGIES
+            and strategy != RoutingStrategy.AFFINITY
+        )
+        if cacheable:
+            bucket = (strategy, tuple(sorted(required_capabilities or ())), intent_profile["fingerprint"])
+            decision = self.route_cache.get(bucket, query, self.topology_version, self._decision_valid)
+            if decision is not None:
+                return decision
         
-        if not candidates:
+        decision = self._decide(
+            intent, context, strategy, required_capabilities, intent_profile, query, session_id
+        )
+        if cacheable and decision.selected_nodes:
+            self.route_cache.put(bucket, query, self.topology_version, decision)
+        return decision
+    
+    def _decide(
+        self,
+        intent: str,
+        context: Optional[Dict],
+        strategy: RoutingStrategy,
+        required_capabilities: Optional[List[str]],
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        session_id: Optional[str]
+    ) -> RouteDecision:
+        """評分候選節點並依策略做出決策（不經過決策快取）"""
+        scored_nodes, context_choice = self._score(
+            intent_profile, query, required_capabilities, strategy
+        )
+        return self._select(
+            intent, context, strategy, scored_nodes, context_choice,
+            intent_profile, query, required_capabilities, session_id
+        )
+    
+    def _score(
+        self,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        required_capabilities: Optional[List[str]],
+        strategy: RoutingStrategy
+    ) -> Tuple[List[Tuple[SemanticNode, float]], Optional[SemanticNode]]:
+        """
+        計算可用候選節點的語義距離
+        
+        Returns:
+            (依距離排序的 [(node, distance)], CONTEXT_AWARE 的選擇；只有啟發式評分會提供)
+        """
+        # BROADCAST 需要所有節點，不走 top-k
+        if query is not None and len(self.embedding_index) and strategy != RoutingStrategy.BROADCAST:
+            scored_nodes = self._score_nearest(intent_profile, query, required_capabilities)
+            scored_nodes.sort(key=lambda x: x[1])
+            return scored_nodes, None
+        if query is None:
+            return self._score_vectorized(intent_profile, required_capabilities, strategy)
+        scored_nodes = [
+            (node, self._node_distance(intent_profile, query, node))
+            for node in self._candidate_nodes(required_capabilities)
+            if self._available[self._slot_of[node.node_id]]
+        ]
+        scored_nodes.sort(key=lambda x: x[1])
+        return scored_nodes, None
+    
+    def _select(
+        self,
+        intent: str,
+        context: Optional[Dict],
+        strategy: RoutingStrategy,
+        scored_nodes: List[Tuple[SemanticNode, float]],
+        context_choice: Optional[SemanticNode],
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        required_capabilities: Optional[List[str]],
+        session_id: Optional[str]
+    ) -> RouteDecision:
+        """依策略自已排序的候選中做出決策"""
+        if not scored_nodes:
             return RouteDecision(
                 selected_nodes=[],
                 strategy_used=strategy,
@@ -139,14 +836,7 @@ class SIC_Router:
                 reasoning="無可用節點"
             )
         
-        # 計算語義距離
-        scored_nodes = [
-            (node, self._compute_semantic_distance(intent_profile, node))
-            for node in candidates
-        ]
-        
-        # 按距離排序（距離越小越好）
-        scored_nodes.sort(key=lambda x: x[1])
+        # scored_nodes 已按距離排序（距離越小越好）
         
         # 根據策略選擇
         if strategy == RoutingStrategy.NEAREST:
@@ -165,8 +855,25 @@ class SIC_Router:
             distance = scored_nodes[0][1]
         elif strategy == RoutingStrategy.CONTEXT_AWARE:
             # 綜合考慮語義距離、負載、延遲
-            selected = self._context_aware_select(scored_nodes, context)
+            if context_choice is not None:
+                selected = [context_choice]
+            else:
+                selected = self._context_aware_select(scored_nodes, context)
             distance = scored_nodes[0][1] if scored_nodes else float('inf')
+        elif strategy in self.SPREAD_STRATEGIES or strategy == RoutingStrategy.AFFINITY:
+            if strategy == RoutingStrategy.AFFINITY:
+                node, distance = self._affinity_select(
+                    scored_nodes, intent_profile, query, required_capabilities, session_id
+                )
+            else:
+                node, distance = self._spread_select(scored_nodes, strategy)
+            return RouteDecision(
+                selected_nodes=[node],
+                strategy_used=strategy,
+                semantic_distance=distance,
+                reasoning=self._generate_reasoning([node], intent, distance),
+                alternatives=[n for n, _ in scored_nodes[:4] if n is not node][:3]
+            )
         else:
             selected = [scored_nodes[0][0]]
             distance = scored_nodes[0][1]
@@ -179,47 +886,103 @@ class SIC_Router:
             alternatives=[n for n, _ in scored_nodes[1:4]]  # 備選方案
         )
     
-    def _compute_intent_profile(self, intent: str, context: Optional[Dict]) -> Dict:
+    def _decision_valid(self, decision: RouteDecision) -> bool:
+        """快取的決策是否仍可用：選中的節點都還可路由（含斷路器）"""
+        for node in decision.selected_nodes:
+            slot = self._slot_of.get(node.node_id)
+            if slot is None or not self._available[slot]:
+                return False
+        return True
+    
+    # ========== 向量距離 ==========
+    
+    def _node_embedding(self, node: SemanticNode) -> Optional[Sequence[float]]:
+        """節點的語義向量（semantic_profile["embedding"]）"""
+        embedding = node.semantic_profile.get("embedding") if node.semantic_profile else None
+        if embedding is None or len(embedding) == 0:
+            return None
+        return embedding
+    
+    def _intent_embedding(
+        self,
+        intent: str,
+        intent_embedding: Optional[Sequence[float]]
+    ) -> Optional[Sequence[float]]:
+        """意圖向量：優先使用呼叫端提供的，其次 embedder"""
+        if intent_embedding is not None:
+            return intent_embedding
+        if self.embedder is not None and len(self.embedding_index):
+            return self.embedder(intent)
+        return None
+    
+    def _score_nearest(
+        self,
+        intent_profile: Dict,
+        query: Sequence[float],
+        required_capabilities: Optional[List[str]]
+    ) -> List[Tuple[SemanticNode, float]]:
         """
-        計算意圖的語義特徵
+        以向量索引取 top-k 候選並評分
         
-        這是簡化版實作。生產環境應該使用：
-        - 真正的 embedding 模型
-        - 語義折疊 (Semantic Folding)
+        可用性與能力在索引查詢時過濾；沒有 embedding 的節點仍逐一以啟發式評分
         """
-        # 簡化版：基於關鍵字的特徵提取
-        profile = {
-            "keywords": set(),
-            "domain_hints": set(),
-            "complexity": 0,
-            "language": "zh"
-        }
+        required_mask = self._required_mask(required_capabilities)
+        if required_mask is None:
+            return []
+        masks = self._capability_masks
+        nodes = self.nodes
+        available = self._available
+        slot_of = self._slot_of
         
-        intent_lower = intent.lower()
+        def admissible(node_id: str) -> bool:
+            return available[slot_of[node_id]] and masks[node_id] & required_mask == required_mask
         
-        # 領域檢測
-        domain_keywords = {
-            "finance": ["交易", "帳戶", "金融", "投資", "股票", "transaction", "finance"],
-            "medical": ["醫療", "健康", "診斷", "病患", "medical", "health"],
-            "legal": ["法律", "合約", "訴訟", "legal", "contract"],
-            "technical": ["程式", "代碼", "API", "系統", "code", "technical"],
-            "creative": ["創作", "故事", "設計", "creative", "story"],
-        }
+        hits = self.embedding_index.search(query, k=self.ann_top_k, filter=admissible)
+        scored = [
+            (nodes[node_id], self._vector_distance(cosine, nodes[node_id]))
+            for node_id, cosine in hits
+        ]
+        scored.extend(
+            (node, self._compute_semantic_distance(intent_profile, node))
+            for node_id, node in self._unindexed.items()
+            if admissible(node_id)
+        )
+        return scored
+    
+    def _node_distance(
+        self,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        node: SemanticNode
+    ) -> float:
+        """單一節點的語義距離：有向量時用餘弦距離，否則用關鍵字啟發式"""
+        if query is not None:
+            cosine = self.embedding_index.distance(node.node_id, query)
+            if cosine is not None:
+                return self._vector_distance(cosine, node)
+        return self._compute_semantic_distance(intent_profile, node)
+    
+    def _vector_distance(self, cosine: float, node: SemanticNode) -> float:
+        """
+        向量語義距離
         
-        for domain, keywords in domain_keywords.items():
-            if any(kw in intent_lower for kw in keywords):
-                profile["domain_hints"].add(domain)
+        餘弦距離 [0, 2] 映射到 [0, 1]，再套用與啟發式相同的負載/延遲懲罰
+        """
+        distance = cosine / 2
         
-        # 複雜度估算
-        profile["complexity"] = min(len(intent) / 100, 1.0)
+        # 負載懲罰
+        distance += node.load * 0.2
         
-        # 語言檢測（簡化）
-        if any('\u4e00' <= c <= '\u9fff' for c in intent):
-            profile["language"] = "zh"
-        else:
-            profile["language"] = "en"
+        # 延遲懲罰
+        distance += min(node.latency_ms / 1000, 0.2)
         
-        return profile
+        return max(0.0, min(1.0, distance))
+    
+    def _compute_intent_profile(self, intent: str, context: Optional[Dict]) -> Dict:
+        """
+        計算意圖的語義特徵（見 SIC_IntentProfiler；結果為快取共用，不可修改）
+        """
+        return self.profiler.profile(intent)
     
     def _compute_semantic_distance(self, intent_profile: Dict, node: SemanticNode) -> float:
         """
@@ -228,69 +991,277 @@ class SIC_Router:
         0.0 = 完全匹配
         1.0 = 完全不匹配
 
-        生產環境應該使用：
-        - Cosine similarity
-        - KL divergence
-        - HNSW 索引
+        語義部分（領域、語言）經由距離快取取得；負載與延遲懲罰每次即時套用，
+        節點負載變動不會讓快取過期
         """
-        # 將字典轉換為字符串以進行緩存
-        intent_profile_str = json.dumps(intent_profile, sort_keys=True)
-        return self._compute_semantic_distance_cached(intent_profile_str, node.node_id)
+        distance = self._semantic_base_distance(intent_profile, node)
+
+        # 負載懲罰
+        distance += node.load * 0.2
+
+        # 延遲懲罰
+        distance += min(node.latency_ms / 1000, 0.2)
+
+        return max(0.0, min(1.0, distance))
 
-    @lru_cache(maxsize=1024)
-    def _compute_semantic_distance_cached(self, intent_profile_str: str, node_id: str) -> float:
+    def _semantic_base_distance(self, intent_profile: Dict, node: SemanticNode) -> float:
         """
-        計算語義距離（緩存版本）
+        語義距離中與負載無關的部分（快取版本）
 
-        0.0 = 完全匹配
-        1.0 = 完全不匹配
+        快取鍵為 (意圖指紋, node_id)，值帶節點版本；
+        節點重新註冊或註銷時版本改變，舊值不再命中
 
         生產環境應該使用：
         - Cosine similarity
         - KL divergence
-        - HNSW 索引
+        - 向量索引（見 _score_nearest）
         """
-        # 將字符串轉換回字典
-        intent_profile = json.loads(intent_profile_str)
-        node = self.nodes.get(node_id)
-        if node is None:
-            return 1.0  # 節點不存在，返回最大距離
+        fingerprint = intent_profile.get("fingerprint")
+        if fingerprint is None:
+            fingerprint = self._profile_fingerprint(intent_profile)
 
-        distance = 0.5  # 基礎距離
+        # get → move_to_end → popitem 之間不可被其他執行緒插入或淘汰
+        with self._distance_lock:
+            entries = self._distance_cache.get(fingerprint)
+            if entries is None:
+                entries = {}
+                self._distance_cache[fingerprint] = entries
+                if len(self._distance_cache) > self.DISTANCE_CACHE_SIZE:
+                    self._distance_cache.popitem(last=False)
+            else:
+                self._distance_cache.move_to_end(fingerprint)
 
-        # 領域匹配加分
-        intent_domains = set(intent_profile.get("domain_hints", set()))
-        node_domains = set(node.domains)
+            version = self._node_versions.get(node.node_id)
+            cached = entries.get(node.node_id)
+            if cached is not None and cached[0] == version:
+                self.cache_hits += 1
+                return cached[1]
+            self.cache_misses += 1
 
-        if intent_domains & node_domains:
-            # 有領域交集
-        # 領域匹配加分
-        intent_domains = set(intent_profile.get("domain_hints", []))
-        node_domains = set(node.domains)
+        distance = 0.5  # 基礎距離
 
-        if intent_domains & node_domains:
-            # 有領域交集
-            overlap = len(intent_domains & node_domains)
+        # 領域匹配加分（已註冊節點以位元遮罩計算交集）
+        node_mask = self._domain_masks.get(node.node_id)
+        if node_mask is not None:
+            overlap = (self._domain_mask(intent_profile) & node_mask).bit_count()
+        else:
+            overlap = len(set(intent_profile.get("domain_hints", ())).intersection(node.domains))
+        if overlap:
             distance -= 0.2 * overlap
 
         # 語言匹配
         if intent_profile.get("language") in node.languages:
             distance -= 0.1
 
-        # 負載懲罰
-        distance += node.load * 0.2
+        # 只快取已註冊的節點（計算期間節點若重新註冊，舊版本的值不會再命中）
+        if version is not None:
+            with self._distance_lock:
+                entries[node.node_id] = (version, distance)
+        return distance
 
-        # 延遲懲罰
-        distance += min(node.latency_ms / 1000, 0.2)
+    def _profile_fingerprint(self, intent_profile: Dict) -> Tuple:
+        """意圖特徵中影響語義距離的部分（領域提示、語言）"""
+        return profile_fingerprint(intent_profile)
 
-        return max(0.0, min(1.0, distance))
+    def _invalidate_node(self, node_id: str):
+        """移除節點在距離快取中的所有項目"""
+        with self._distance_lock:
+            for entries in self._distance_cache.values():
+                if entries.pop(node_id, None) is not None:
+                    self.cache_invalidations += 1
+
+    def get_cache_stats(self) -> Dict:
+        """取得距離快取統計"""
+        with self._distance_lock:
+            entry_count = sum(len(entries) for entries in self._distance_cache.values())
+        total = self.cache_hits + self.cache_misses
+        return {
+            "fingerprints": len(self._distance_cache),
+            "entries": entry_count,
+            "max_fingerprints": self.DISTANCE_CACHE_SIZE,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "invalidations": self.cache_invalidations,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+        }
 
-        return max(0.0, min(1.0, distance))
     def _meets_requirements(self, node: SemanticNode, required: Optional[List[str]]) -> bool:
-        """檢查節點是否滿足需求"""
+        """檢查節點是否滿足需求（已註冊節點以位元遮罩比對）"""
         if not required:
             return True
-        return all(cap in node.capabilities for cap in required)
+        node_mask = self._capability_masks.get(node.node_id)
+        if node_mask is None:
+            return all(cap in node.capabilities for cap in required)
+        required_mask = self._required_mask(required)
+        return required_mask is not None and node_mask & required_mask == required_mask
+    
+    # ========== 能力位元索引 ==========
+    
+    def _intern(self, bits: Dict[str, int], names: List[str]) -> int:
+        """名稱轉為位元遮罩，新名稱配置下一個位元位置"""
+        mask = 0
+        for name in names:
+            bit = bits.get(name)
+            if bit is None:
+                bit = len(bits)
+                bits[name] = bit
+            mask |= 1 << bit
+        return mask
+    
+    def _required_mask(self, required: Optional[List[str]]) -> Optional[int]:
+        """必要能力的位元遮罩；含未知能力（沒有節點具備）時回傳 None"""
+        mask = 0
+        for cap in required or ():
+            bit = self._capability_bits.get(cap)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+    
+    def _domain_mask(self, intent_profile: Dict) -> int:
+        """意圖領域提示的位元遮罩（未註冊的領域不可能有交集，直接略過）"""
+        mask = 0
+        for domain in intent_profile.get("domain_hints", ()):
+            bit = self._domain_bits.get(domain)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+    
+    # ========== 節點陣列 ==========
+    
+    def _index_node(self, node: SemanticNode):
+        """登記節點的遮罩並寫入節點陣列的槽位"""
+        self._capability_masks[node.node_id] = self._intern(self._capability_bits, node.capabilities)
+        self._domain_masks[node.node_id] = self._intern(self._domain_bits, node.domains)
+        self._intern(self._language_bits, node.languages)
+        
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_ids[slot] = node.node_id
+            self._slot_nodes[slot] = node
+        else:
+            slot = len(self._slot_ids)
+            self._slot_ids.append(node.node_id)
+            self._slot_nodes.append(node)
+        self._slot_of[node.node_id] = slot
+        self._reserve(slot)
+        
+        self._occupied[slot] = True
+        self._available[slot] = node.available
+        self._load[slot] = node.load
+        self._latency[slot] = node.latency_ms
+        self._outstanding[slot] = 0
+        for matrix, bits, names in (
+            (self._capability_matrix, self._capability_bits, node.capabilities),
+            (self._domain_matrix, self._domain_bits, node.domains),
+            (self._language_matrix, self._language_bits, node.languages),
+        ):
+            matrix[slot] = False
+            matrix[slot, [bits[name] for name in names]] = True
+    
+    def _unindex_node(self, node_id: str):
+        """移除節點的遮罩並釋放槽位"""
+        self._capability_masks.pop(node_id, None)
+        self._domain_masks.pop(node_id, None)
+        slot = self._slot_of.pop(node_id, None)
+        if slot is None:
+            return
+        self._slot_ids[slot] = None
+        self._slot_nodes[slot] = None
+        self._occupied[slot] = False
+        self._available[slot] = False
+        self._free_slots.append(slot)
+    
+    def _reserve(self, slot: int):
+        """確保陣列容得下槽位與目前所有位元（容量倍增）"""
+        rows = len(self._occupied)
+        if slot >= rows:
+            rows = max(16, 2 * rows)
+            self._occupied = _resize(self._occupied, rows)
+            self._available = _resize(self._available, rows)
+            self._load = _resize(self._load, rows)
+            self._latency = _resize(self._latency, rows)
+            self._outstanding = _resize(self._outstanding, rows)
+        self._capability_matrix = _resize(self._capability_matrix, rows, len(self._capability_bits))
+        self._domain_matrix = _resize(self._domain_matrix, rows, len(self._domain_bits))
+        self._language_matrix = _resize(self._language_matrix, rows, len(self._language_bits))
+    
+    def _score_vectorized(
+        self,
+        intent_profile: Dict,
+        required: Optional[List[str]],
+        strategy: RoutingStrategy
+    ) -> Tuple[List[Tuple[SemanticNode, float]], Optional[SemanticNode]]:
+        """
+        一次向量化計算所有候選節點的啟發式語義距離
+        
+        與 _compute_semantic_distance 同一公式、同一運算順序；
+        只對決策需要的前 DECISION_TOP_K 名排序（argpartition），BROADCAST 才完整排序
+        
+        Returns:
+            (依距離排序的 [(node, distance)], CONTEXT_AWARE 的選擇)
+        """
+        count = len(self._slot_ids)
+        mask = self._occupied[:count] & self._available[:count]
+        if required:
+            bits = [self._capability_bits.get(cap) for cap in required]
+            if None in bits:
+                return [], None
+            mask &= self._capability_matrix[:count, bits].all(axis=1)
+        slots = np.flatnonzero(mask)
+        if len(slots) == 0:
+            return [], None
+        
+        domain_bits = [
+            self._domain_bits[domain] for domain in intent_profile.get("domain_hints", ())
+            if domain in self._domain_bits
+        ]
+        distances = np.full(len(slots), 0.5)
+        if domain_bits:
+            overlap = self._domain_matrix[slots][:, domain_bits].sum(axis=1)
+            distances -= 0.2 * overlap
+        language_bit = self._language_bits.get(intent_profile.get("language"))
+        if language_bit is not None:
+            distances -= 0.1 * self._language_matrix[slots, language_bit]
+        load = self._load[slots]
+        latency = self._latency[slots]
+        distances += load * 0.2
+        distances += np.minimum(latency / 1000, 0.2)
+        np.clip(distances, 0.0, 1.0, out=distances)
+        
+        context_choice = None
+        if strategy == RoutingStrategy.CONTEXT_AWARE:
+            combined = distances * 0.5 + load * 0.3 + np.minimum(latency / 500, 0.2)
+            context_choice = self._slot_nodes[int(slots[np.argmin(combined)])]
+        
+        if strategy == RoutingStrategy.BROADCAST or len(slots) <= self.DECISION_TOP_K:
+            order = np.argsort(distances, kind="stable")
+        else:
+            top = np.argpartition(distances, self.DECISION_TOP_K)[:self.DECISION_TOP_K]
+            order = top[np.lexsort((top, distances[top]))]
+        
+        nodes = self._slot_nodes
+        scored = [
+            (nodes[slot], distance)
+            for slot, distance in zip(slots[order].tolist(), distances[order].tolist())
+        ]
+        return scored, context_choice
+    
+    def _candidate_nodes(self, required: Optional[List[str]]) -> List[SemanticNode]:
+        """
+        具備所有必要能力的節點
+        
+        對能力矩陣中必要能力的各行做一次向量化 AND，不逐節點掃描能力串列
+        """
+        if not required:
+            return list(self.nodes.values())
+        
+        bits = [self._capability_bits.get(cap) for cap in required]
+        if None in bits:
+            return []
+        count = len(self._slot_ids)
+        matches = self._occupied[:count] & self._capability_matrix[:count, bits].all(axis=1)
+        return [self._slot_nodes[slot] for slot in np.flatnonzero(matches).tolist()]
     
     def _context_aware_select(
         self,
@@ -301,17 +1272,124 @@ class SIC_Router:
         if not scored_nodes:
             return []
         
-        # 綜合評分：語義距離 + 負載 + 延遲
-        def combined_score(node: SemanticNode, distance: float) -> float:
-            return (
-                distance * 0.5 +
-                node.load * 0.3 +
-                min(node.latency_ms / 500, 0.2)
-            )
-        
-        best = min(scored_nodes, key=lambda x: combined_score(x[0], x[1]))
+        best = min(scored_nodes, key=lambda x: self._combined_score(x[0], x[1]))
         return [best[0]]
     
+    def _combined_score(self, node: SemanticNode, distance: float) -> float:
+        """綜合評分：語義距離 + 負載 + 延遲（越小越好）"""
+        return (
+            distance * 0.5 +
+            node.load * 0.3 +
+            min(node.latency_ms / 500, 0.2)
+        )
+    
+    def _spread_select(
+        self,
+        scored_nodes: List[Tuple[SemanticNode, float]],
+        strategy: RoutingStrategy
+    ) -> Tuple[SemanticNode, float]:
+        """
+        在語義相近的候選間分散選擇
+        
+        候選為前 DECISION_TOP_K 名中距離不超過最佳 + SPREAD_TOLERANCE 者，
+        語義明顯較差的節點不會分到流量；選擇成本 O(k)，讀取的負載/延遲/進行中
+        請求數為遙測最新值（不加鎖）
+        """
+        limit = scored_nodes[0][1] + self.SPREAD_TOLERANCE
+        pool = [(node, distance) for node, distance in scored_nodes[:self.DECISION_TOP_K]
+                if distance <= limit]
+        if len(pool) == 1:
+            return pool[0]
+        
+        if strategy == RoutingStrategy.POWER_OF_TWO:
+            first, second = self._rng.sample(pool, 2)
+            return min(first, second, key=lambda x: self._combined_score(x[0], x[1]))
+        if strategy == RoutingStrategy.WEIGHTED_RANDOM:
+            weights = [1.0 / (self._combined_score(node, distance) + 1e-6) for node, distance in pool]
+            return self._rng.choices(pool, weights=weights)[0]
+        
+        # LEAST_OUTSTANDING：同數量時取綜合分數較低者
+        telemetry = self._telemetry
+        return min(pool, key=lambda x: (
+            telemetry[x[0].node_id].outstanding if x[0].node_id in telemetry else 0,
+            self._combined_score(x[0], x[1])
+        ))
+    
+    def _affinity_select(
+        self,
+        scored_nodes: List[Tuple[SemanticNode, float]],
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        required: Optional[List[str]],
+        session_id: Optional[str]
+    ) -> Tuple[SemanticNode, float]:
+        """
+        會話黏著選擇
+        
+        自 session_id 在雜湊環上的位置順時針走訪，取第一個可用、具備必要能力、
+        距離不超過最佳 + SPREAD_TOLERANCE 且未超過有界負載上限的節點。
+        節點增減時只有原本對應到該節點的會話會改變去向
+        
+        語義候選過窄、環上前 AFFINITY_MAX_PROBES 個節點都不符合時，改在排名候選中
+        以最高隨機權重雜湊 (rendezvous hashing) 選擇，仍對同一會話保持穩定
+        """
+        if session_id is None:
+            return scored_nodes[0]
+        
+        limit = scored_nodes[0][1] + self.SPREAD_TOLERANCE
+        required_mask = self._required_mask(required) or 0
+        capacity: Optional[int] = None
+        overloaded = None
+        
+        def has_room(node_id: str) -> bool:
+            nonlocal capacity
+            outstanding = int(self._outstanding[self._slot_of[node_id]])
+            if outstanding == 0:
+                return True
+            if capacity is None:
+                capacity = self._affinity_capacity(required)
+            return outstanding < capacity
+        
+        for probes, node_id in enumerate(self.affinity_ring.walk(session_id)):
+            if probes >= self.AFFINITY_MAX_PROBES:
+                break
+            slot = self._slot_of[node_id]
+            if not self._available[slot] or self._capability_masks[node_id] & required_mask != required_mask:
+                continue
+            node = self.nodes[node_id]
+            distance = self._node_distance(intent_profile, query, node)
+            if distance > limit:
+                continue
+            if has_room(node_id):
+                return node, distance
+            if overloaded is None:
+                overloaded = (node, distance)
+        
+        pool = sorted(
+            ((node, distance) for node, distance in scored_nodes if distance <= limit),
+            key=lambda x: hash64(f"{session_id}|{x[0].node_id}"),
+            reverse=True
+        )
+        for node, distance in pool:
+            if has_room(node.node_id):
+                return node, distance
+        return overloaded or pool[0]
+    
+    def _affinity_capacity(self, required: Optional[List[str]]) -> int:
+        """
+        有界負載上限：ceil(AFFINITY_LOAD_FACTOR × (進行中請求總數 + 1) / 候選節點數)
+        
+        候選為可用且具備必要能力的節點，以節點陣列向量化加總
+        """
+        count = len(self._slot_ids)
+        mask = self._occupied[:count] & self._available[:count]
+        if required:
+            bits = [self._capability_bits[cap] for cap in required]
+            mask &= self._capability_matrix[:count, bits].all(axis=1)
+        eligible = max(int(mask.sum()), 1)
+        total = int(self._outstanding[:count][mask].sum())
+        return math.ceil(self.AFFINITY_LOAD_FACTOR * (total + 1) / eligible)
+    
     def _generate_reasoning(
         self,
         selected: List[SemanticNode],
@@ -336,42 +1414,229 @@ class SIC_Router:
         self,
         source_intent: str,
         target_intent: str,
-        max_hops: int = 3
+        max_hops: int = 3,
+        source_embedding: Optional[Sequence[float]] = None,
+        target_embedding: Optional[Sequence[float]] = None
     ) -> List[SemanticNode]:
         """
         尋找語義路徑
         
         類似 IP 路由的 traceroute，但追蹤的是「語義轉換路徑」
         例如：中文 → 英文 → 專業術語
+        
+        在節點轉換圖上搜尋成本最低的多跳路徑（見 SIC_PathPlanner）：
+        第一個節點接受來源意圖的語言，經具翻譯能力的節點轉換語言，最後一個節點
+        以目標語言輸出且與目標意圖語義最近；同一目標的最短路徑樹會被快取，
+        節點註冊 / 註銷後失效。路徑只經過目前可用（含斷路器）的節點
+        
+        Args:
+            source_intent / target_intent: 來源與目標意圖
+            max_hops: 路徑最多經過的節點數
+            source_embedding / target_embedding: 意圖的語義向量（未提供時使用 embedder）
+        
+        Returns:
+            依序經過的節點；無法到達時為空串列
         """
-        path = []
-        current_intent = source_intent
+        if self._planned_version != self.topology_version:
+            vectors = {}
+            for node_id in self.nodes:
+                vector = self.embedding_index.vector(node_id)
+                if vector is not None:
+                    vectors[node_id] = vector
+            self.path_planner.build(list(self.nodes.values()), vectors)
+            self._planned_version = self.topology_version
         
-        for hop in range(max_hops):
-            decision = self.route(current_intent, strategy=RoutingStrategy.NEAREST)
-            if not decision.selected_nodes:
-                break
-            
-            node = decision.selected_nodes[0]
-            path.append(node)
-            
-            # 檢查是否到達目標
-            target_profile = self._compute_intent_profile(target_intent, None)
-            if self._compute_semantic_distance(target_profile, node) < 0.2:
-                break
+        source_profile = self._compute_intent_profile(source_intent, None)
+        target_profile = self._compute_intent_profile(target_intent, None)
+        source_query = self._intent_embedding(source_intent, source_embedding)
+        target_query = self._intent_embedding(target_intent, target_embedding)
         
+        path, _ = self.path_planner.find_path(
+            self._path_key(source_profile, source_query),
+            self._path_key(target_profile, target_query),
+            source_profile["language"],
+            target_profile["language"],
+            start_cost=lambda node: self._path_distance(source_profile, source_query, node),
+            terminal_cost=lambda node: self._path_distance(target_profile, target_query, node),
+            max_hops=max_hops,
+            admissible=lambda node_id: bool(self._available[self._slot_of[node_id]])
+        )
         return path
     
+    def _path_key(self, intent_profile: Dict, query: Optional[Sequence[float]]) -> Tuple:
+        """路徑規劃快取鍵：意圖指紋 + 向量摘要"""
+        if query is None:
+            return intent_profile["fingerprint"], None
+        digest = hashlib.blake2b(np.asarray(query, dtype=np.float32).tobytes(), digest_size=16)
+        return intent_profile["fingerprint"], digest.digest()
+    
+    def _path_distance(
+        self,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        node: SemanticNode
+    ) -> float:
+        """
+        路徑規劃用的意圖-節點距離（不含負載/延遲，規劃結果不隨遙測變動）
+        
+        有向量時為角距離（與轉換圖的邊權一致），否則為啟發式語義距離；不小於 0
+        """
+        if query is not None:
+            cosine = self.embedding_index.distance(node.node_id, query)
+            if cosine is not None:
+                return math.acos(max(-1.0, min(1.0, 1.0 - cosine))) / math.pi
+        return max(0.0, self._semantic_base_distance(intent_profile, node))
+    
     def get_routing_stats(self) -> Dict:
         """取得路由統計"""
         return {
             "total_nodes": len(self.nodes),
             "available_nodes": sum(1 for n in self.nodes.values() if n.available),
             "domains": list(self.routing_table.keys()),
-            "avg_load": sum(n.load for n in self.nodes.values()) / max(len(self.nodes), 1)
+            "avg_load": sum(n.load for n in self.nodes.values()) / max(len(self.nodes), 1),
+            "embedding_index": self.embedding_index.stats(),
+            "affinity_ring": self.affinity_ring.stats(),
+            "path_planner": self.path_planner.stats(),
+            "decision_cache": self.route_cache.stats(),
+            "open_circuits": len(self._open_circuits),
+            "distance_cache": self.get_cache_stats(),
+            "intent_profiler": self.profiler.stats()
         }
 
 
+# ========== 非同步扇出 ==========
+
+async def dispatch_async(
+    router: Any,
+    decision: RouteDecision,
+    call: Callable[[SemanticNode], Awaitable[Any]],
+    mode: DispatchMode = DispatchMode.ALL,
+    quorum: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    use_alternatives: bool = True
+) -> DispatchResult:
+    """
+    以 asyncio 並行執行 BROADCAST / MULTIPATH 等決策選中的節點
+    
+    每個請求以 router.begin_request 登記，完成後以 report_latency / report_error
+    回報延遲與結果（供遙測、LEAST_OUTSTANDING 與斷路器使用）。達到所需數量、
+    期限到或呼叫端取消時，未完成的請求會被取消：因期限取消的視為逾時失敗，
+    其餘以 cancel_request 撤銷，不影響遙測
+    
+    Args:
+        router: SIC_Router 或 SIC_ShardedRouter
+        decision: 路由決策
+        call: 對節點執行請求的協程函式；拋出例外（含呼叫時同步拋出）視為失敗
+        mode: FIRST（第一個成功即完成）/ QUORUM / ALL
+        quorum: QUORUM 所需的成功數（預設為選中節點的過半數）；超過選中節點數時
+            一開始就以備選節點補足
+        concurrency: 同時進行的請求數上限（預設 SIC_Router.DISPATCH_CONCURRENCY）
+        timeout: 整體期限秒數（None 表示不設期限）
+        use_alternatives: FIRST / QUORUM 因失敗而無法達到所需數量時，改送決策的備選節點
+    
+    Returns:
+        DispatchResult（results 依完成順序）
+    
+    Raises:
+        ValueError: quorum 小於 1，或超過選中節點加上可用備選節點的數量
+    """
+    primary = list(decision.selected_nodes)
+    if not primary:
+        return DispatchResult(error=DispatchError.NO_NODES)
+    if mode == DispatchMode.ALL:
+        needed = len(primary)
+    elif mode == DispatchMode.FIRST:
+        needed = 1
+    else:
+        needed = len(primary) // 2 + 1 if quorum is None else quorum
+    spare = deque()
+    if use_alternatives and mode != DispatchMode.ALL:
+        chosen = {node.node_id for node in primary}
+        spare.extend(node for node in decision.alternatives if node.node_id not in chosen)
+    if needed < 1 or needed > len(primary) + len(spare):
+        raise ValueError(
+            f"quorum {needed} 超出可用節點數 {len(primary) + len(spare)}（選中 + 備選）"
+        )
+    
+    loop = asyncio.get_running_loop()
+    limit = concurrency or SIC_Router.DISPATCH_CONCURRENCY
+    deadline = None if timeout is None else loop.time() + timeout
+    outcome = DispatchResult()
+    queue = deque(primary)
+    # 所需數量超過選中節點時，一開始就以備選節點補足
+    while len(queue) < needed:
+        queue.append(spare.popleft())
+    pending: Dict[asyncio.Future, Tuple[SemanticNode, float]] = {}
+    
+    def fail(node: SemanticNode, elapsed_ms: float, exception: BaseException):
+        router.report_error(node.node_id, elapsed_ms)
+        outcome.failures.append((node.node_id, exception))
+        # 剩下的請求不足以達到所需數量時，以備選節點遞補
+        if spare and len(outcome.results) + len(pending) + len(queue) < needed:
+            queue.append(spare.popleft())
+    
+    def fill():
+        while queue and len(pending) < limit:
+            node = queue.popleft()
+            outcome.attempts.append(node.node_id)
+            router.begin_request(node.node_id)
+            start = loop.time()
+            try:
+                future = asyncio.ensure_future(call(node))
+            except Exception as e:
+                # call 在建立協程時就同步拋出：釋放 begin_request 的名額並記為失敗
+                fail(node, (loop.time() - start) * 1000, e)
+                continue
+            pending[future] = (node, start)
+    
+    expired = False
+    try:
+        fill()
+        while pending:
+            wait_timeout = None if deadline is None else deadline - loop.time()
+            if wait_timeout is not None and wait_timeout <= 0:
+                expired = True
+                break
+            done, _ = await asyncio.wait(pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+            
+            for task in done:
+                node, start = pending.pop(task)
+                elapsed_ms = (loop.time() - start) * 1000
+                exception = task.exception() if not task.cancelled() else asyncio.CancelledError()
+                if exception is None:
+                    router.report_latency(node.node_id, elapsed_ms)
+                    outcome.results.append((node, task.result()))
+                    continue
+                fail(node, elapsed_ms, exception)
+            
+            if len(outcome.results) >= needed:
+                break
+            fill()
+    finally:
+        # 取消未完成的請求（已達所需數量、期限到、或呼叫端取消了 dispatch）
+        now = loop.time()
+        for task, (node, start) in pending.items():
+            task.cancel()
+            task.add_done_callback(_discard_result)
+            if expired:
+                router.report_error(node.node_id, (now - start) * 1000)
+                outcome.timed_out.append(node.node_id)
+            else:
+                router.cancel_request(node.node_id)
+                outcome.cancelled.append(node.node_id)
+    
+    if len(outcome.results) < needed:
+        outcome.error = DispatchError.DEADLINE_EXCEEDED if expired else DispatchError.INSUFFICIENT
+    return outcome
+
+
+def _discard_result(task: "asyncio.Future"):
+    """取回被取消請求的結果或例外，避免 asyncio 警告未取回的例外"""
+    if not task.cancelled():
+        task.exception()
+
+
 # ========== 測試 ==========
 
 if __name__ == "__main__":
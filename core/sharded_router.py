@@ -0,0 +1,463 @@
+"""
+SIC-SHD — Sharded Semantic Router
+分片語義路由器
+
+USCA 協議棧位置: L2 (Network Layer)
+類比: 階層式路由 (OSPF areas) —— 骨幹只知道區域，區域內再做細部路由
+
+功能:
+- 節點分散到多個 SIC_Router 分片，每個節點只屬於一個分片（遙測、斷路器不重複）
+- 依領域分片：以節點的第一個領域為所屬分片；路由表 (routing_table) 記錄每個領域
+  出現在哪些分片，查詢只送往意圖領域所在的分片
+- 依向量分群分片：球面 k-means 將帶 embedding 的節點分成 SHARDS 群，查詢只送往
+  最近的 SHARD_PROBE 群（加上沒有 embedding 的節點所在的 general 分片）；
+  節點數倍增時重新分群，移動的節點保留遙測狀態
+- 候選分片的節點總數夠多時以執行緒池並行評分（NumPy 運算釋放 GIL），
+  各分片的 top-k 以距離合併
+- 相關分片沒有可用候選時，改查其餘分片
+- BROADCAST / CONTEXT_AWARE 需要所有候選，一律查詢所有分片
+- 分散負載與會話黏著策略交由最佳候選所在的分片處理（語義相近的節點在同一分片）
+
+作者: Claude (尾德)
+日期: 2026-01-22
+版本: 1.0.0
+"""
+
+import heapq
+import itertools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .semantic_routing import (
+        SIC_Router, SemanticNode, RouteDecision, RoutingStrategy, CircuitState,
+        DispatchMode, DispatchResult, dispatch_async
+    )
+    from .semantic_index import spherical_kmeans
+    from .intent_profiler import SIC_IntentProfiler
+except ImportError:
+    from semantic_routing import (
+        SIC_Router, SemanticNode, RouteDecision, RoutingStrategy, CircuitState,
+        DispatchMode, DispatchResult, dispatch_async
+    )
+    from semantic_index import spherical_kmeans
+    from intent_profiler import SIC_IntentProfiler
+
+
+class ShardPartition(Enum):
+    """節點分片方式"""
+    DOMAIN = "domain"      # 依領域（routing_table）
+    CLUSTER = "cluster"    # 依語義向量分群
+
+
+class SIC_ShardedRouter:
+    """
+    分片語義路由器
+
+    介面與 SIC_Router 相同（register_node / route / report_* ...），
+    適用於數萬個節點的規模
+    """
+
+    # 配置
+    SHARDS = 16                     # 向量分群的分片數
+    SHARD_PROBE = 2                 # 帶意圖向量的查詢送往的分群數
+    CLUSTER_MIN_NODES = 1024        # 帶 embedding 的節點達此數量才開始分群（之前全在一個分片）
+    KMEANS_ITERATIONS = 10
+    TRAIN_SAMPLES_PER_SHARD = 256   # 分群時每群取樣數上限
+    PARALLEL_MIN_NODES = 4096       # 候選分片的節點總數達此數量才並行評分
+    WORKERS = 8                     # 並行評分的執行緒數
+    GENERAL_SHARD = "general"       # 沒有領域 / embedding 的節點
+    # 需要所有候選的策略：查詢所有分片並完整合併
+    FULL_STRATEGIES = (RoutingStrategy.BROADCAST, RoutingStrategy.CONTEXT_AWARE)
+
+    def __init__(
+        self,
+        partition: ShardPartition = ShardPartition.DOMAIN,
+        shards: Optional[int] = None,
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+        domain_keywords: Optional[Dict[str, List[str]]] = None,
+        seed: Optional[int] = None,
+        workers: Optional[int] = None,
+        **router_options
+    ):
+        """
+        初始化分片路由器
+
+        Args:
+            partition: 分片方式
+            shards: 向量分群的分片數（預設 SHARDS）
+            embedder: 意圖文字 -> 語義向量（每次路由只計算一次，傳給各分片）
+            domain_keywords: 意圖領域偵測的關鍵字
+            seed: 分群取樣與各分片隨機策略的亂數種子
+            workers: 並行評分的執行緒數（預設 WORKERS）
+            router_options: 傳給每個分片 SIC_Router 的其他參數（ann_top_k、decision_cache_ttl）
+        """
+        self.partition = partition
+        self.shard_count = shards or self.SHARDS
+        self.embedder = embedder
+        self.workers = workers or self.WORKERS
+        self.seed = seed
+        self._router_options = router_options
+        self._rng = random.Random(seed)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self.profiler = SIC_IntentProfiler(domain_keywords)
+        self.nodes: Dict[str, SemanticNode] = {}
+        self.routing_table: Dict[str, List[str]] = {}  # domain -> [node_ids]
+        self.shards: Dict[str, SIC_Router] = {}
+        self._home: Dict[str, str] = {}  # node_id -> 所屬分片
+        self._domain_shards: Dict[str, Dict[str, int]] = {}  # domain -> {分片: 節點數}
+
+        # 向量分群（分群前為 None）
+        self._centroids: Optional[np.ndarray] = None
+        self._clustered = 0  # 帶 embedding 的節點數
+        self._trained_size = 0
+        self.train_count = 0
+        self.moved_nodes = 0
+
+        self.parallel_routes = 0
+        self.fallback_routes = 0
+
+    # ========== 節點管理 ==========
+
+    def register_node(self, node: SemanticNode):
+        """註冊語義節點（重複註冊同一 node_id 視為更新）"""
+        if node.node_id in self.nodes:
+            self.unregister_node(node.node_id)
+        key = self._home_key(node)
+        self._shard(key).register_node(node)
+        self.nodes[node.node_id] = node
+        self._home[node.node_id] = key
+        for domain in node.domains:
+            counts = self._domain_shards.setdefault(domain, {})
+            counts[key] = counts.get(key, 0) + 1
+            if domain not in self.routing_table:
+                self.routing_table[domain] = []
+            if node.node_id not in self.routing_table[domain]:
+                self.routing_table[domain].append(node.node_id)
+
+        if key != self.GENERAL_SHARD and self.partition == ShardPartition.CLUSTER:
+            self._clustered += 1
+            if self._clustered >= self.CLUSTER_MIN_NODES and self._clustered > 2 * self._trained_size:
+                self._train()
+
+    def unregister_node(self, node_id: str):
+        """註銷語義節點"""
+        node = self.nodes.pop(node_id, None)
+        if node is None:
+            return
+        key = self._home.pop(node_id)
+        self.shards[key].unregister_node(node_id)
+        if key != self.GENERAL_SHARD and self.partition == ShardPartition.CLUSTER:
+            self._clustered -= 1
+        for domain in node.domains:
+            counts = self._domain_shards.get(domain)
+            if counts is not None and key in counts:
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+            if domain in self.routing_table:
+                self.routing_table[domain] = [
+                    n for n in self.routing_table[domain] if n != node_id
+                ]
+
+    def update_node_load(
+        self,
+        node_id: str,
+        load: Optional[float] = None,
+        latency_ms: Optional[float] = None,
+        available: Optional[bool] = None
+    ) -> bool:
+        """直接設定節點的負載 / 延遲 / 可用性（見 SIC_Router.update_node_load）"""
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.update_node_load(node_id, load, latency_ms, available)
+
+    def add_domain_keywords(self, domain: str, keywords: List[str]):
+        """擴充意圖領域偵測的關鍵字（所有分片）"""
+        self.profiler.add_keywords(domain, keywords)
+        for shard in self.shards.values():
+            shard.add_domain_keywords(domain, keywords)
+
+    # ========== 節點遙測（轉交所屬分片） ==========
+
+    def begin_request(self, node_id: str) -> bool:
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.begin_request(node_id)
+
+    def cancel_request(self, node_id: str) -> bool:
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.cancel_request(node_id)
+
+    def report_latency(self, node_id: str, latency_ms: float) -> bool:
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.report_latency(node_id, latency_ms)
+
+    def report_error(self, node_id: str, latency_ms: Optional[float] = None) -> bool:
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.report_error(node_id, latency_ms)
+
+    def report_load(self, node_id: str, load: float) -> bool:
+        shard = self._shard_of(node_id)
+        return shard is not None and shard.report_load(node_id, load)
+
+    def get_node_telemetry(self, node_id: str) -> Optional[Dict]:
+        shard = self._shard_of(node_id)
+        return shard.get_node_telemetry(node_id) if shard is not None else None
+
+    # ========== 路由 ==========
+
+    def route(
+        self,
+        intent: str,
+        context: Optional[Dict] = None,
+        strategy: RoutingStrategy = RoutingStrategy.NEAREST,
+        required_capabilities: Optional[List[str]] = None,
+        intent_embedding: Optional[Sequence[float]] = None,
+        session_id: Optional[str] = None
+    ) -> RouteDecision:
+        """
+        執行語義路由（參數同 SIC_Router.route）
+
+        只有一個候選分片時直接交給該分片（含其決策快取）；
+        多個分片時各自評分後合併 top-k，再以同一套策略選擇。
+        BROADCAST / CONTEXT_AWARE 查詢所有分片，結果與單一 SIC_Router 相同
+        """
+        intent_profile = self.profiler.profile(intent)
+        query = intent_embedding
+        if query is None and self.embedder is not None and self.nodes:
+            query = self.embedder(intent)
+
+        for shards in self._shard_passes(intent_profile, query, strategy):
+            if len(shards) == 1:
+                decision = shards[0].route(
+                    intent, context, strategy, required_capabilities, query, session_id
+                )
+                if decision.selected_nodes:
+                    return decision
+                continue
+
+            results = self._fan_out(
+                shards,
+                lambda shard: self._score_shard(shard, intent_profile, query, required_capabilities, strategy)
+            )
+            # BROADCAST 需要所有候選；CONTEXT_AWARE 在所有候選中綜合評分
+            top_k = None if strategy in self.FULL_STRATEGIES else SIC_Router.DECISION_TOP_K
+            scored = list(itertools.islice(
+                heapq.merge(*(scored for scored, _ in results), key=itemgetter(1)), top_k
+            ))
+            if not scored:
+                continue
+
+            if strategy in SIC_Router.SPREAD_STRATEGIES or strategy == RoutingStrategy.AFFINITY:
+                # 分散與黏著需要分片內的遙測與雜湊環：交給最佳候選所在的分片
+                owner = self.shards[self._home[scored[0][0].node_id]]
+                return owner.route(intent, context, strategy, required_capabilities, query, session_id)
+
+            context_choice = None
+            choices = [(shard, choice) for shard, (_, choice) in zip(shards, results) if choice is not None]
+            if choices:
+                context_choice = min(choices, key=lambda x: x[0]._combined_score(
+                    x[1], x[0]._compute_semantic_distance(intent_profile, x[1])
+                ))[1]
+            # 其餘策略只依候選清單與節點欄位選擇，任一分片皆可執行
+            return shards[0]._select(
+                intent, context, strategy, scored, context_choice,
+                intent_profile, query, required_capabilities, session_id
+            )
+
+        return RouteDecision(
+            selected_nodes=[],
+            strategy_used=strategy,
+            semantic_distance=float('inf'),
+            reasoning="無可用節點"
+        )
+
+    async def dispatch(
+        self,
+        decision: RouteDecision,
+        call: Callable[[SemanticNode], Awaitable[Any]],
+        mode: DispatchMode = DispatchMode.ALL,
+        quorum: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        use_alternatives: bool = True
+    ) -> DispatchResult:
+        """非同步扇出執行路由決策（見 semantic_routing.dispatch_async）"""
+        return await dispatch_async(
+            self, decision, call, mode, quorum, concurrency, timeout, use_alternatives
+        )
+
+    def _shard_passes(
+        self,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        strategy: RoutingStrategy
+    ) -> Iterator[List[SIC_Router]]:
+        """候選分片；相關分片沒有結果時再給出其餘分片（FULL_STRATEGIES 一次給出所有分片）"""
+        keys = None if strategy in self.FULL_STRATEGIES else self._relevant_shards(intent_profile, query)
+        if keys is None:
+            if self.shards:
+                yield list(self.shards.values())
+            return
+        if keys:
+            yield [self.shards[key] for key in keys]
+        rest = [shard for key, shard in self.shards.items() if key not in keys]
+        if rest:
+            self.fallback_routes += 1
+            yield rest
+
+    def _relevant_shards(
+        self,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]]
+    ) -> Optional[List[str]]:
+        """查詢相關的分片鍵；None 表示需要查詢所有分片"""
+        if self.partition == ShardPartition.DOMAIN:
+            keys = {
+                key
+                for domain in intent_profile.get("domain_hints", ())
+                for key in self._domain_shards.get(domain, ())
+            }
+            return sorted(keys) if keys else None
+
+        if query is None or self._centroids is None:
+            return None
+        similarities = self._centroids @ np.asarray(query, dtype=np.float32).ravel()
+        probe = min(self.SHARD_PROBE, len(similarities))
+        nearest = np.argpartition(-similarities, probe - 1)[:probe]
+        keys = [f"cluster-{cell}" for cell in sorted(nearest.tolist())]
+        keys.append(self.GENERAL_SHARD)
+        return [key for key in keys if key in self.shards]
+
+    def _score_shard(
+        self,
+        shard: SIC_Router,
+        intent_profile: Dict,
+        query: Optional[Sequence[float]],
+        required_capabilities: Optional[List[str]],
+        strategy: RoutingStrategy
+    ) -> Tuple[List[Tuple[SemanticNode, float]], Optional[SemanticNode]]:
+        """單一分片的排序候選（可在工作執行緒中執行）"""
+        if shard._open_circuits:
+            shard._probe_circuits()
+        return shard._score(intent_profile, query, required_capabilities, strategy)
+
+    def _fan_out(self, shards: List[SIC_Router], task: Callable[[SIC_Router], Tuple]) -> List[Tuple]:
+        """對多個分片執行評分；節點總數夠多時並行"""
+        if sum(len(shard.nodes) for shard in shards) < self.PARALLEL_MIN_NODES:
+            return [task(shard) for shard in shards]
+        self.parallel_routes += 1
+        return list(self._get_executor().map(task, shards))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="sic-shard"
+            )
+        return self._executor
+
+    def close(self):
+        """關閉並行評分與各分片的執行緒池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for shard in self.shards.values():
+            shard.close()
+
+    # ========== 分片 ==========
+
+    def _shard(self, key: str) -> SIC_Router:
+        """取得（必要時建立）分片"""
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = SIC_Router(
+                domain_keywords=self.profiler.domain_keywords,
+                seed=None if self.seed is None else self.seed + len(self.shards),
+                **self._router_options
+            )
+            self.shards[key] = shard
+        return shard
+
+    def _shard_of(self, node_id: str) -> Optional[SIC_Router]:
+        key = self._home.get(node_id)
+        return self.shards[key] if key is not None else None
+
+    def _home_key(self, node: SemanticNode) -> str:
+        """節點所屬的分片鍵"""
+        if self.partition == ShardPartition.DOMAIN:
+            return node.domains[0] if node.domains else self.GENERAL_SHARD
+        embedding = node.semantic_profile.get("embedding") if node.semantic_profile else None
+        if embedding is None or len(embedding) == 0:
+            return self.GENERAL_SHARD
+        if self._centroids is None:
+            return "cluster-0"
+        return f"cluster-{int(np.argmax(self._centroids @ np.asarray(embedding, dtype=np.float32)))}"
+
+    def _train(self):
+        """
+        以球面 k-means 重新分群，並將所屬群改變的節點移到新分片
+
+        向量取自各分片索引中已正規化的向量
+        """
+        node_ids = [node_id for node_id, key in self._home.items() if key != self.GENERAL_SHARD]
+        vectors = np.stack([self.shards[self._home[node_id]].embedding_index.vector(node_id) for node_id in node_ids])
+        k = min(self.shard_count, len(node_ids))
+        sample_size = min(len(node_ids), k * self.TRAIN_SAMPLES_PER_SHARD)
+        sample = vectors[self._rng.sample(range(len(node_ids)), sample_size)]
+        self._centroids = spherical_kmeans(sample, k, self.KMEANS_ITERATIONS, self._rng).astype(np.float32)
+        self._trained_size = len(node_ids)
+        self.train_count += 1
+
+        assignment = np.argmax(vectors @ self._centroids.T, axis=1)
+        for node_id, cell in zip(node_ids, assignment.tolist()):
+            key = f"cluster-{cell}"
+            if self._home[node_id] != key:
+                self._move(node_id, key)
+        for key in [key for key, shard in self.shards.items() if not shard.nodes]:
+            self.shards.pop(key).close()
+
+    def _move(self, node_id: str, key: str):
+        """
+        將節點移到另一個分片，保留遙測 EWMA 與斷路器狀態
+
+        移動期間送往舊分片的回報會被忽略（_publish 檢查遙測物件）
+        """
+        source = self.shards[self._home[node_id]]
+        target = self._shard(key)
+        node = self.nodes[node_id]
+        telemetry = source._telemetry[node_id]
+        source.unregister_node(node_id)
+        target.register_node(node)
+        target._telemetry[node_id] = telemetry
+        with telemetry.lock:
+            target._publish(node_id, telemetry, telemetry.load, telemetry.latency_ms, None)
+            if telemetry.circuit == CircuitState.OPEN:
+                target._open_circuits[node_id] = telemetry
+        for domain in node.domains:
+            counts = self._domain_shards[domain]
+            counts[self._home[node_id]] -= 1
+            if not counts[self._home[node_id]]:
+                del counts[self._home[node_id]]
+            counts[key] = counts.get(key, 0) + 1
+        self._home[node_id] = key
+        self.moved_nodes += 1
+
+    def get_routing_stats(self) -> Dict:
+        """取得路由統計"""
+        return {
+            "total_nodes": len(self.nodes),
+            "partition": self.partition.value,
+            "shards": {key: len(shard.nodes) for key, shard in self.shards.items()},
+            "domains": list(self.routing_table.keys()),
+            "train_count": self.train_count,
+            "trained_size": self._trained_size,
+            "moved_nodes": self.moved_nodes,
+            "parallel_routes": self.parallel_routes,
+            "fallback_routes": self.fallback_routes,
+            "intent_profiler": self.profiler.stats(),
+        }
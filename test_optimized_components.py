@@ -30,6 +30,621 @@ def test_semantic_routing():
         print(f"  ✗ 路由組件測試失敗: {e}")
         return False
 
+def test_semantic_vector_routing():
+    """測試向量索引路由"""
+    print("測試向量索引路由...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode
+        router = SIC_Router()
+        
+        for i, embedding in enumerate([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]):
+            router.register_node(SemanticNode(
+                node_id=f"vec-node-{i}",
+                model_type="test",
+                capabilities=["test"],
+                semantic_profile={"embedding": embedding}
+            ))
+        
+        decision = router.route("test intent", intent_embedding=[0.1, 0.9, 0.0])
+        assert decision.selected_nodes[0].node_id == "vec-node-1"
+        
+        router.unregister_node("vec-node-1")
+        decision = router.route("test intent", intent_embedding=[0.1, 0.9, 0.0])
+        assert decision.selected_nodes[0].node_id == "vec-node-0"
+        print(f"  ✓ 向量路由功能正常: {decision.semantic_distance:.3f}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 向量路由測試失敗: {e}")
+        return False
+
+def test_intent_profiler():
+    """測試意圖特徵擷取器"""
+    print("測試意圖特徵擷取器...")
+    try:
+        import threading
+        from core.intent_profiler import SIC_IntentProfiler
+        profiler = SIC_IntentProfiler()
+        
+        profile = profiler.profile("分析這份財務報表的 Transaction 紀錄與合約")
+        assert profile["domain_hints"] == {"finance", "legal"}
+        assert profile["language"] == "zh"
+        assert profiler.profile("分析這份財務報表的 Transaction 紀錄與合約") is profile
+        
+        profiler.add_keywords("travel", ["Flight"])
+        profile = profiler.profile("book a flight")
+        assert profile["domain_hints"] == {"travel"} and profile["language"] == "en"
+        
+        # 多執行緒共用小快取：LRU 的命中、插入與淘汰互不干擾
+        shared = SIC_IntentProfiler(cache_size=2)
+        errors = []
+        
+        def hammer(offset: int):
+            try:
+                for i in range(2000):
+                    shared.profile(f"intent {(i + offset) % 5}")
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=hammer, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors[0]
+        stats = shared.stats()
+        assert stats["cached"] <= 2 and stats["hits"] + stats["misses"] == 16000
+        print(f"  ✓ 特徵擷取功能正常: {profiler.stats()['hits']} hits")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 特徵擷取測試失敗: {e}")
+        return False
+
+def test_node_telemetry():
+    """測試節點遙測"""
+    print("測試節點遙測...")
+    try:
+        import copy
+        import dataclasses
+        import pickle
+        import threading
+        from core.semantic_routing import SIC_Router, SemanticNode
+        router = SIC_Router()
+        for node_id in ("slow", "fast"):
+            router.register_node(SemanticNode(
+                node_id=node_id,
+                model_type="test",
+                capabilities=["test"],
+                semantic_profile={},
+                load=0.5,
+                latency_ms=100
+            ))
+        
+        def report(node_id: str, latency_ms: float):
+            for _ in range(200):
+                router.report_latency(node_id, latency_ms)
+                router.report_load(node_id, latency_ms / 1000)
+        
+        threads = [threading.Thread(target=report, args=args) for args in (("slow", 400), ("fast", 20))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        router.report_error("slow", latency_ms=1000)
+        
+        decision = router.route("test intent")
+        assert decision.selected_nodes[0].node_id == "fast"
+        telemetry = router.get_node_telemetry("slow")
+        assert telemetry["errors"] == 1 and 0 < telemetry["error_rate"] < 1
+        assert router.nodes["fast"].latency_ms == 20
+        
+        # update_node_load 同步節點欄位與路由使用的節點陣列
+        router.update_node_load("fast", available=False)
+        assert router.route("test intent").selected_nodes[0].node_id == "slow"
+        router.update_node_load("fast", available=True, load=1.0, latency_ms=5000)
+        assert router.route("test intent").selected_nodes[0].node_id == "slow"
+        telemetry_fast = router.get_node_telemetry("fast")
+        assert telemetry_fast["load"] == 1.0 and telemetry_fast["latency_ms"] == 5000
+        assert router.nodes["fast"].load == 1.0 and router.nodes["fast"].available
+        
+        # 已註冊的節點與路由決策仍可複製與序列化
+        fast = router.nodes["fast"]
+        assert copy.deepcopy(fast) == fast
+        assert dataclasses.asdict(fast)["latency_ms"] == 5000
+        assert pickle.loads(pickle.dumps(fast)) == fast
+        decision = router.route("test intent")
+        assert copy.deepcopy(decision).selected_nodes == decision.selected_nodes
+        assert pickle.loads(pickle.dumps(decision)).selected_nodes == decision.selected_nodes
+        print(f"  ✓ 遙測功能正常: slow={telemetry['latency_ms']:.0f}ms")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 遙測測試失敗: {e}")
+        return False
+
+def test_spread_strategies():
+    """測試分散路由策略"""
+    print("測試分散路由策略...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy
+        router = SIC_Router(seed=0)
+        for i in range(4):
+            router.register_node(SemanticNode(
+                node_id=f"spread-{i}",
+                model_type="test",
+                capabilities=["test"],
+                semantic_profile={},
+                domains=["technical"] if i < 3 else []
+            ))
+        
+        for strategy in (RoutingStrategy.POWER_OF_TWO, RoutingStrategy.WEIGHTED_RANDOM):
+            chosen = {router.route("write code", strategy=strategy).selected_nodes[0].node_id
+                      for _ in range(200)}
+            assert chosen == {"spread-0", "spread-1", "spread-2"}, chosen
+        
+        router.begin_request("spread-0")
+        decision = router.route("write code", strategy=RoutingStrategy.LEAST_OUTSTANDING)
+        assert decision.selected_nodes[0].node_id == "spread-1"
+        assert "spread-0" in [n.node_id for n in decision.alternatives]
+        print(f"  ✓ 分散策略功能正常: {len(chosen)} 個候選")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 分散策略測試失敗: {e}")
+        return False
+
+def test_route_with_failover():
+    """測試斷路器與故障轉移"""
+    print("測試斷路器與故障轉移...")
+    try:
+        import time
+        from core.semantic_routing import SIC_Router, SemanticNode, FailoverError
+        router = SIC_Router()
+        for i in range(3):
+            router.register_node(SemanticNode(
+                node_id=f"failover-{i}",
+                model_type="test",
+                capabilities=["test"],
+                semantic_profile={},
+                load=0.1 * i
+            ))
+        
+        def call(node, timeout):
+            if node.node_id == "failover-0":
+                raise ConnectionError("endpoint down")
+            if node.node_id == "failover-1":
+                time.sleep(0.2)
+            return node.node_id
+        
+        outcome = router.route_with_failover(call, "test intent", hedge_delay_ms=20)
+        # failover-0 失敗 -> 改送 failover-1；failover-1 過慢 -> 對沖送往 failover-2
+        assert outcome.result == "failover-2" and outcome.hedged, outcome
+        assert outcome.attempts == ["failover-0", "failover-1", "failover-2"]
+        
+        for _ in range(router.BREAKER_FAILURES):
+            router.report_error("failover-0")
+        assert router.get_node_telemetry("failover-0")["circuit"] == "OPEN"
+        assert router.route("test intent").selected_nodes[0].node_id != "failover-0"
+        
+        outcome = router.route_with_failover(call, "test intent", hedge=False, deadline_seconds=0.05)
+        assert outcome.error == FailoverError.DEADLINE_EXCEEDED
+        
+        # 半開：試探名額在 begin_request 時扣除，用完後結果回報前不再被選中
+        router.BREAKER_OPEN_SECONDS = 0.0
+        assert router.route("test intent").selected_nodes[0].node_id == "failover-0"
+        assert router.get_node_telemetry("failover-0")["circuit"] == "HALF_OPEN"
+        router.begin_request("failover-0")
+        assert router.route("test intent").selected_nodes[0].node_id != "failover-0"
+        router.report_latency("failover-0", 10)
+        assert router.get_node_telemetry("failover-0")["circuit"] == "CLOSED"
+        router.close()
+        print(f"  ✓ 故障轉移功能正常: {outcome.attempts}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 故障轉移測試失敗: {e}")
+        return False
+
+def test_affinity_routing():
+    """測試會話黏著路由"""
+    print("測試會話黏著路由...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy
+        router = SIC_Router()
+        for i in range(8):
+            router.register_node(SemanticNode(
+                node_id=f"affinity-{i}",
+                model_type="test",
+                capabilities=["test"],
+                semantic_profile={},
+                domains=["technical"]
+            ))
+        
+        def owners():
+            return {
+                session: router.route(
+                    "write code", strategy=RoutingStrategy.AFFINITY, session_id=session
+                ).selected_nodes[0].node_id
+                for session in (f"session-{k}" for k in range(200))
+            }
+        
+        before = owners()
+        assert before == owners() and len(set(before.values())) > 4
+        
+        router.unregister_node("affinity-0")
+        after = owners()
+        moved = [session for session in before if before[session] != after[session]]
+        assert all(before[session] == "affinity-0" for session in moved)
+        
+        home = after["session-1"]
+        for _ in range(4):
+            router.begin_request(home)
+        decision = router.route("write code", strategy=RoutingStrategy.AFFINITY, session_id="session-1")
+        assert decision.selected_nodes[0].node_id != home
+        print(f"  ✓ 黏著路由功能正常: 移除節點後 {len(moved)}/200 個會話改變去向")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 黏著路由測試失敗: {e}")
+        return False
+
+def test_semantic_path():
+    """測試語義路徑規劃"""
+    print("測試語義路徑規劃...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode
+        router = SIC_Router()
+        for node_id, languages, domains, capabilities in (
+            ("zh-finance", ["zh"], ["finance"], ["analysis"]),
+            ("translator", ["zh", "en"], ["general"], ["translation"]),
+            ("en-legal", ["en"], ["legal"], ["analysis"]),
+            ("en-technical", ["en"], ["technical"], ["coding"]),
+        ):
+            router.register_node(SemanticNode(
+                node_id=node_id,
+                model_type="test",
+                capabilities=capabilities,
+                semantic_profile={},
+                domains=domains,
+                languages=languages
+            ))
+        
+        path = router.find_semantic_path("請審查這份合約", "legal contract review")
+        assert [node.node_id for node in path] == ["translator", "en-legal"], path
+        assert router.find_semantic_path("請審查這份合約", "legal contract review", max_hops=1) == []
+        
+        router.update_node_load("translator", available=False)
+        assert router.find_semantic_path("請審查這份合約", "legal contract review") == []
+        stats = router.path_planner.stats()
+        print(f"  ✓ 路徑規劃功能正常: zh → translator → en-legal, {stats['tree_hits']} tree hits")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 路徑規劃測試失敗: {e}")
+        return False
+
+def test_decision_cache():
+    """測試路由決策快取"""
+    print("測試路由決策快取...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode
+        router = SIC_Router(decision_cache_ttl=1.0)
+        for i, embedding in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+            router.register_node(SemanticNode(
+                node_id=f"node-{i}",
+                model_type="test",
+                capabilities=["analysis"],
+                semantic_profile={"embedding": embedding},
+                domains=["finance"],
+                languages=["zh"]
+            ))
+        
+        first = router.route("投資分析", intent_embedding=[1.0, 0.05, 0.0])
+        assert router.route("投資分析", intent_embedding=[1.0, 0.06, 0.0]) is first
+        assert router.route("投資分析", intent_embedding=[0.0, 0.0, 1.0]) is not first
+        
+        # 選中的節點不可用時快取失效
+        router.update_node_load(first.selected_nodes[0].node_id, available=False)
+        rerouted = router.route("投資分析", intent_embedding=[1.0, 0.05, 0.0])
+        assert rerouted.selected_nodes[0].node_id != first.selected_nodes[0].node_id
+        stats = router.route_cache.stats()
+        print(f"  ✓ 決策快取功能正常: {stats['hits']} hits, {stats['invalidations']} invalidations")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 決策快取測試失敗: {e}")
+        return False
+
+def test_sharded_router():
+    """測試分片路由器"""
+    print("測試分片路由器...")
+    try:
+        import random
+        from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy
+        from core.sharded_router import SIC_ShardedRouter, ShardPartition
+        rng = random.Random(0)
+        flat = SIC_Router()
+        by_domain = SIC_ShardedRouter()
+        by_cluster = SIC_ShardedRouter(partition=ShardPartition.CLUSTER, shards=4, seed=0)
+        by_cluster.CLUSTER_MIN_NODES = 32
+        domains = ["finance", "medical", "legal", "technical"]
+        for i in range(200):
+            embedding = [(1.0 if d == i % 4 else 0.0) + rng.gauss(0, 0.1) for d in range(4)]
+            load = rng.random() * 0.5
+            for router in (flat, by_domain, by_cluster):
+                router.register_node(SemanticNode(
+                    node_id=f"node-{i}",
+                    model_type="test",
+                    capabilities=["analysis"],
+                    semantic_profile={"embedding": embedding},
+                    domains=[domains[i % 4]],
+                    languages=["en"],
+                    load=load
+                ))
+        
+        assert len(by_domain.shards) == 4 and by_cluster.train_count > 0
+        for strategy in (RoutingStrategy.NEAREST, RoutingStrategy.MULTIPATH):
+            expected = [n.node_id for n in flat.route("legal contract review", strategy=strategy).selected_nodes]
+            assert [n.node_id for n in by_domain.route("legal contract review", strategy=strategy).selected_nodes] == expected
+        query = [0.0, 0.0, 1.0, 0.0]
+        expected = flat.route("review", intent_embedding=query).selected_nodes[0].node_id
+        assert by_cluster.route("review", intent_embedding=query).selected_nodes[0].node_id == expected
+        
+        # BROADCAST / CONTEXT_AWARE 需要所有候選，結果與單一路由器相同
+        for strategy in (RoutingStrategy.BROADCAST, RoutingStrategy.CONTEXT_AWARE):
+            for router, kwargs in ((by_domain, {}), (by_cluster, {"intent_embedding": query})):
+                expected = [n.node_id for n in flat.route("legal contract review", strategy=strategy, **kwargs).selected_nodes]
+                actual = [n.node_id for n in router.route("legal contract review", strategy=strategy, **kwargs).selected_nodes]
+                assert actual == expected, (strategy, len(actual), len(expected))
+        
+        # 相關分片沒有可用候選時改查其餘分片
+        for node_id in by_domain.routing_table["legal"]:
+            by_domain.update_node_load(node_id, available=False)
+        assert by_domain.route("legal contract review").selected_nodes[0].domains != ["legal"]
+        stats = by_cluster.get_routing_stats()
+        print(f"  ✓ 分片路由功能正常: {len(stats['shards'])} clusters, {stats['moved_nodes']} nodes moved")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 分片路由測試失敗: {e}")
+        return False
+
+def test_async_dispatch():
+    """測試非同步扇出"""
+    print("測試非同步扇出...")
+    try:
+        import asyncio
+        from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy, DispatchMode, DispatchError
+        router = SIC_Router()
+        delays = {"fast": 0.01, "medium": 0.03, "slow": 0.1, "spare": 0.01}
+        for i, node_id in enumerate(delays):
+            router.register_node(SemanticNode(
+                node_id=node_id,
+                model_type="test",
+                capabilities=["analysis"],
+                semantic_profile={},
+                domains=["legal"],
+                languages=["en"],
+                load=i * 0.1
+            ))
+        failing = set()
+        
+        async def call(node):
+            await asyncio.sleep(delays[node.node_id])
+            if node.node_id in failing:
+                raise RuntimeError(node.node_id)
+            return node.node_id
+        
+        async def scenario():
+            decision = router.route("legal contract", strategy=RoutingStrategy.MULTIPATH)
+            first = await router.dispatch(decision, call, DispatchMode.FIRST)
+            assert [result for _, result in first.results] == ["fast"] and "slow" in first.cancelled
+            
+            # 剩下的請求不足以達到 quorum 時以備選節點遞補
+            failing.update({"fast", "medium"})
+            quorum = await router.dispatch(decision, call, DispatchMode.QUORUM, quorum=2)
+            assert sorted(result for _, result in quorum.results) == ["slow", "spare"], quorum
+            
+            everything = await router.dispatch(decision, call, DispatchMode.ALL, timeout=0.05)
+            assert everything.error == DispatchError.DEADLINE_EXCEEDED and everything.timed_out == ["slow"]
+            
+            # quorum 超過選中節點時以備選節點補足；超過選中加備選時拒絕
+            failing.clear()
+            widened = await router.dispatch(decision, call, DispatchMode.QUORUM, quorum=4)
+            assert widened.error is None and sorted(widened.attempts) == sorted(delays)
+            for bad in (0, 5):
+                try:
+                    await router.dispatch(decision, call, DispatchMode.QUORUM, quorum=bad)
+                    raise AssertionError(f"quorum={bad} accepted")
+                except ValueError:
+                    pass
+            
+            # call 同步拋出時釋放名額、記為失敗並照常遞補
+            def eager(node):
+                if node.node_id in failing:
+                    raise ConnectionError(node.node_id)
+                return call(node)
+            
+            failing.add("fast")
+            eager_quorum = await router.dispatch(decision, eager, DispatchMode.QUORUM, quorum=2)
+            assert sorted(result for _, result in eager_quorum.results) == ["medium", "slow"]
+            assert [node_id for node_id, _ in eager_quorum.failures] == ["fast"]
+            failing.update(delays)
+            refused = await router.dispatch(decision, eager, DispatchMode.FIRST)
+            assert refused.error == DispatchError.INSUFFICIENT and sorted(refused.attempts) == sorted(delays)
+            return first, quorum
+        
+        first, quorum = asyncio.run(scenario())
+        assert all(router.get_node_telemetry(node_id)["outstanding"] == 0 for node_id in delays)
+        assert router.get_node_telemetry("fast")["errors"] == 4
+        print(f"  ✓ 非同步扇出功能正常: first={first.results[0][1]}, quorum attempts={quorum.attempts}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 非同步扇出測試失敗: {e}")
+        return False
+
+def test_ivf_index():
+    """測試IVF向量索引過濾查詢"""
+    print("測試IVF向量索引過濾查詢...")
+    try:
+        import numpy as np
+        from core.semantic_index import SIC_IVFIndex
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((1200, 16)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        index = SIC_IVFIndex(nprobe=2)
+        index.EXACT_THRESHOLD = 256
+        for i, vector in enumerate(vectors):
+            index.add(f"n{i}", vector)
+        for i in range(0, 1200, 7):
+            index.remove(f"n{i}")
+        
+        # 記錄每次排序的候選數
+        scanned = []
+        rank = index._rank
+        index._rank = lambda q, nodes, k, filter: scanned.append(len(nodes)) or rank(q, nodes, k, filter)
+        
+        # 過濾條件只放行少數項目，迫使查詢多次擴大掃描範圍
+        admitted = {f"n{i}" for i in range(1, 1200, 50)}
+        query = rng.standard_normal(16)
+        hits = index.search(query, k=10, filter=admitted.__contains__)
+        assert len(hits) == 10 and all(key in admitted for key, _ in hits)
+        assert [d for _, d in hits] == sorted(d for _, d in hits)
+        # 每次擴大只掃描新加入的群：每個項目至多排序一次
+        assert len(scanned) > 1 and sum(scanned) <= 1200
+        
+        # 掃描全部群時與精確搜尋一致
+        q = query / np.linalg.norm(query)
+        expected = sorted(
+            (1.0 - float(vectors[int(key[1:])] @ q), key) for key in admitted if key in index
+        )[:10]
+        full = index.search(query, k=10, filter=admitted.__contains__, nprobe=index.stats()["nlist"])
+        assert [key for key, _ in full] == [key for _, key in expected]
+        assert all(abs(distance - d) < 1e-5 for (_, distance), (d, _) in zip(full, expected))
+        
+        # 可放行項目不足 k 筆時回傳全部
+        few = {"n1", "n51", "n7"}
+        assert {key for key, _ in index.search(query, k=10, filter=few.__contains__)} == {"n1", "n51"}
+        
+        print(f"  ✓ IVF索引功能正常: {index.stats()['nlist']} 群, 過濾後 top-{len(hits)}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ IVF索引測試失敗: {e}")
+        return False
+
+def test_distance_cache():
+    """測試語義距離快取"""
+    print("測試語義距離快取...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode
+        router = SIC_Router()
+        # 沒有 embedding 的節點在帶意圖向量時以啟發式評分，經由距離快取
+        router.register_node(SemanticNode(
+            node_id="fin", model_type="test", capabilities=["analysis"],
+            semantic_profile={}, domains=["finance"], languages=["zh"]
+        ))
+        router.register_node(SemanticNode(
+            node_id="gen", model_type="test", capabilities=["analysis"],
+            semantic_profile={}
+        ))
+        
+        # 重複的意圖命中快取
+        first = router.route("投資分析", intent_embedding=[1.0, 0.0])
+        assert first.selected_nodes[0].node_id == "fin"
+        assert abs(first.semantic_distance - 0.2) < 1e-9
+        assert router.get_cache_stats()["misses"] == 2
+        router.route("投資分析", intent_embedding=[1.0, 0.0])
+        stats = router.get_cache_stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        
+        # 負載 / 延遲在命中時仍即時套用
+        router.update_node_load("fin", load=1.0, latency_ms=5000)
+        assert router.route("投資分析", intent_embedding=[1.0, 0.0]).selected_nodes[0].node_id == "gen"
+        assert router.get_cache_stats()["hits"] == 4
+        
+        # 重新註冊提升節點版本，不回傳舊的距離
+        router.register_node(SemanticNode(
+            node_id="fin", model_type="test", capabilities=["analysis"],
+            semantic_profile={}, domains=["legal"]
+        ))
+        router.update_node_load("gen", available=False)
+        decision = router.route("投資分析", intent_embedding=[1.0, 0.0])
+        assert decision.selected_nodes[0].node_id == "fin"
+        assert abs(decision.semantic_distance - 0.5) < 1e-9
+        
+        # 註銷移除節點的所有項目
+        invalidations = router.get_cache_stats()["invalidations"]
+        router.unregister_node("fin")
+        stats = router.get_cache_stats()
+        assert stats["invalidations"] > invalidations
+        assert all("fin" not in entries for entries in router._distance_cache.values())
+        print(f"  ✓ 距離快取功能正常: {stats['hits']} hits, {stats['invalidations']} invalidations")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 距離快取測試失敗: {e}")
+        return False
+
+def test_capability_filter():
+    """測試能力位元遮罩過濾"""
+    print("測試能力位元遮罩過濾...")
+    try:
+        from core.semantic_routing import SIC_Router, SemanticNode, RoutingStrategy
+        capabilities = {
+            "r": ["read"],
+            "rw": ["read", "write"],
+            "rwx": ["read", "write", "exec"],
+            "w": ["write"],
+        }
+        cases = [
+            (["read", "write"], {"rw", "rwx"}),
+            (["exec", "read"], {"rwx"}),
+            (["write"], {"rw", "rwx", "w"}),
+            (["teleport"], set()),
+            (["read", "teleport"], set()),
+        ]
+        
+        def build(with_embedding: bool) -> SIC_Router:
+            router = SIC_Router()
+            for i, (node_id, caps) in enumerate(capabilities.items()):
+                embedding = [1.0, 0.1 * i] if with_embedding else None
+                router.register_node(SemanticNode(
+                    node_id=node_id, model_type="test", capabilities=caps,
+                    semantic_profile={"embedding": embedding} if embedding else {}
+                ))
+            return router
+        
+        def selected(decision) -> set:
+            return {node.node_id for node in decision.selected_nodes}
+        
+        heuristic = build(with_embedding=False)
+        indexed = build(with_embedding=True)
+        for required, expected in cases:
+            # 逐節點路徑（_candidate_nodes）
+            assert {n.node_id for n in heuristic._candidate_nodes(required)} == expected
+            # 向量化評分（_score_vectorized）
+            decision = heuristic.route("task", strategy=RoutingStrategy.BROADCAST,
+                                       required_capabilities=required)
+            assert selected(decision) == expected, (required, selected(decision))
+            # 有意圖向量但節點未進索引（_candidate_nodes + 啟發式距離）
+            decision = heuristic.route("task", strategy=RoutingStrategy.BROADCAST,
+                                       required_capabilities=required, intent_embedding=[1.0, 0.0])
+            assert selected(decision) == expected, (required, selected(decision))
+            # 向量索引查詢時過濾（_score_nearest）
+            decision = indexed.route("task", strategy=RoutingStrategy.MULTIPATH,
+                                     required_capabilities=required, intent_embedding=[1.0, 0.0])
+            assert selected(decision) == expected, (required, selected(decision))
+        print(f"  ✓ 能力過濾功能正常: {len(cases)} 組需求 × 4 條路徑")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 能力過濾測試失敗: {e}")
+        return False
+
 def test_semantic_signature():
     """測試語義簽名組件"""
     print("測試語義簽名組件...")
@@ -92,15 +707,508 @@ def test_sit_handshake():
         print(f"  ✗ 握手組件測試失敗: {e}")
         return False
 
+def test_sic_pkt_compression():
+    """測試SIC封包壓縮"""
+    print("測試SIC封包壓縮...")
+    try:
+        import json
+        from validators.sic_pkt import SIC_PKT_Handler, SIC_PKT_Compression, SIC_PKT_Error
+        sender = SIC_PKT_Handler(model_id="sender")
+        receiver = SIC_PKT_Handler(model_id="receiver")
+        
+        payload = {
+            "intent": "test intent",
+            "context": [{"step": i, "note": "repeated state"} for i in range(100)]
+        }
+        pkt = sender.create_packet(payload)
+        
+        # 壓縮傳輸後 SHV 仍須對應原始載荷
+        wire = sender.encode_packet(pkt, compression=SIC_PKT_Compression.ZLIB)
+        parsed, error = receiver.parse_packet(wire)
+        valid, _ = receiver.validate_packet(parsed)
+        assert error is None and valid
+        assert len(wire) < len(pkt.to_json())
+        
+        # 非整數的 raw_size 回傳格式錯誤，而非拋出例外
+        for raw_size in ("1024", None, [1], -1, True):
+            tampered = json.loads(wire)
+            tampered["header"]["raw_size"] = raw_size
+            _, error = receiver.parse_packet(json.dumps(tampered))
+            assert error == SIC_PKT_Error.INVALID_FORMAT, (raw_size, error)
+        
+        # 非字串的 dict_id 同樣回傳格式錯誤
+        for dict_id in (["x"], {"x": 1}, 7, None):
+            tampered = json.loads(wire)
+            tampered["header"].update(compression="zlib-dict", dict_id=dict_id)
+            _, error = receiver.parse_packet(json.dumps(tampered))
+            assert error == SIC_PKT_Error.INVALID_FORMAT, (dict_id, error)
+        
+        print(f"  ✓ 壓縮功能正常: {len(pkt.to_json())} → {len(wire)} bytes")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 封包壓縮測試失敗: {e}")
+        return False
+
+def test_sit_syn_cookie():
+    """測試SIT握手SYN cookie模式"""
+    print("測試SIT握手SYN cookie模式...")
+    try:
+        from validators.sit_handshake import SIT_Handshake
+        requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+        responder = SIT_Handshake(secret_key="test-key", entity_id="responder", syn_cookies=True)
+        
+        syn = requester.create_syn(
+            intent_scope="test scope",
+            semantic_boundary={"type": "test"},
+            constraints={"max_tokens": 100}
+        )
+        syn_ack, error = responder.process_syn(syn, modified_constraints={"max_tokens": 50})
+        assert error is None
+        # 接收者在 ACK 前不保留狀態
+        assert len(responder.pending_sessions) == 0
+        
+        ack, error = requester.process_syn_ack(syn_ack)
+        session, error = responder.process_ack(ack)
+        assert error is None
+        assert session.agreed_constraints["max_tokens"] == 50
+        
+        print(f"  ✓ SYN cookie 功能正常: {session.state}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ SYN cookie 測試失敗: {e}")
+        return False
+
+def test_sit_session_seal():
+    """測試SIT會話內訊息認證"""
+    print("測試SIT會話內訊息認證...")
+    try:
+        from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError
+        requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+        responder = SIT_Handshake(secret_key="test-key", entity_id="responder")
+        
+        syn = requester.create_syn(intent_scope="test scope", semantic_boundary={"type": "test"})
+        syn_ack, error = responder.process_syn(syn)
+        ack, error = requester.process_syn_ack(syn_ack)
+        session, error = responder.process_ack(ack)
+        assert error is None
+        
+        sealed, error = requester.seal(session.session_id, b"hello")
+        payload, error = responder.open(session.session_id, sealed)
+        assert payload == b"hello" and error is None
+        # 重放與反射皆被拒絕
+        assert responder.open(session.session_id, sealed)[1] == SIT_HandshakeError.REPLAY_DETECTED
+        assert requester.open(session.session_id, sealed)[1] == SIT_HandshakeError.SIGNATURE_INVALID
+        
+        print(f"  ✓ 會話訊息認證功能正常: {len(sealed)} bytes")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 會話訊息認證測試失敗: {e}")
+        return False
+
+def test_sit_session_table():
+    """測試SIT會話表到期與淘汰"""
+    print("測試SIT會話表到期與淘汰...")
+    try:
+        from validators.sit_session_store import SIT_SessionTable
+        now = [0.0]
+        table = SIT_SessionTable(max_size=3, clock=lambda: now[0])
+        
+        table.put("a", 1, ttl_seconds=30)
+        table.put("b", 2, ttl_seconds=10)
+        table.put("c", 3, ttl_seconds=20)
+        # 覆寫延長到期時間，舊堆項目不得造成誤刪
+        table.put("b", 2, ttl_seconds=40)
+        
+        # 依到期時間先後清掃
+        now[0] = 25.0
+        assert table.sweep() == 1
+        assert "c" not in table and table.get("a") == 1 and table.get("b") == 2
+        now[0] = 35.0
+        assert table.sweep() == 1 and "a" not in table
+        assert table.get("b") == 2 and table.expired_count == 2
+        
+        # 容量已滿時淘汰最早到期者
+        table.put("d", 4, ttl_seconds=100)
+        table.put("e", 5, ttl_seconds=2)
+        table.put("f", 6, ttl_seconds=50)
+        assert len(table) == 3 and table.evicted_count == 1
+        assert "e" not in table
+        assert [table.get(key) for key in ("b", "d", "f")] == [2, 4, 6]
+        
+        print(f"  ✓ 會話表功能正常: {table.stats()['expired']} 過期 / {table.stats()['evicted']} 淘汰")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 會話表測試失敗: {e}")
+        return False
+
+def test_sit_shared_store():
+    """測試SIT握手跨行程共享會話表"""
+    print("測試SIT握手跨行程共享會話表...")
+    try:
+        import os
+        import tempfile
+        from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError
+        from validators.sit_session_store import SIT_SQLiteSessionStore
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sessions.db")
+            
+            def worker():
+                # 每個 worker 各自持有連線，模擬同一埠後方的兩個行程
+                return SIT_Handshake(
+                    secret_key="test-key", entity_id="responder",
+                    pending_store=SIT_SQLiteSessionStore(path, namespace="pending", batch_size=16),
+                    established_store=SIT_SQLiteSessionStore(path, namespace="established", batch_size=16),
+                    ticket_store=SIT_SQLiteSessionStore(path, namespace="tickets", batch_size=16)
+                )
+            
+            worker_a, worker_b = worker(), worker()
+            requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+            
+            # SYN 落在 A、ACK 落在 B，緩衝寫入仍須對 B 可見
+            syn = requester.create_syn(intent_scope="test scope", semantic_boundary={"type": "test"})
+            syn_ack, error = worker_a.process_syn(syn)
+            assert error is None
+            ack, error = requester.process_syn_ack(syn_ack)
+            session, error = worker_b.process_ack(ack)
+            assert error is None and session.session_id == syn.session_id
+            
+            # 同一 ACK 再送到 A 時待處理狀態已被取走，不會重複建立
+            duplicate, error = worker_a.process_ack(ack)
+            assert duplicate is None and error == SIT_HandshakeError.SCOPE_MISMATCH
+            
+            # 批次 SYN 同樣在回傳前寫出
+            syns = [
+                requester.create_syn(intent_scope=f"scope {i}", semantic_boundary={})
+                for i in range(4)
+            ]
+            syn_acks = [syn_ack for syn_ack, _ in worker_a.process_syn_batch(syns)]
+            acks = [requester.process_syn_ack(syn_ack)[0] for syn_ack in syn_acks]
+            results = worker_b.process_ack_batch(acks)
+            assert all(error is None for _, error in results)
+            
+            worker_b.established_sessions.flush()
+            assert worker_a.get_session(syn.session_id) is not None
+            
+            # B 簽發的票據可在 A 恢復，之後在任一 worker 重放皆被拒絕
+            requester.process_new_ticket(worker_b.create_new_ticket(syn.session_id))
+            resume = requester.create_resume(requester.get_session(syn.session_id).resumption_ticket)
+            _, error = worker_a.process_resume(resume)
+            assert error is None
+            _, error = worker_b.process_resume(resume)
+            assert error == SIT_HandshakeError.REPLAY_DETECTED
+            
+            for handshake in (worker_a, worker_b):
+                handshake.close()
+                handshake.pending_sessions.close()
+                handshake.established_sessions.close()
+                handshake.tickets.close()
+        
+        print(f"  ✓ 共享會話表功能正常: {len(results) + 1} 個會話跨 worker 建立")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 共享會話表測試失敗: {e}")
+        return False
+
+def test_sit_resumption():
+    """測試SIT握手會話恢復"""
+    print("測試SIT握手會話恢復...")
+    try:
+        from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError
+        requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+        responder = SIT_Handshake(secret_key="test-key", entity_id="responder")
+        
+        def handshake():
+            syn = requester.create_syn(intent_scope="test scope", semantic_boundary={"type": "test"})
+            syn_ack, _ = responder.process_syn(syn, modified_constraints={"max_tokens": 50})
+            ack, _ = requester.process_syn_ack(syn_ack)
+            session, error = responder.process_ack(ack)
+            assert error is None
+            # 握手完成後票據交付請求者
+            session, error = requester.process_new_ticket(responder.create_new_ticket(session.session_id))
+            assert error is None and session.resumption_ticket
+            return session
+        
+        ticket = handshake().resumption_ticket
+        resume = requester.create_resume(ticket)
+        resume_ack, error = responder.process_resume(resume)
+        assert error is None
+        session, error = requester.process_resume_ack(resume_ack)
+        assert error is None and session.agreed_constraints["max_tokens"] == 50
+        assert responder.is_session_valid(session.session_id)
+        
+        # 重放同一票據被拒絕；輪換後的新票據可再次恢復
+        replay, error = responder.process_resume(requester.create_resume(ticket))
+        assert replay is None and error == SIT_HandshakeError.REPLAY_DETECTED
+        _, error = responder.process_resume(requester.create_resume(session.resumption_ticket))
+        assert error is None
+        
+        # 過期票據被拒絕
+        responder.TICKET_LIFETIME_SECONDS = 0
+        expired, error = responder.process_resume(requester.create_resume(handshake().resumption_ticket))
+        assert expired is None and error == SIT_HandshakeError.TIMEOUT
+        
+        print(f"  ✓ 會話恢復功能正常: {len(responder.tickets)} 張票據未使用")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 會話恢復測試失敗: {e}")
+        return False
+
+def test_sit_verify_cache():
+    """測試SIT握手簽名驗證快取"""
+    print("測試SIT握手簽名驗證快取...")
+    try:
+        from dataclasses import replace
+        from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError
+        requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+        responder = SIT_Handshake(secret_key="test-key", entity_id="responder", verify_cache_size=4)
+        
+        syn = requester.create_syn(intent_scope="test scope", semantic_boundary={"type": "test"})
+        _, error = responder.process_syn(syn)
+        assert error is None and responder.verify_cache.hits == 0
+        
+        # 重傳的 SYN 命中快取，不重算 HMAC
+        _, error = responder.process_syn(syn)
+        assert error is None and responder.verify_cache.hits == 1
+        
+        # 竄改簽名的重傳不命中，且不會寫入快取
+        forged = replace(syn, signature="0" * 64)
+        _, error = responder.process_syn(forged)
+        assert error == SIT_HandshakeError.SIGNATURE_INVALID
+        assert responder.verify_cache.hits == 1 and responder.verify_cache.stats()["size"] == 1
+        
+        # 容量有界，最久未用者先被淘汰
+        for i in range(10):
+            responder.process_syn(requester.create_syn(intent_scope=f"scope {i}", semantic_boundary={}))
+        assert responder.verify_cache.stats()["size"] == 4
+        responder.process_syn(syn)
+        assert responder.verify_cache.hits == 1
+        
+        # 容量 0 表示停用
+        disabled = SIT_Handshake(secret_key="test-key", entity_id="responder", verify_cache_size=0)
+        disabled.process_syn(syn)
+        disabled.process_syn(syn)
+        assert disabled.verify_cache.stats()["size"] == 0 and disabled.verify_cache.hits == 0
+        
+        stats = responder.verify_cache.stats()
+        print(f"  ✓ 驗證快取功能正常: {stats['size']}/{stats['max_size']} 項, 命中率 {stats['hit_rate']:.0%}")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 驗證快取測試失敗: {e}")
+        return False
+
+def test_sit_batch_handshake():
+    """測試SIT批次與並行握手"""
+    print("測試SIT批次與並行握手...")
+    try:
+        import asyncio
+        from dataclasses import replace
+        from concurrent.futures import ThreadPoolExecutor
+        from validators.sit_handshake import SIT_Handshake, SIT_HandshakeError, establish_sessions_async
+        requester = SIT_Handshake(secret_key="test-key", entity_id="requester")
+        responder = SIT_Handshake(secret_key="test-key", entity_id="responder")
+        
+        # 結果順序與輸入一致（含 executor 分塊的情況）
+        requests = [{"intent_scope": f"scope {i}", "semantic_boundary": {"i": i}} for i in range(10)]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            syns = requester.create_syn_batch(requests, executor=executor)
+            assert [syn.intent_scope for syn in syns] == [r["intent_scope"] for r in requests]
+            
+            # 逐項錯誤不影響其他項目
+            syns[3] = replace(syns[3], signature="0" * 64)
+            results = responder.process_syn_batch(syns, executor=executor)
+        assert [error for _, error in results].count(SIT_HandshakeError.SIGNATURE_INVALID) == 1
+        assert results[3][0] is None
+        assert all(syn_ack.session_id == syn.session_id
+                   for (syn_ack, _), syn in zip(results, syns) if syn_ack)
+        
+        syn_acks = [syn_ack for syn_ack, _ in results if syn_ack]
+        acks = [ack for ack, _ in requester.process_syn_ack_batch(syn_acks)]
+        acks.insert(0, replace(acks[0], session_id="unknown"))
+        sessions = responder.process_ack_batch(acks)
+        assert sessions[0] == (None, SIT_HandshakeError.SCOPE_MISMATCH)
+        assert [session.session_id for session, _ in sessions[1:]] == [ack.session_id for ack in acks[1:]]
+        
+        # 重傳的批次由驗證快取命中
+        hits = responder.verify_cache.hits
+        responder.process_syn_batch([syns[0]])
+        assert responder.verify_cache.hits == hits + 1
+        
+        # 並行握手：遵守並行上限，失敗的握手不留下會話
+        in_flight = [0, 0]
+        
+        async def send_syn(syn):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            if syn.intent_scope == "denied":
+                return None, SIT_HandshakeError.REQUESTER_DENIED
+            return responder.process_syn(syn)
+        
+        async def send_ack(ack):
+            return responder.process_ack(ack)
+        
+        scopes = ["a", "b", "denied", "c", "d", "e"]
+        established = asyncio.run(establish_sessions_async(
+            requester, [{"intent_scope": scope} for scope in scopes],
+            send_syn, send_ack, concurrency=2
+        ))
+        assert in_flight[1] == 2
+        assert established[2] == (None, SIT_HandshakeError.REQUESTER_DENIED)
+        assert [session.agreed_scope for session, _ in established if session] == ["a", "b", "c", "d", "e"]
+        
+        print(f"  ✓ 批次握手功能正常: {len(sessions) - 1} 批次 / {len(scopes) - 1} 並行會話")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 批次握手測試失敗: {e}")
+        return False
+
+def test_sit_canonical_encoding():
+    """測試SIT握手正規化編碼一致性"""
+    print("測試SIT握手正規化編碼一致性...")
+    try:
+        import json
+        from validators.sit_handshake import SIT_SYN, SIT_SYN_ACK, SIT_ACK, _canonical_message
+        
+        boundaries = [
+            {},
+            {"type": "test"},
+            {"nested": {"b": 1.5, "a": None, "ok": True, "deep": {"z": [1, {"y": -0.25}]}}},
+            {"float": 1e20, "small": 3.0e-7, "neg": -0.0, "big": 2 ** 70},
+            {"unicode": "語義 😀 \u2028", "escapes": "\"quoted\" \\ back\nslash\t\x00"},
+            {"list": [], "empty": {}, "bool": False, "none": None},
+        ]
+        texts = ["", "查詢用戶資料", "\"quoted\" \\ back\nslash", "😀\u0001", None]
+        
+        messages = []
+        for i, boundary in enumerate(boundaries):
+            text = texts[i % len(texts)]
+            messages.append(SIT_SYN(
+                session_id=f"s-{i}", requester_id="r", intent_scope=text or "",
+                semantic_boundary=boundary, constraints=dict(boundary)
+            ))
+            messages.append(SIT_SYN_ACK(
+                session_id=f"s-{i}", syn_signature=text, responder_id="q",
+                accepted_scope=text or "", constraints_accepted=boundary,
+                constraints_modified={"max_tokens": i, "ratio": i / 3} if i % 2 else {},
+                session_token=text
+            ))
+            messages.append(SIT_ACK(
+                session_id=f"s-{i}", session_token=text or "", syn_ack_signature=text,
+                confirmed=bool(i % 2), semantic_mode=text or "shared-😀"
+            ))
+        
+        # 專用編碼器須與 to_dict() + json.dumps(sort_keys=True) 逐字元相同
+        for message in messages:
+            data = {k: v for k, v in message.to_dict().items() if k != 'signature'}
+            expected = json.dumps(data, sort_keys=True, ensure_ascii=False)
+            actual = _canonical_message(message)
+            assert actual == expected, f"{type(message).__name__}: {actual!r} != {expected!r}"
+        
+        print(f"  ✓ 正規化編碼一致: {len(messages)} 則訊息")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 正規化編碼測試失敗: {e}")
+        return False
+
+def test_sit_reaper():
+    """測試SIT握手到期清掃"""
+    print("測試SIT握手到期清掃...")
+    try:
+        import time
+        from validators.sit_handshake import SIT_Handshake
+        from validators.sit_session_store import SIT_SessionTable
+        now = [0.0]
+        clock = lambda: now[0]
+        handshake = SIT_Handshake(
+            secret_key="test-key", entity_id="requester",
+            pending_store=SIT_SessionTable(clock=clock),
+            established_store=SIT_SessionTable(clock=clock)
+        )
+        
+        def create_syns(count):
+            for i in range(count):
+                handshake.create_syn(intent_scope=f"scope {i}", semantic_boundary={})
+        
+        # 手動清掃：未到期不移除，到期後一次移除
+        create_syns(3)
+        assert handshake.expire_due() == 0
+        now[0] += 3600
+        assert handshake.expire_due() == 3 and len(handshake.pending_sessions) == 0
+        
+        # 背景清掃執行緒週期性呼叫 expire_due；重複啟動回傳同一執行緒
+        thread = handshake.start_reaper(interval=0.01)
+        assert handshake.start_reaper(interval=0.01) is thread
+        create_syns(2)
+        now[0] += 3600
+        deadline = time.monotonic() + 2.0
+        while len(handshake.pending_sessions) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(handshake.pending_sessions) == 0
+        
+        # 停止後不再清掃
+        handshake.stop_reaper()
+        assert not thread.is_alive()
+        runs = handshake.reaper_runs
+        create_syns(2)
+        now[0] += 3600
+        time.sleep(0.05)
+        assert handshake.reaper_runs == runs and len(handshake.pending_sessions) == 2
+        assert handshake.expire_due() == 2
+        
+        stats = handshake.get_memory_stats()
+        assert stats["reaper"]["reaped"] == 7 and stats["reaper"]["errors"] == 0
+        handshake.close()
+        
+        print(f"  ✓ 到期清掃功能正常: {stats['reaper']['runs']} 輪 / {stats['reaper']['reaped']} 項")
+        
+        return True
+    except Exception as e:
+        print(f"  ✗ 到期清掃測試失敗: {e}")
+        return False
+
 def main():
     """主測試函數"""
     print("開始測試優化後的SIC-SIT協議組件...\n")
     
     tests = [
         test_semantic_routing,
+        test_semantic_vector_routing,
+        test_intent_profiler,
+        test_node_telemetry,
+        test_spread_strategies,
+        test_route_with_failover,
+        test_affinity_routing,
+        test_semantic_path,
+        test_decision_cache,
+        test_sharded_router,
+        test_async_dispatch,
+        test_ivf_index,
+        test_distance_cache,
+        test_capability_filter,
         test_semantic_signature,
         test_sic_firewall,
-        test_sit_handshake
+        test_sit_handshake,
+        test_sic_pkt_compression,
+        test_sit_syn_cookie,
+        test_sit_session_seal,
+        test_sit_session_table,
+        test_sit_shared_store,
+        test_sit_resumption,
+        test_sit_verify_cache,
+        test_sit_batch_handshake,
+        test_sit_canonical_encoding,
+        test_sit_reaper
     ]
     
     passed = 0
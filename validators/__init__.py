@@ -1,7 +1,8 @@
 """SIC-SIT Validators"""
 from .sic_fw import SIC_FW, SIC_FW_Result, SIC_FW_Action, SIC_FW_ErrorCode
 from .sic_pkt import SIC_PKT_Handler, SIC_Packet, SIC_Header
-from .sit_handshake import SIT_Session, SIT_Handshake, SIT_SYN, SIT_SYN_ACK, SIT_ACK
+from .sit_handshake import SIT_Session, SIT_Handshake, SIT_SYN, SIT_SYN_ACK, SIT_ACK, SIT_RESUME, SIT_RESUME_ACK, SIT_NEW_TICKET
+from .sit_session_store import SIT_SessionStore, SIT_SessionTable, SIT_SQLiteSessionStore
 
 # Aliases for cleaner API
 SICFirewall = SIC_FW
@@ -10,6 +10,7 @@ USCA 協議棧位置: L2 (Network Layer)
 - 封包建立與解析
 - SHV (Semantic-Hash-Vector) 計算
 - TTL 管理
+- 載荷壓縮協商 (zlib / lzma / 共享字典)
 
 設計來源: 老翔 USCA 規格
 實作: Claude (尾德) Round 10+
@@ -19,10 +20,14 @@ USCA 協議棧位置: L2 (Network Layer)
 
 import json
 import uuid
+import zlib
+import lzma
+import base64
 import hashlib
+from collections import Counter
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
-from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from functools import lru_cache
 
@@ -44,6 +49,16 @@ class SIC_PKT_Error(Enum):
     TTL_EXPIRED = "SIC-PKT-004"
     PAYLOAD_TOO_LARGE = "SIC-PKT-005"
     VERSION_MISMATCH = "SIC-PKT-006"
+    DECOMPRESSION_FAILED = "SIC-PKT-007"
+    UNKNOWN_DICTIONARY = "SIC-PKT-008"
+
+
+class SIC_PKT_Compression(Enum):
+    """載荷壓縮演算法"""
+    NONE = "none"             # 不壓縮
+    ZLIB = "zlib"             # zlib (deflate)
+    ZLIB_DICT = "zlib-dict"   # zlib + 共享訓練字典（適合小型重複 SIT State）
+    LZMA = "lzma"             # lzma (xz)
 
 
 @dataclass
@@ -68,8 +83,13 @@ class SIC_Header:
     pkt_type: SIC_PKT_Type = SIC_PKT_Type.REQUEST
     timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
     
+    # 壓縮欄位（SHV 永遠針對未壓縮的正規化載荷計算）
+    compression: SIC_PKT_Compression = SIC_PKT_Compression.NONE
+    dict_id: str = ""           # 共享字典識別碼（僅 zlib-dict）
+    raw_size: int = 0           # 未壓縮載荷位元組數
+    
     def to_dict(self) -> Dict:
-        return {
+        data = {
             "SHV": self.SHV,
             "SID": self.SID,
             "TTL": self.TTL,
@@ -80,6 +100,13 @@ class SIC_Header:
             "pkt_type": self.pkt_type.value,
             "timestamp": self.timestamp
         }
+        # 未壓縮封包保持原有線上格式
+        if self.compression != SIC_PKT_Compression.NONE:
+            data["compression"] = self.compression.value
+            data["raw_size"] = self.raw_size
+            if self.dict_id:
+                data["dict_id"] = self.dict_id
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict) -> "SIC_Header":
@@ -92,7 +119,10 @@ class SIC_Header:
             dst_model=data.get("dst_model", ""),
             hop_count=data.get("hop_count", 0),
             pkt_type=SIC_PKT_Type(data.get("pkt_type", "REQUEST")),
-            timestamp=data.get("timestamp", "")
+            timestamp=data.get("timestamp", ""),
+            compression=SIC_PKT_Compression(data.get("compression", "none")),
+            dict_id=data.get("dict_id", ""),
+            raw_size=data.get("raw_size", 0)
         )
 
 
@@ -139,9 +169,19 @@ class SIC_PKT_Handler:
     """
     
     # 配置
-    MAX_PAYLOAD_SIZE = 1024 * 1024  # 1MB
+    MAX_PAYLOAD_SIZE = 1024 * 1024  # 1MB（解壓後）
+    MAX_COMPRESSED_SIZE = 1024 * 1024  # 1MB（壓縮後，線上傳輸大小）
+    COMPRESSION_THRESHOLD = 512  # 小於此大小且無字典時不壓縮
     SUPPORTED_VERSIONS = ["1.0.0", "1.0.1"]
     
+    # 壓縮偏好順序（協商時由前往後挑選）
+    COMPRESSION_PREFERENCE = [
+        SIC_PKT_Compression.ZLIB_DICT,
+        SIC_PKT_Compression.ZLIB,
+        SIC_PKT_Compression.LZMA,
+        SIC_PKT_Compression.NONE,
+    ]
+    
     def __init__(self, model_id: str):
         """
         初始化封包處理器
@@ -150,6 +190,7 @@ class SIC_PKT_Handler:
             model_id: 本模型的識別碼
         """
         self.model_id = model_id
+        self.dictionaries: Dict[str, bytes] = {}  # dict_id -> zdict
     
     def create_packet(
         self,
@@ -200,17 +241,24 @@ class SIC_PKT_Handler:
         """
         try:
             if isinstance(data, str):
-                pkt = SIC_Packet.from_json(data)
-            elif isinstance(data, dict):
-                pkt = SIC_Packet.from_dict(data)
-            else:
+                data = json.loads(data)
+            if not isinstance(data, dict):
                 return None, SIC_PKT_Error.INVALID_FORMAT
+            header = SIC_Header.from_dict(data.get("header", {}))
         except json.JSONDecodeError:
             return None, SIC_PKT_Error.INVALID_FORMAT
         except Exception:
             return None, SIC_PKT_Error.INVALID_FORMAT
         
-        return pkt, None
+        payload = data.get("payload", {})
+        if header.compression != SIC_PKT_Compression.NONE:
+            payload, error = self._decompress_payload(header, payload)
+            if error:
+                return None, error
+            # 記憶體中的封包一律持有未壓縮載荷，壓縮僅存在於線上格式
+            header = replace(header, compression=SIC_PKT_Compression.NONE, dict_id="", raw_size=0)
+        
+        return SIC_Packet(header=header, payload=payload), None
     
     def validate_packet(self, pkt: SIC_Packet) -> Tuple[bool, Optional[SIC_PKT_Error]]:
         """
@@ -230,7 +278,8 @@ class SIC_PKT_Handler:
             return False, SIC_PKT_Error.MISSING_HEADER
         
         # 驗證 SHV
-        expected_shv = self._compute_shv(pkt.payload)
+        canonical = self._canonicalize(pkt.payload)
+        expected_shv = hashlib.sha256(canonical).hexdigest()
         if header.SHV != expected_shv:
             return False, SIC_PKT_Error.INVALID_SHV
         
@@ -243,8 +292,7 @@ class SIC_PKT_Handler:
             return False, SIC_PKT_Error.VERSION_MISMATCH
         
         # 檢查載荷大小
-        payload_size = len(json.dumps(pkt.payload))
-        if payload_size > self.MAX_PAYLOAD_SIZE:
+        if len(canonical) > self.MAX_PAYLOAD_SIZE:
             return False, SIC_PKT_Error.PAYLOAD_TOO_LARGE
         
         return True, None
@@ -300,6 +348,198 @@ class SIC_PKT_Handler:
             pkt_type=SIC_PKT_Type.ERROR
         )
     
+    # ========== 載荷壓縮 ==========
+    
+    def register_dictionary(self, zdict: bytes) -> str:
+        """
+        註冊共享壓縮字典
+        
+        收發雙方須註冊相同字典，字典以內容雜湊識別
+        
+        Returns:
+            dict_id
+        """
+        dict_id = hashlib.sha256(zdict).hexdigest()[:16]
+        self.dictionaries[dict_id] = zdict
+        return dict_id
+    
+    @staticmethod
+    def train_dictionary(samples: Iterable[Dict], max_size: int = 4096) -> bytes:
+        """
+        以範例 SIT State 訓練共享字典
+        
+        統計正規化 JSON 中重複出現的鍵值片段，高頻片段放在字典尾端
+        （deflate 回溯距離越近，編碼越短）
+        
+        Args:
+            samples: 範例載荷
+            max_size: 字典最大位元組數（zlib 視窗上限 32KB）
+        
+        Returns:
+            zdict 位元組
+        """
+        counts: Counter = Counter()
+        for sample in samples:
+            canonical = json.dumps(sample, sort_keys=True, ensure_ascii=False)
+            # 以 JSON 結構符號切分，保留 `"key": ` 與常見值片段
+            for token in canonical.replace('{', '\n').replace('}', '\n').replace(', ', '\n').split('\n'):
+                if len(token) >= 4:
+                    counts[token] += 1
+        
+        size = 0
+        chosen: List[bytes] = []
+        for token, freq in counts.most_common():
+            if freq < 2:
+                break
+            encoded = token.encode('utf-8')
+            if size + len(encoded) > max_size:
+                continue
+            chosen.append(encoded)
+            size += len(encoded)
+        
+        # most_common 由高到低，反轉使高頻片段靠近字典尾端
+        return b"".join(reversed(chosen))
+    
+    def negotiate_compression(self, peer_supported: Iterable[str]) -> SIC_PKT_Compression:
+        """
+        與對端協商壓縮演算法
+        
+        Args:
+            peer_supported: 對端宣告支援的演算法值（如 ["zlib", "lzma"]）
+        
+        Returns:
+            雙方皆支援的最優先演算法；字典模式需本端已註冊字典
+        """
+        peer = set(peer_supported)
+        for method in self.COMPRESSION_PREFERENCE:
+            if method.value not in peer:
+                continue
+            if method == SIC_PKT_Compression.ZLIB_DICT and not self.dictionaries:
+                continue
+            return method
+        return SIC_PKT_Compression.NONE
+    
+    def encode_packet(
+        self,
+        pkt: SIC_Packet,
+        compression: SIC_PKT_Compression = SIC_PKT_Compression.NONE,
+        dict_id: str = ""
+    ) -> str:
+        """
+        將封包編碼為線上 JSON（可選壓縮）
+        
+        壓縮後的載荷以 base64 字串傳輸，壓縮方式記錄於標頭；
+        SHV 不變，仍對應未壓縮的正規化載荷
+        
+        Args:
+            pkt: 要編碼的封包
+            compression: 壓縮演算法
+            dict_id: 共享字典識別碼（zlib-dict 時使用，預設取第一個已註冊字典）
+        
+        Returns:
+            JSON 字串
+        """
+        canonical = self._canonicalize(pkt.payload)
+        
+        if compression == SIC_PKT_Compression.ZLIB_DICT:
+            if not dict_id and self.dictionaries:
+                dict_id = next(iter(self.dictionaries))
+            if dict_id not in self.dictionaries:
+                raise ValueError(f"未註冊的壓縮字典: {dict_id}")
+        elif len(canonical) < self.COMPRESSION_THRESHOLD:
+            # 小載荷壓縮收益不足
+            compression = SIC_PKT_Compression.NONE
+        
+        if compression == SIC_PKT_Compression.NONE:
+            return pkt.to_json()
+        
+        # 不修改原封包標頭，僅線上格式帶壓縮欄位
+        header = replace(
+            pkt.header,
+            compression=compression,
+            raw_size=len(canonical),
+            dict_id=dict_id if compression == SIC_PKT_Compression.ZLIB_DICT else ""
+        )
+        
+        if compression == SIC_PKT_Compression.ZLIB:
+            compressed = zlib.compress(canonical, 6)
+        elif compression == SIC_PKT_Compression.ZLIB_DICT:
+            compressor = zlib.compressobj(level=9, zdict=self.dictionaries[dict_id])
+            compressed = compressor.compress(canonical) + compressor.flush()
+        else:
+            compressed = lzma.compress(canonical, preset=6)
+        
+        return json.dumps({
+            "header": header.to_dict(),
+            "payload": base64.b64encode(compressed).decode('ascii')
+        }, ensure_ascii=False)
+    
+    def _decompress_payload(
+        self,
+        header: SIC_Header,
+        encoded: Any
+    ) -> Tuple[Optional[Dict], Optional[SIC_PKT_Error]]:
+        """
+        解壓載荷（同時限制壓縮前後大小，阻擋解壓炸彈）
+        """
+        if not isinstance(encoded, str):
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        
+        # base64 膨脹約 4/3，先以字串長度快速拒絕
+        if len(encoded) > self.MAX_COMPRESSED_SIZE * 4 // 3 + 4:
+            return None, SIC_PKT_Error.PAYLOAD_TOO_LARGE
+        # raw_size 來自線上，需為非負整數（bool 也是 int，一併拒絕）
+        if type(header.raw_size) is not int or header.raw_size < 0:
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        # dict_id 同樣來自線上，作為字典鍵前須為字串
+        if not isinstance(header.dict_id, str):
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        if header.raw_size > self.MAX_PAYLOAD_SIZE:
+            return None, SIC_PKT_Error.PAYLOAD_TOO_LARGE
+        
+        try:
+            compressed = base64.b64decode(encoded, validate=True)
+        except Exception:
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        
+        limit = self.MAX_PAYLOAD_SIZE
+        try:
+            if header.compression == SIC_PKT_Compression.ZLIB:
+                decompressor = zlib.decompressobj()
+            elif header.compression == SIC_PKT_Compression.ZLIB_DICT:
+                zdict = self.dictionaries.get(header.dict_id)
+                if zdict is None:
+                    return None, SIC_PKT_Error.UNKNOWN_DICTIONARY
+                decompressor = zlib.decompressobj(zdict=zdict)
+            else:
+                decompressor = lzma.LZMADecompressor()
+            
+            # 最多輸出 limit + 1 位元組，超過即判定過大
+            raw = decompressor.decompress(compressed, limit + 1)
+            if len(raw) > limit:
+                return None, SIC_PKT_Error.PAYLOAD_TOO_LARGE
+            if not decompressor.eof:
+                return None, SIC_PKT_Error.DECOMPRESSION_FAILED
+        except (zlib.error, lzma.LZMAError):
+            return None, SIC_PKT_Error.DECOMPRESSION_FAILED
+        
+        if header.raw_size and len(raw) != header.raw_size:
+            return None, SIC_PKT_Error.DECOMPRESSION_FAILED
+        
+        try:
+            payload = json.loads(raw.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        if not isinstance(payload, dict):
+            return None, SIC_PKT_Error.INVALID_FORMAT
+        
+        return payload, None
+    
+    @staticmethod
+    def _canonicalize(payload: Dict) -> bytes:
+        """正規化 JSON（SHV 與壓縮共用）"""
+        return json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    
     def _compute_shv(self, payload: Dict) -> str:
         """
         計算 Semantic-Hash-Vector
@@ -307,11 +547,8 @@ class SIC_PKT_Handler:
         這是語義內容的唯一識別碼，類似於 IP 封包的校驗碼
         但這裡雜湊的是「語義內容」而非「位元組」
         """
-        # 正規化 JSON
-        normalized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-        
-        # 計算 SHA-256
-        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        # 正規化 JSON 並計算 SHA-256
+        return hashlib.sha256(self._canonicalize(payload)).hexdigest()
     
     def compute_semantic_distance(self, pkt1: SIC_Packet, pkt2: SIC_Packet) -> float:
         """
@@ -385,12 +622,18 @@ SIC_PKT_SCHEMA = {
                     "type": "string",
                     "enum": ["REQUEST", "RESPONSE", "CONTROL", "ERROR"]
                 },
-                "timestamp": {"type": "string", "format": "date-time"}
+                "timestamp": {"type": "string", "format": "date-time"},
+                "compression": {
+                    "type": "string",
+                    "enum": ["none", "zlib", "zlib-dict", "lzma"]
+                },
+                "dict_id": {"type": "string"},
+                "raw_size": {"type": "integer", "minimum": 0}
             }
         },
         "payload": {
-            "type": "object",
-            "description": "SIT State JSON"
+            "type": ["object", "string"],
+            "description": "SIT State JSON（壓縮時為 base64 字串）"
         }
     }
 }
@@ -455,4 +698,16 @@ if __name__ == "__main__":
     print(f"解析成功: {error is None}")
     print(f"SID 匹配: {parsed.header.SID == pkt.header.SID}")
     
+    # 測試 6: 載荷壓縮
+    print("\n--- 測試 6: 載荷壓縮 ---")
+    big_pkt = handler.create_packet(
+        payload={**payload, "context": [{"step": i, "note": "語義狀態"} for i in range(200)]}
+    )
+    raw_len = len(big_pkt.to_json())
+    for method in (SIC_PKT_Compression.ZLIB, SIC_PKT_Compression.LZMA):
+        wire = handler.encode_packet(big_pkt, compression=method)
+        parsed, error = handler.parse_packet(wire)
+        valid, _ = handler.validate_packet(parsed)
+        print(f"{method.value}: {raw_len} → {len(wire)} bytes, SHV 有效: {valid}")
+    
     print("\n✅ SIC-PKT 測試完成")
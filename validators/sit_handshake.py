@@ -9,6 +9,13 @@ USCA 協議棧位置: L3 (Transport Layer)
 2. SIT-SYN-ACK: 接收者回覆語義邊界與預期
 3. SIT-ACK:     雙方進入共享語義模式
 
+會話恢復（一次往返）:
+0. SIT-NEW-TICKET: 握手完成後接收者將恢復票據交給請求者
+1. SIT-RESUME:     請求者出示先前取得的恢復票據
+2. SIT-RESUME-ACK: 接收者驗證票據後直接建立會話，並輪換新票據
+
+會話內訊息: seal/open 以簽名鏈衍生的會話金鑰認證原始位元組（序號 + 重放視窗）
+
 設計來源: 老翔 USCA 規格
 實作: Claude (尾德) Round 10+
 日期: 2025-12-29
@@ -16,14 +23,25 @@ USCA 協議棧位置: L3 (Transport Layer)
 """
 
 import uuid
+import time
+import math
+import base64
 import hashlib
 import hmac
 import json
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
-from functools import lru_cache
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+
+try:
+    from .sit_session_store import SIT_SessionStore, SIT_SessionTable
+except ImportError:  # 直接以腳本執行（python validators/sit_handshake.py）
+    from sit_session_store import SIT_SessionStore, SIT_SessionTable
 
 
 class SIT_HandshakeState(Enum):
@@ -45,6 +63,7 @@ class SIT_HandshakeError(Enum):
     TIMEOUT = "SIT-HS-004"              # 超時
     REQUESTER_DENIED = "SIT-HS-005"     # 請求者被拒絕
     SEMANTIC_INCOMPATIBLE = "SIT-HS-006"  # 語義不兼容
+    REPLAY_DETECTED = "SIT-HS-007"      # 重放（票據重複使用）
 
 
 @dataclass
@@ -82,6 +101,19 @@ class SIT_SYN:
             "ttl_seconds": self.ttl_seconds,
             "signature": self.signature
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_SYN":
+        return cls(
+            session_id=data["session_id"],
+            requester_id=data["requester_id"],
+            intent_scope=data["intent_scope"],
+            semantic_boundary=data.get("semantic_boundary", {}),
+            constraints=data.get("constraints", {}),
+            timestamp=data.get("timestamp", ""),
+            ttl_seconds=data.get("ttl_seconds", 30),
+            signature=data.get("signature")
+        )
 
 
 @dataclass
@@ -123,6 +155,20 @@ class SIT_SYN_ACK:
             "timestamp": self.timestamp,
             "signature": self.signature
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_SYN_ACK":
+        return cls(
+            session_id=data["session_id"],
+            syn_signature=data["syn_signature"],
+            responder_id=data["responder_id"],
+            accepted_scope=data["accepted_scope"],
+            constraints_accepted=data.get("constraints_accepted", {}),
+            constraints_modified=data.get("constraints_modified", {}),
+            session_token=data["session_token"],
+            timestamp=data.get("timestamp", ""),
+            signature=data.get("signature")
+        )
 
 
 @dataclass
@@ -158,6 +204,144 @@ class SIT_ACK:
             "timestamp": self.timestamp,
             "signature": self.signature
         }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_ACK":
+        return cls(
+            session_id=data["session_id"],
+            session_token=data["session_token"],
+            syn_ack_signature=data["syn_ack_signature"],
+            confirmed=data["confirmed"],
+            semantic_mode=data["semantic_mode"],
+            timestamp=data.get("timestamp", ""),
+            signature=data.get("signature")
+        )
+
+
+@dataclass
+class SIT_RESUME:
+    """
+    SIT-RESUME 封包
+    
+    會話恢復：請求者出示恢復票據，跳過三次握手
+    """
+    session_id: str             # 新會話 ID
+    requester_id: str
+    ticket: str                 # 接收者先前簽發的恢復票據
+    
+    # 元數據
+    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    
+    # 簽名
+    signature: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "type": "SIT-RESUME",
+            "session_id": self.session_id,
+            "requester_id": self.requester_id,
+            "ticket": self.ticket,
+            "timestamp": self.timestamp,
+            "signature": self.signature
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_RESUME":
+        return cls(
+            session_id=data["session_id"],
+            requester_id=data["requester_id"],
+            ticket=data["ticket"],
+            timestamp=data.get("timestamp", ""),
+            signature=data.get("signature")
+        )
+
+
+@dataclass
+class SIT_RESUME_ACK:
+    """
+    SIT-RESUME-ACK 封包
+    
+    會話恢復：接收者確認並附上輪換後的新票據
+    """
+    session_id: str
+    resume_signature: str       # 對應 RESUME 的簽名
+    responder_id: str
+    session_token: str
+    semantic_mode: str
+    new_ticket: str             # 輪換後的恢復票據（舊票據已作廢）
+    
+    # 元數據
+    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    
+    # 簽名
+    signature: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "type": "SIT-RESUME-ACK",
+            "session_id": self.session_id,
+            "resume_signature": self.resume_signature,
+            "responder_id": self.responder_id,
+            "session_token": self.session_token,
+            "semantic_mode": self.semantic_mode,
+            "new_ticket": self.new_ticket,
+            "timestamp": self.timestamp,
+            "signature": self.signature
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_RESUME_ACK":
+        return cls(
+            session_id=data["session_id"],
+            resume_signature=data["resume_signature"],
+            responder_id=data["responder_id"],
+            session_token=data["session_token"],
+            semantic_mode=data["semantic_mode"],
+            new_ticket=data["new_ticket"],
+            timestamp=data.get("timestamp", ""),
+            signature=data.get("signature")
+        )
+
+
+@dataclass
+class SIT_NEW_TICKET:
+    """
+    SIT-NEW-TICKET 封包
+    
+    握手完成後：接收者將恢復票據交給請求者
+    """
+    session_id: str
+    responder_id: str
+    ack_signature: str          # 對應 ACK 的簽名
+    ticket: str                 # 恢復票據
+    
+    # 元數據
+    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    
+    # 簽名
+    signature: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "type": "SIT-NEW-TICKET",
+            "session_id": self.session_id,
+            "responder_id": self.responder_id,
+            "ack_signature": self.ack_signature,
+            "ticket": self.ticket,
+            "timestamp": self.timestamp,
+            "signature": self.signature
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_NEW_TICKET":
+        return cls(
+            session_id=data["session_id"],
+            responder_id=data["responder_id"],
+            ack_signature=data["ack_signature"],
+            ticket=data["ticket"],
+            timestamp=data.get("timestamp", ""),
+            signature=data.get("signature")
+        )
 
 
 @dataclass
@@ -184,6 +368,357 @@ class SIT_Session:
     
     # 簽名鏈
     signature_chain: list = field(default_factory=list)
+    
+    # 恢復票據（接收者簽發，交由請求者保存）
+    resumption_ticket: Optional[str] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "session_id": self.session_id,
+            "session_token": self.session_token,
+            "requester_id": self.requester_id,
+            "responder_id": self.responder_id,
+            "agreed_scope": self.agreed_scope,
+            "agreed_constraints": self.agreed_constraints,
+            "semantic_mode": self.semantic_mode,
+            "state": self.state.value,
+            "established_at": self.established_at,
+            "expires_at": self.expires_at,
+            "signature_chain": list(self.signature_chain),
+            "resumption_ticket": self.resumption_ticket
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SIT_Session":
+        return cls(
+            session_id=data["session_id"],
+            session_token=data["session_token"],
+            requester_id=data["requester_id"],
+            responder_id=data["responder_id"],
+            agreed_scope=data["agreed_scope"],
+            agreed_constraints=data.get("agreed_constraints", {}),
+            semantic_mode=data["semantic_mode"],
+            state=SIT_HandshakeState(data["state"]),
+            established_at=data["established_at"],
+            expires_at=data["expires_at"],
+            signature_chain=list(data.get("signature_chain", [])),
+            resumption_ticket=data.get("resumption_ticket")
+        )
+
+
+def _timestamp_epoch(timestamp: Any) -> float:
+    """ISO 時間戳（無時區視為 UTC）或 datetime 轉為 epoch 秒"""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def _b64encode(data: bytes) -> str:
+    """base64url 編碼（無填充）"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode('ascii')
+
+
+def _b64decode(data: str) -> bytes:
+    """base64url 解碼（補回填充）"""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _seal_token(key: bytes, state: Dict) -> str:
+    """
+    將狀態封裝為 HMAC 密封令牌（SYN cookie 與恢復票據共用）
+    
+    格式: base64url(JSON 狀態) "." base64url(HMAC-SHA256 前 16 bytes)
+    """
+    body = json.dumps(state, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    mac = hmac.new(key, body, hashlib.sha256).digest()[:16]
+    return _b64encode(body) + "." + _b64encode(mac)
+
+
+def _open_token(key: bytes, token: str) -> Tuple[Optional[Dict], Optional["SIT_HandshakeError"]]:
+    """驗證並解開 _seal_token 產生的令牌"""
+    try:
+        body_part, mac_part = token.split(".", 1)
+        body = _b64decode(body_part)
+        mac = _b64decode(mac_part)
+    except (ValueError, AttributeError):
+        return None, SIT_HandshakeError.SCOPE_MISMATCH
+    
+    expected = hmac.new(key, body, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(expected, mac):
+        return None, SIT_HandshakeError.SIGNATURE_INVALID
+    
+    return json.loads(body.decode('utf-8')), None
+
+
+def _peek_token(token: str) -> Optional[Dict]:
+    """不驗證 MAC 讀取令牌內容（請求者讀取自己的票據時使用）"""
+    try:
+        return json.loads(_b64decode(token.split(".", 1)[0]).decode('utf-8'))
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+
+
+# 待處理握手中的訊息欄位 -> 類別
+_PENDING_MESSAGE_TYPES = {
+    "syn": SIT_SYN,
+    "syn_ack": SIT_SYN_ACK,
+    "resume": SIT_RESUME,
+}
+
+
+def _encode_pending(pending: Dict) -> Dict:
+    """待處理握手 → 可 JSON 序列化的字典（供共享會話表使用）"""
+    data = {
+        "state": pending["state"].value,
+        "created_at": pending["created_at"].isoformat()
+    }
+    for name in _PENDING_MESSAGE_TYPES:
+        if name in pending:
+            data[name] = pending[name].to_dict()
+    return data
+
+
+def _decode_pending(data: Dict) -> Dict:
+    """_encode_pending 的逆運算"""
+    pending = {
+        "state": SIT_HandshakeState(data["state"]),
+        "created_at": datetime.fromisoformat(data["created_at"])
+    }
+    for name, message_type in _PENDING_MESSAGE_TYPES.items():
+        if name in data:
+            pending[name] = message_type.from_dict(data[name])
+    return pending
+
+
+# ========== 正規化序列化 ==========
+
+# 與 json.dumps(..., sort_keys=True, ensure_ascii=False) 相同設定，但只建立一次編碼器
+_json_encode = json.JSONEncoder(sort_keys=True, ensure_ascii=False).encode
+_encode_str = json.encoder.encode_basestring
+
+
+def _canonical_payload(data: Dict) -> str:
+    """簽名用的正規化 JSON（不含簽名欄位）"""
+    data_copy = {k: v for k, v in data.items() if k != 'signature'}
+    return _json_encode(data_copy)
+
+
+_CONTAINER_TYPES = (dict, list, tuple)
+
+
+def _encode_scalar(value: Any) -> Optional[str]:
+    """純量欄位的 JSON 編碼；容器或其他型別回傳 None"""
+    value_type = type(value)
+    if value_type is str:
+        return _encode_str(value)
+    if value_type is bool:
+        return "true" if value else "false"
+    if value_type is int:
+        return int.__repr__(value)
+    if value is None:
+        return "null"
+    if value_type is dict and not value:
+        return "{}"
+    return None
+
+
+def _build_canonical_encoder(type_value: str, fields: Tuple[str, ...]) -> Callable[[Any], str]:
+    """
+    為固定欄位的訊息類別建立正規化編碼器
+    
+    欄位順序與鍵的 JSON 片段在建立時預先計算，編碼時不建立 to_dict 中間字典、
+    不再排序頂層鍵；輸出與 _canonical_payload(msg.to_dict()) 逐字元相同。
+    
+    每次呼叫 JSON 編碼器約有數微秒固定成本，因此最多只呼叫一次：
+    - 至多一個非空容器欄位：純量直接拼接，容器單獨編碼
+    - 兩個以上非空容器欄位：依排序後鍵建立字典，整體編碼一次
+    """
+    keys = sorted(fields + ("type",))
+    type_literal = _encode_str(type_value)
+    layout = tuple(
+        (("{" if index == 0 else ", ") + _encode_str(key) + ": ", None if key == "type" else key)
+        for index, key in enumerate(keys)
+    )
+    
+    def encode(message: Any) -> str:
+        values = [type_value if attr is None else getattr(message, attr) for _, attr in layout]
+        
+        containers = [index for index, value in enumerate(values) if type(value) in _CONTAINER_TYPES and value]
+        if len(containers) > 1:
+            return _json_encode(dict(zip(keys, values)))
+        
+        parts = []
+        for (prefix, _), value in zip(layout, values):
+            part = _encode_scalar(value)
+            if part is None:
+                part = _json_encode(value)
+            parts.append(prefix + part)
+        return "".join(parts) + "}"
+    
+    return encode
+
+
+# 訊息類別 -> 正規化編碼器（欄位須與各類別 to_dict 扣除 type/signature 後一致）
+_CANONICAL_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    SIT_SYN: _build_canonical_encoder("SIT-SYN", (
+        "session_id", "requester_id", "intent_scope", "semantic_boundary",
+        "constraints", "timestamp", "ttl_seconds",
+    )),
+    SIT_SYN_ACK: _build_canonical_encoder("SIT-SYN-ACK", (
+        "session_id", "syn_signature", "responder_id", "accepted_scope",
+        "constraints_accepted", "constraints_modified", "session_token", "timestamp",
+    )),
+    SIT_ACK: _build_canonical_encoder("SIT-ACK", (
+        "session_id", "session_token", "syn_ack_signature", "confirmed",
+        "semantic_mode", "timestamp",
+    )),
+}
+
+
+def _canonical_message(message: Any) -> str:
+    """訊息的正規化 JSON；無專用編碼器的類別退回通用路徑"""
+    encoder = _CANONICAL_ENCODERS.get(type(message))
+    if encoder is not None:
+        return encoder(message)
+    return _canonical_payload(message.to_dict())
+
+
+def _sign_chunk(secret_key: bytes, messages: List[Any]) -> List[str]:
+    """批次簽名 worker（模組層級函數，可用於 ProcessPoolExecutor）"""
+    return [
+        hmac.new(secret_key, _canonical_message(message).encode('utf-8'), hashlib.sha256).hexdigest()
+        for message in messages
+    ]
+
+
+def _verify_chunk(secret_key: bytes, items: List[Tuple[str, Optional[str]]]) -> List[bool]:
+    """
+    批次驗證 worker（模組層級函數，可用於 ProcessPoolExecutor）
+    
+    Args:
+        items: (正規化內容, 簽名) 列表；只傳字串，跨行程序列化成本低
+    
+    Returns:
+        逐項驗證結果
+    """
+    results: List[bool] = []
+    for payload_str, signature in items:
+        expected = hmac.new(secret_key, payload_str.encode('utf-8'), hashlib.sha256).hexdigest()
+        results.append(bool(signature) and hmac.compare_digest(expected, signature))
+    return results
+
+
+class SIT_VerifyCache:
+    """
+    有界簽名驗證快取（每個 SIT_Handshake 實例各自擁有）
+    
+    只記住「已驗證有效」的 (正規化內容, 簽名)，讓重傳訊息免於重算 HMAC；
+    簽名本身不快取 —— 新訊息帶有新的 UUID 與時間戳，永遠不會重複
+    """
+    
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def contains(self, payload_str: str, signature: str) -> bool:
+        """查詢是否已驗證過（命中時更新 LRU 順序）"""
+        key = (payload_str, signature)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+    
+    def add(self, payload_str: str, signature: str):
+        """記錄一筆驗證成功的訊息"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[(payload_str, signature)] = None
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SIT_SessionChannel:
+    """
+    會話內訊息認證通道（每個已建立會話、每個 SIT_Handshake 實例各一）
+    
+    封包格式: seq (8 bytes, big-endian) | payload | HMAC-SHA256 tag (32 bytes)
+    - 收發方向各用一把由會話金鑰衍生的金鑰，反射自己送出的封包無法通過驗證
+    - 序號由 1 起遞增；接收端以 64 位元滑動視窗拒絕重放與過舊的序號
+    - 只有 MAC 驗證通過的封包才會推進視窗
+    """
+    
+    SEQ_BYTES = 8
+    TAG_BYTES = 32
+    REPLAY_WINDOW = 64
+    
+    def __init__(self, send_key: bytes, recv_key: bytes):
+        self._send_mac = hmac.new(send_key, digestmod=hashlib.sha256)
+        self._recv_mac = hmac.new(recv_key, digestmod=hashlib.sha256)
+        self._lock = threading.Lock()
+        self.send_seq = 0
+        self.recv_max = 0
+        # bit i 表示序號 recv_max - i 已收過；序號 0 保留不用
+        self._recv_window = 1
+    
+    def seal(self, payload: bytes) -> bytes:
+        with self._lock:
+            self.send_seq += 1
+            seq = self.send_seq
+        header = seq.to_bytes(self.SEQ_BYTES, "big")
+        mac = self._send_mac.copy()
+        mac.update(header)
+        mac.update(payload)
+        return header + payload + mac.digest()
+    
+    def open(self, sealed: bytes) -> Tuple[Optional[bytes], Optional[SIT_HandshakeError]]:
+        if len(sealed) < self.SEQ_BYTES + self.TAG_BYTES:
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        body = sealed[:-self.TAG_BYTES]
+        mac = self._recv_mac.copy()
+        mac.update(body)
+        if not hmac.compare_digest(mac.digest(), sealed[-self.TAG_BYTES:]):
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        seq = int.from_bytes(body[:self.SEQ_BYTES], "big")
+        with self._lock:
+            if seq > self.recv_max:
+                shift = seq - self.recv_max
+                if shift < self.REPLAY_WINDOW:
+                    self._recv_window = ((self._recv_window << shift) | 1) & ((1 << self.REPLAY_WINDOW) - 1)
+                else:
+                    self._recv_window = 1
+                self.recv_max = seq
+            else:
+                offset = self.recv_max - seq
+                if offset >= self.REPLAY_WINDOW or (self._recv_window >> offset) & 1:
+                    return None, SIT_HandshakeError.REPLAY_DETECTED
+                self._recv_window |= 1 << offset
+        
+        return body[self.SEQ_BYTES:], None
 
 
 class SIT_Handshake:
@@ -195,20 +730,95 @@ class SIT_Handshake:
     - 簽名驗證
     - 超時處理
     - 會話建立
+    - SYN cookie 無狀態模式（ACK 前不保留任何待處理狀態）
+    - 恢復票據（NEW-TICKET 交付，一次往返重建會話）
+    - 會話內訊息認證（seal/open，不經 JSON 正規化）
+    - 到期清掃（expire_due，或背景執行緒 / asyncio 清掃任務）
     """
     
-    def __init__(self, secret_key: str, entity_id: str):
+    # 配置
+    SESSION_LIFETIME_SECONDS = 3600
+    SYN_COOKIE_BUCKET_SECONDS = 10
+    TICKET_LIFETIME_SECONDS = 24 * 3600
+    RESUME_TIMEOUT_SECONDS = 30
+    VERIFY_CACHE_SIZE = 1024
+    BATCH_WORKERS = 4
+    REAPER_INTERVAL_SECONDS = 1.0
+    MAX_PENDING_SESSIONS = 10000
+    MAX_ESTABLISHED_SESSIONS = 100000
+    
+    def __init__(
+        self,
+        secret_key: str,
+        entity_id: str,
+        max_pending: Optional[int] = None,
+        max_established: Optional[int] = None,
+        pending_store: Optional[SIT_SessionStore] = None,
+        established_store: Optional[SIT_SessionStore] = None,
+        ticket_store: Optional[SIT_SessionStore] = None,
+        syn_cookies: bool = False,
+        verify_cache_size: Optional[int] = None
+    ):
         """
         初始化握手管理器
         
         Args:
             secret_key: HMAC 簽名密鑰
             entity_id: 本實體 ID（用於識別請求者/接收者）
+            max_pending: 待處理握手上限（預設 MAX_PENDING_SESSIONS）
+            max_established: 已建立會話上限（預設 MAX_ESTABLISHED_SESSIONS）
+            pending_store: 待處理握手儲存（預設行程內 SIT_SessionTable）
+            established_store: 已建立會話儲存（預設行程內 SIT_SessionTable）
+            ticket_store: 未使用恢復票據 ID 的儲存（預設行程內 SIT_SessionTable）
+            syn_cookies: 啟用 SYN cookie 模式（process_syn 不寫入 pending_sessions）
+            verify_cache_size: 驗證快取容量（預設 VERIFY_CACHE_SIZE，0 表示停用）
+        
+        多行程 responder 共享狀態時，三個 store 皆傳入指向同一檔案、
+        不同 namespace 的 SIT_SQLiteSessionStore，且各行程使用相同 secret_key
         """
         self.secret_key = secret_key.encode('utf-8')
         self.entity_id = entity_id
-        self.pending_sessions: Dict[str, Dict] = {}  # session_id -> state
-        self.established_sessions: Dict[str, SIT_Session] = {}
+        self._hmac_base = hmac.new(self.secret_key, digestmod=hashlib.sha256)
+        self.verify_cache = SIT_VerifyCache(
+            self.VERIFY_CACHE_SIZE if verify_cache_size is None else verify_cache_size
+        )
+        # session_id -> state，以 SYN ttl 到期
+        if pending_store is None:
+            pending_store = SIT_SessionTable(
+                max_size=max_pending or self.MAX_PENDING_SESSIONS
+            )
+        self.pending_sessions = pending_store
+        self.pending_sessions.bind_codec(_encode_pending, _decode_pending)
+        # session_id -> SIT_Session，以會話壽命到期
+        if established_store is None:
+            established_store = SIT_SessionTable(
+                max_size=max_established or self.MAX_ESTABLISHED_SESSIONS
+            )
+        self.established_sessions = established_store
+        self.established_sessions.bind_codec(SIT_Session.to_dict, SIT_Session.from_dict)
+        
+        # SYN cookie 金鑰由主密鑰衍生，與訊息簽名金鑰分離
+        self.syn_cookies = syn_cookies
+        self._cookie_key = hmac.new(self.secret_key, b"sit-syn-cookie", hashlib.sha256).digest()
+        self._ticket_key = hmac.new(self.secret_key, b"sit-resumption-ticket", hashlib.sha256).digest()
+        # 已簽發且未使用的票據 ID，恢復時以 pop 原子地取走（防重放），保留至票據到期
+        if ticket_store is None:
+            ticket_store = SIT_SessionTable(
+                max_size=max_established or self.MAX_ESTABLISHED_SESSIONS
+            )
+        self.tickets = ticket_store
+        # session_id -> SIT_SessionChannel，與會話同時到期（通道狀態只存在本實例）
+        self.channels = SIT_SessionTable(
+            max_size=max_established or self.MAX_ESTABLISHED_SESSIONS
+        )
+        
+        # 到期清掃
+        self._reaper_thread: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+        self._reaper_lock = threading.Lock()
+        self.reaper_runs = 0
+        self.reaper_errors = 0
+        self.reaped_count = 0
     
     # ========== 請求者端 ==========
     
@@ -240,14 +850,16 @@ class SIT_Handshake:
         )
         
         # 簽名
-        syn.signature = self._sign(syn.to_dict())
+        syn.signature = self._sign_message(syn)
         
         # 記錄待處理會話
-        self.pending_sessions[session_id] = {
+        self.pending_sessions.put(session_id, {
             "state": SIT_HandshakeState.SYN_SENT,
             "syn": syn,
             "created_at": datetime.utcnow()
-        }
+        }, ttl_seconds=syn.ttl_seconds)
+        # 對方的回覆可能落在其他行程，送出前須寫出
+        self.pending_sessions.flush()
         
         return syn
     
@@ -262,26 +874,37 @@ class SIT_Handshake:
             (SIT_ACK, None) 成功
             (None, error) 失敗
         """
+        return self._process_syn_ack(syn_ack, None)
+    
+    def _process_syn_ack(
+        self,
+        syn_ack: SIT_SYN_ACK,
+        verified: Optional[bool]
+    ) -> Tuple[Optional[SIT_ACK], Optional[SIT_HandshakeError]]:
+        """process_syn_ack 實作；verified 為批次預先驗證的結果（None 表示即時驗證）"""
         session_id = syn_ack.session_id
         
+        # 檢查超時（會話表依 SYN ttl 到期）
+        if self.pending_sessions.discard_expired(session_id):
+            return None, SIT_HandshakeError.TIMEOUT
+        
         # 檢查會話是否存在
-        if session_id not in self.pending_sessions:
+        pending = self.pending_sessions.get(session_id)
+        if pending is None:
             return None, SIT_HandshakeError.SCOPE_MISMATCH
         
-        pending = self.pending_sessions[session_id]
-        
         # 驗證 SYN-ACK 簽名
-        if not self._verify_signature(syn_ack.to_dict(), syn_ack.signature):
+        if verified is None:
+            verified = self._verify_message(syn_ack)
+        if not verified:
             return None, SIT_HandshakeError.SIGNATURE_INVALID
         
         # 驗證 SYN 簽名對應
         if syn_ack.syn_signature != pending["syn"].signature:
             return None, SIT_HandshakeError.SIGNATURE_INVALID
         
-        # 檢查超時
-        if self._is_timeout(pending["created_at"], pending["syn"].ttl_seconds):
-            self.pending_sessions.pop(session_id, None)
-            return None, SIT_HandshakeError.TIMEOUT
+        if not self._claim_pending(session_id):
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
         
         # 建立 ACK
         ack = SIT_ACK(
@@ -291,7 +914,7 @@ class SIT_Handshake:
             confirmed=True,
             semantic_mode=f"shared-{session_id[:8]}"
         )
-        ack.signature = self._sign(ack.to_dict())
+        ack.signature = self._sign_message(ack)
         
         # 建立會話
         session = SIT_Session(
@@ -307,7 +930,9 @@ class SIT_Handshake:
             semantic_mode=ack.semantic_mode,
             state=SIT_HandshakeState.ESTABLISHED,
             established_at=datetime.utcnow().isoformat() + "Z",
-            expires_at=(datetime.utcnow() + timedelta(hours=1)).isoformat() + "Z",
+            expires_at=(
+                datetime.utcnow() + timedelta(seconds=self.SESSION_LIFETIME_SECONDS)
+            ).isoformat() + "Z",
             signature_chain=[
                 pending["syn"].signature,
                 syn_ack.signature,
@@ -315,8 +940,7 @@ class SIT_Handshake:
             ]
         )
         
-        self.established_sessions[session_id] = session
-        self.pending_sessions.pop(session_id, None)
+        self._establish(session)
         
         return ack, None
     
@@ -340,14 +964,27 @@ class SIT_Handshake:
             (SIT_SYN_ACK, None) 成功
             (None, error) 失敗
         """
+        result = self._process_syn(syn, accept, modified_constraints, None)
+        self.pending_sessions.flush()
+        return result
+    
+    def _process_syn(
+        self,
+        syn: SIT_SYN,
+        accept: bool,
+        modified_constraints: Optional[Dict],
+        verified: Optional[bool]
+    ) -> Tuple[Optional[SIT_SYN_ACK], Optional[SIT_HandshakeError]]:
+        """process_syn 實作；verified 為批次預先驗證的結果（None 表示即時驗證）"""
         # 驗證簽名
-        if not self._verify_signature(syn.to_dict(), syn.signature):
+        if verified is None:
+            verified = self._verify_message(syn)
+        if not verified:
             return None, SIT_HandshakeError.SIGNATURE_INVALID
         
         # 檢查超時
         try:
-            syn_time = datetime.fromisoformat(syn.timestamp.replace('Z', '+00:00'))
-            if self._is_timeout(syn_time, syn.ttl_seconds):
+            if self._is_timeout(syn.timestamp, syn.ttl_seconds):
                 return None, SIT_HandshakeError.TIMEOUT
         except:
             pass
@@ -364,15 +1001,22 @@ class SIT_Handshake:
             constraints_accepted=syn.constraints,
             constraints_modified=modified_constraints or {}
         )
-        syn_ack.signature = self._sign(syn_ack.to_dict())
+        
+        if self.syn_cookies:
+            # 無狀態：協商結果封裝在 session_token 中，由 ACK 帶回
+            syn_ack.session_token = self._make_syn_cookie(syn, syn_ack)
+            syn_ack.signature = self._sign_message(syn_ack)
+            return syn_ack, None
+        
+        syn_ack.signature = self._sign_message(syn_ack)
         
         # 記錄待處理會話
-        self.pending_sessions[syn.session_id] = {
+        self.pending_sessions.put(syn.session_id, {
             "state": SIT_HandshakeState.SYN_RECEIVED,
             "syn": syn,
             "syn_ack": syn_ack,
             "created_at": datetime.utcnow()
-        }
+        }, ttl_seconds=syn.ttl_seconds)
         
         return syn_ack, None
     
@@ -387,15 +1031,29 @@ class SIT_Handshake:
             (SIT_Session, None) 成功
             (None, error) 失敗
         """
+        return self._process_ack(ack, None)
+    
+    def _process_ack(
+        self,
+        ack: SIT_ACK,
+        verified: Optional[bool]
+    ) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        """process_ack 實作；verified 為批次預先驗證的結果（None 表示即時驗證）"""
         session_id = ack.session_id
         
-        if session_id not in self.pending_sessions:
-            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        if self.pending_sessions.discard_expired(session_id):
+            return None, SIT_HandshakeError.TIMEOUT
         
-        pending = self.pending_sessions[session_id]
+        pending = self.pending_sessions.get(session_id)
+        if pending is None:
+            if self.syn_cookies:
+                return self._process_ack_cookie(ack, verified)
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
         
         # 驗證簽名
-        if not self._verify_signature(ack.to_dict(), ack.signature):
+        if verified is None:
+            verified = self._verify_message(ack)
+        if not verified:
             return None, SIT_HandshakeError.SIGNATURE_INVALID
         
         # 驗證 SYN-ACK 簽名對應
@@ -409,14 +1067,24 @@ class SIT_Handshake:
         if not ack.confirmed:
             return None, SIT_HandshakeError.REQUESTER_DENIED
         
-        # 建立會話
-        syn = pending["syn"]
-        syn_ack = pending["syn_ack"]
+        if not self._claim_pending(session_id):
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
         
+        syn = pending["syn"]
+        return self._complete_ack(ack, syn.requester_id, syn.signature, pending["syn_ack"]), None
+    
+    def _complete_ack(
+        self,
+        ack: SIT_ACK,
+        requester_id: str,
+        syn_signature: str,
+        syn_ack: SIT_SYN_ACK
+    ) -> SIT_Session:
+        """以已驗證的 ACK 建立接收者端會話"""
         session = SIT_Session(
-            session_id=session_id,
+            session_id=ack.session_id,
             session_token=ack.session_token,
-            requester_id=syn.requester_id,
+            requester_id=requester_id,
             responder_id=self.entity_id,
             agreed_scope=syn_ack.accepted_scope,
             agreed_constraints={
@@ -426,61 +1094,746 @@ class SIT_Handshake:
             semantic_mode=ack.semantic_mode,
             state=SIT_HandshakeState.ESTABLISHED,
             established_at=datetime.utcnow().isoformat() + "Z",
-            expires_at=(datetime.utcnow() + timedelta(hours=1)).isoformat() + "Z",
+            expires_at=(
+                datetime.utcnow() + timedelta(seconds=self.SESSION_LIFETIME_SECONDS)
+            ).isoformat() + "Z",
             signature_chain=[
-                syn.signature,
+                syn_signature,
                 syn_ack.signature,
                 ack.signature
             ]
         )
+        session.resumption_ticket = self.issue_ticket(session)
+        
+        self._establish(session)
+        
+        return session
+    
+    # ========== SYN cookie ==========
+    
+    def _make_syn_cookie(self, syn: SIT_SYN, syn_ack: SIT_SYN_ACK) -> str:
+        """將協商狀態封裝為 HMAC 密封、按時間分桶的 session_token"""
+        return _seal_token(self._cookie_key, {
+            "sid": syn.session_id,
+            "rq": syn.requester_id,
+            "ss": syn.signature,
+            "sc": syn_ack.accepted_scope,
+            "ca": syn_ack.constraints_accepted,
+            "cm": syn_ack.constraints_modified,
+            "ts": syn_ack.timestamp,
+            "ttl": syn.ttl_seconds,
+            "b": int(time.time() // self.SYN_COOKIE_BUCKET_SECONDS),
+        })
+    
+    def _open_syn_cookie(self, token: str) -> Tuple[Optional[Dict], Optional[SIT_HandshakeError]]:
+        """驗證並解開 SYN cookie"""
+        state, error = _open_token(self._cookie_key, token)
+        if error:
+            return None, error
+        
+        # 時間分桶檢查：cookie 的有效桶數涵蓋 SYN ttl
+        age_buckets = int(time.time() // self.SYN_COOKIE_BUCKET_SECONDS) - state["b"]
+        max_buckets = math.ceil(state["ttl"] / self.SYN_COOKIE_BUCKET_SECONDS)
+        if age_buckets < 0 or age_buckets > max_buckets:
+            return None, SIT_HandshakeError.TIMEOUT
+        
+        return state, None
+    
+    def _process_ack_cookie(
+        self,
+        ack: SIT_ACK,
+        verified: Optional[bool] = None
+    ) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        """SYN cookie 模式：僅由 ACK 重建並驗證握手狀態"""
+        if verified is None:
+            verified = self._verify_message(ack)
+        if not verified:
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        state, error = self._open_syn_cookie(ack.session_token)
+        if error:
+            return None, error
+        if state["sid"] != ack.session_id:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        # 重建 SYN-ACK 並重新計算其簽名，須與 ACK 引用的一致
+        syn_ack = SIT_SYN_ACK(
+            session_id=state["sid"],
+            syn_signature=state["ss"],
+            responder_id=self.entity_id,
+            accepted_scope=state["sc"],
+            constraints_accepted=state["ca"],
+            constraints_modified=state["cm"],
+            session_token=ack.session_token,
+            timestamp=state["ts"]
+        )
+        syn_ack.signature = self._sign_message(syn_ack)
+        if not hmac.compare_digest(syn_ack.signature, ack.syn_ack_signature or ""):
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        if not ack.confirmed:
+            return None, SIT_HandshakeError.REQUESTER_DENIED
+        
+        # cookie 可在有效期內重放，已建立的會話不重複建立
+        if self.established_sessions.get(ack.session_id) is not None:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        return self._complete_ack(ack, state["rq"], state["ss"], syn_ack), None
+    
+    def _claim_pending(self, session_id: str) -> bool:
+        """
+        原子地取走待處理握手，回傳是否由本次呼叫取得
+        
+        共享 store 時同一封包可能同時落在多個行程，只有 pop 成功者能建立會話
+        """
+        return self.pending_sessions.pop(session_id, None) is not None
+    
+    def _establish(self, session: SIT_Session):
+        """將會話移入已建立會話表（呼叫端須先以 _claim_pending 取走待處理狀態）"""
+        self.established_sessions.put(
+            session.session_id, session,
+            ttl_seconds=self.SESSION_LIFETIME_SECONDS
+        )
+        # 恢復後簽名鏈改變，舊通道的金鑰與序號作廢
+        self.channels.pop(session.session_id, None)
+    
+    # ========== 批次處理 ==========
+    
+    def create_syn_batch(
+        self,
+        requests: List[Dict],
+        executor: Optional[Executor] = None
+    ) -> List[SIT_SYN]:
+        """
+        批次建立 SIT-SYN（請求者調用）
+        
+        Args:
+            requests: 每項為 create_syn 的關鍵字參數
+                      {"intent_scope", "semantic_boundary", "constraints"}
+            executor: 執行正規化與簽名的 worker pool（預設在呼叫端執行緒處理，見 _run_chunks）
+        
+        Returns:
+            與 requests 對應的 SIT_SYN 列表
+        """
+        syns = [
+            SIT_SYN(
+                session_id=str(uuid.uuid4()),
+                requester_id=self.entity_id,
+                intent_scope=request["intent_scope"],
+                semantic_boundary=request.get("semantic_boundary", {}),
+                constraints=request.get("constraints") or {}
+            )
+            for request in requests
+        ]
+        
+        signatures = self._run_chunks(_sign_chunk, syns, executor)
+        for syn, signature in zip(syns, signatures):
+            syn.signature = signature
+            self.pending_sessions.put(syn.session_id, {
+                "state": SIT_HandshakeState.SYN_SENT,
+                "syn": syn,
+                "created_at": datetime.utcnow()
+            }, ttl_seconds=syn.ttl_seconds)
+        self.pending_sessions.flush()
+        
+        return syns
+    
+    def process_syn_batch(
+        self,
+        syns: List[SIT_SYN],
+        accept: bool = True,
+        modified_constraints: Optional[Dict] = None,
+        executor: Optional[Executor] = None
+    ) -> List[Tuple[Optional[SIT_SYN_ACK], Optional[SIT_HandshakeError]]]:
+        """批次處理 SIT-SYN（接收者調用），回傳逐項 (SIT_SYN_ACK, error)"""
+        verified = self._verify_batch(syns, executor)
+        results = [
+            self._process_syn(syn, accept, modified_constraints, ok)
+            for syn, ok in zip(syns, verified)
+        ]
+        # 整批只寫出一次
+        self.pending_sessions.flush()
+        return results
+    
+    def process_syn_ack_batch(
+        self,
+        syn_acks: List[SIT_SYN_ACK],
+        executor: Optional[Executor] = None
+    ) -> List[Tuple[Optional[SIT_ACK], Optional[SIT_HandshakeError]]]:
+        """批次處理 SIT-SYN-ACK（請求者調用），回傳逐項 (SIT_ACK, error)"""
+        verified = self._verify_batch(syn_acks, executor)
+        return [
+            self._process_syn_ack(syn_ack, ok)
+            for syn_ack, ok in zip(syn_acks, verified)
+        ]
+    
+    def process_ack_batch(
+        self,
+        acks: List[SIT_ACK],
+        executor: Optional[Executor] = None
+    ) -> List[Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]]:
+        """批次處理 SIT-ACK（接收者調用），回傳逐項 (SIT_Session, error)"""
+        verified = self._verify_batch(acks, executor)
+        return [
+            self._process_ack(ack, ok)
+            for ack, ok in zip(acks, verified)
+        ]
+    
+    def _verify_batch(self, messages: List[Any], executor: Optional[Executor]) -> List[bool]:
+        """
+        驗證一批訊息的簽名
+        
+        先正規化並查驗證快取（重傳的訊息直接命中），只有未命中者的 HMAC
+        送入 worker pool；狀態變更仍在呼叫端依序進行
+        """
+        payloads = [_canonical_message(message) for message in messages]
+        verified = [
+            bool(message.signature) and self.verify_cache.contains(payload_str, message.signature)
+            for message, payload_str in zip(messages, payloads)
+        ]
+        misses = [index for index, ok in enumerate(verified) if not ok]
+        results = self._run_chunks(
+            _verify_chunk,
+            [(payloads[index], messages[index].signature) for index in misses],
+            executor
+        )
+        for index, ok in zip(misses, results):
+            if ok:
+                self.verify_cache.add(payloads[index], messages[index].signature)
+            verified[index] = ok
+        return verified
+    
+    def _run_chunks(
+        self,
+        func: Callable[[bytes, List[Any]], List[Any]],
+        items: List[Any],
+        executor: Optional[Executor]
+    ) -> List[Any]:
+        """
+        將 items 切成 BATCH_WORKERS 個區塊送入 executor，保持原順序合併結果
         
-        self.established_sessions[session_id] = session
-        self.pending_sessions.pop(session_id, None)
+        未指定 executor 時在呼叫端執行緒直接處理：短訊息的 HMAC 與 JSON 編碼
+        不釋放 GIL，執行緒池只會增加排程成本。要在多核心上平行，
+        傳入 ProcessPoolExecutor（worker 皆為模組層級函數，可序列化）
+        """
+        if not items:
+            return []
+        if executor is None:
+            return func(self.secret_key, items)
+        
+        chunk_size = max(1, math.ceil(len(items) / self.BATCH_WORKERS))
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        futures = [executor.submit(func, self.secret_key, chunk) for chunk in chunks]
         
+        results: List[Any] = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    
+    def close(self):
+        """停止背景清掃（批次處理的 executor 由呼叫端擁有並關閉）"""
+        self.stop_reaper()
+    
+    # ========== 會話恢復 ==========
+    
+    def issue_ticket(self, session: SIT_Session) -> str:
+        """
+        簽發恢復票據（接收者調用）
+        
+        票據以 HMAC 密封，綁定 agreed_scope、agreed_constraints 與到期時間；
+        內容對請求者可見（皆為其已知的協商結果），但無法偽造。
+        票據 ID 記錄於 tickets，使用一次即移除
+        """
+        ticket_id = uuid.uuid4().hex
+        self.tickets.put(ticket_id, True, ttl_seconds=self.TICKET_LIFETIME_SECONDS)
+        return _seal_token(self._ticket_key, {
+            "tid": ticket_id,
+            "rq": session.requester_id,
+            "rs": session.responder_id,
+            "sc": session.agreed_scope,
+            "c": session.agreed_constraints,
+            "exp": int(time.time()) + self.TICKET_LIFETIME_SECONDS,
+        })
+    
+    def create_new_ticket(self, session_id: str) -> Optional[SIT_NEW_TICKET]:
+        """
+        建立 SIT-NEW-TICKET 封包，將會話的恢復票據交給請求者（接收者調用）
+        
+        於 process_ack 成功後送出；會話不存在或沒有票據時回傳 None
+        """
+        session = self.established_sessions.get(session_id)
+        if session is None or not session.resumption_ticket:
+            return None
+        
+        new_ticket = SIT_NEW_TICKET(
+            session_id=session_id,
+            responder_id=self.entity_id,
+            ack_signature=session.signature_chain[-1],
+            ticket=session.resumption_ticket
+        )
+        new_ticket.signature = self._sign_message(new_ticket)
+        # 恢復請求可能落在其他行程，交付前須寫出
+        self.tickets.flush()
+        return new_ticket
+    
+    def process_new_ticket(
+        self,
+        new_ticket: SIT_NEW_TICKET
+    ) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        """
+        處理 SIT-NEW-TICKET 並保存恢復票據（請求者調用）
+        
+        Returns:
+            (SIT_Session, None) 成功，session.resumption_ticket 即可用於 create_resume
+            (None, error) 失敗
+        """
+        session = self.established_sessions.get(new_ticket.session_id)
+        if session is None or new_ticket.responder_id != session.responder_id:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        if not self._verify_message(new_ticket):
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        if new_ticket.ack_signature != session.signature_chain[-1]:
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        remaining = self.established_sessions.remaining(session.session_id)
+        if remaining is None:
+            return None, SIT_HandshakeError.TIMEOUT
+        
+        session.resumption_ticket = new_ticket.ticket
+        self.established_sessions.put(session.session_id, session, ttl_seconds=remaining)
         return session, None
     
+    def create_resume(self, ticket: str) -> SIT_RESUME:
+        """
+        以恢復票據建立 SIT-RESUME 封包（請求者調用）
+        
+        Args:
+            ticket: 先前會話取得的恢復票據
+        
+        Returns:
+            SIT_RESUME 封包
+        """
+        resume = SIT_RESUME(
+            session_id=str(uuid.uuid4()),
+            requester_id=self.entity_id,
+            ticket=ticket
+        )
+        resume.signature = self._sign_message(resume)
+        
+        self.pending_sessions.put(resume.session_id, {
+            "state": SIT_HandshakeState.SYN_SENT,
+            "resume": resume,
+            "created_at": datetime.utcnow()
+        }, ttl_seconds=self.RESUME_TIMEOUT_SECONDS)
+        self.pending_sessions.flush()
+        
+        return resume
+    
+    def process_resume(self, resume: SIT_RESUME) -> Tuple[Optional[SIT_RESUME_ACK], Optional[SIT_HandshakeError]]:
+        """
+        驗證恢復票據並直接建立會話（接收者調用）
+        
+        Args:
+            resume: 收到的 RESUME 封包
+        
+        Returns:
+            (SIT_RESUME_ACK, None) 成功，會話已建立
+            (None, error) 失敗
+        """
+        if not self._verify_message(resume):
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        ticket, error = _open_token(self._ticket_key, resume.ticket)
+        if error:
+            return None, error
+        
+        remaining = ticket["exp"] - time.time()
+        if remaining <= 0:
+            return None, SIT_HandshakeError.TIMEOUT
+        if ticket["rq"] != resume.requester_id or ticket["rs"] != self.entity_id:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        # 票據僅能使用一次：取走票據 ID 者才能恢復（共享 store 時跨行程亦然）
+        if self.tickets.pop(ticket["tid"], None) is None:
+            return None, SIT_HandshakeError.REPLAY_DETECTED
+        
+        session = SIT_Session(
+            session_id=resume.session_id,
+            session_token=str(uuid.uuid4()),
+            requester_id=resume.requester_id,
+            responder_id=self.entity_id,
+            agreed_scope=ticket["sc"],
+            agreed_constraints=ticket["c"],
+            semantic_mode=f"shared-{resume.session_id[:8]}",
+            state=SIT_HandshakeState.ESTABLISHED,
+            established_at=datetime.utcnow().isoformat() + "Z",
+            expires_at=(
+                datetime.utcnow() + timedelta(seconds=self.SESSION_LIFETIME_SECONDS)
+            ).isoformat() + "Z"
+        )
+        session.resumption_ticket = self.issue_ticket(session)
+        
+        resume_ack = SIT_RESUME_ACK(
+            session_id=session.session_id,
+            resume_signature=resume.signature,
+            responder_id=self.entity_id,
+            session_token=session.session_token,
+            semantic_mode=session.semantic_mode,
+            new_ticket=session.resumption_ticket
+        )
+        resume_ack.signature = self._sign_message(resume_ack)
+        session.signature_chain = [resume.signature, resume_ack.signature]
+        
+        self._establish(session)
+        self.tickets.flush()
+        
+        return resume_ack, None
+    
+    def process_resume_ack(
+        self,
+        resume_ack: SIT_RESUME_ACK
+    ) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        """
+        處理 SIT-RESUME-ACK 並建立會話（請求者調用）
+        
+        Args:
+            resume_ack: 收到的 RESUME-ACK 封包
+        
+        Returns:
+            (SIT_Session, None) 成功
+            (None, error) 失敗
+        """
+        session_id = resume_ack.session_id
+        
+        if self.pending_sessions.discard_expired(session_id):
+            return None, SIT_HandshakeError.TIMEOUT
+        
+        pending = self.pending_sessions.get(session_id)
+        if pending is None or "resume" not in pending:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        if not self._verify_message(resume_ack):
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        resume = pending["resume"]
+        if resume_ack.resume_signature != resume.signature:
+            return None, SIT_HandshakeError.SIGNATURE_INVALID
+        
+        ticket = _peek_token(resume.ticket)
+        if ticket is None:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        if not self._claim_pending(session_id):
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        session = SIT_Session(
+            session_id=session_id,
+            session_token=resume_ack.session_token,
+            requester_id=self.entity_id,
+            responder_id=resume_ack.responder_id,
+            agreed_scope=ticket["sc"],
+            agreed_constraints=ticket["c"],
+            semantic_mode=resume_ack.semantic_mode,
+            state=SIT_HandshakeState.ESTABLISHED,
+            established_at=datetime.utcnow().isoformat() + "Z",
+            expires_at=(
+                datetime.utcnow() + timedelta(seconds=self.SESSION_LIFETIME_SECONDS)
+            ).isoformat() + "Z",
+            signature_chain=[resume.signature, resume_ack.signature],
+            resumption_ticket=resume_ack.new_ticket
+        )
+        
+        self._establish(session)
+        
+        return session, None
+    
+    # ========== 會話內訊息認證 ==========
+    
+    def seal(
+        self,
+        session_id: str,
+        payload: bytes
+    ) -> Tuple[Optional[bytes], Optional[SIT_HandshakeError]]:
+        """
+        以會話金鑰認證一則訊息（不加密）
+        
+        Args:
+            session_id: 已建立的會話 ID
+            payload: 原始位元組
+        
+        Returns:
+            (sealed, None) 成功
+            (None, error) 失敗
+        """
+        channel, error = self._channel(session_id)
+        if error:
+            return None, error
+        return channel.seal(payload), None
+    
+    def open(
+        self,
+        session_id: str,
+        sealed: bytes
+    ) -> Tuple[Optional[bytes], Optional[SIT_HandshakeError]]:
+        """
+        驗證對端以 seal 認證的訊息並取回 payload
+        
+        Returns:
+            (payload, None) 成功
+            (None, SIGNATURE_INVALID) MAC 不符或格式錯誤
+            (None, REPLAY_DETECTED) 序號重複或落在重放視窗之外
+        """
+        channel, error = self._channel(session_id)
+        if error:
+            return None, error
+        return channel.open(sealed)
+    
+    def _channel(
+        self,
+        session_id: str
+    ) -> Tuple[Optional[SIT_SessionChannel], Optional[SIT_HandshakeError]]:
+        """取得會話通道；首次使用時由會話衍生金鑰"""
+        channel = self.channels.get(session_id)
+        if channel is not None:
+            return channel, None
+        
+        if self.established_sessions.discard_expired(session_id):
+            return None, SIT_HandshakeError.TIMEOUT
+        session = self.established_sessions.get(session_id)
+        if session is None:
+            return None, SIT_HandshakeError.SCOPE_MISMATCH
+        
+        remaining = self.established_sessions.remaining(session_id)
+        if remaining is None:
+            return None, SIT_HandshakeError.TIMEOUT
+        
+        channel = self._derive_channel(session)
+        self.channels.put(session_id, channel, ttl_seconds=remaining)
+        return channel, None
+    
+    def _derive_channel(self, session: SIT_Session) -> SIT_SessionChannel:
+        """
+        由主密鑰與簽名鏈衍生會話金鑰，再依方向衍生收發金鑰
+        
+        簽名鏈在雙方相同，主密鑰確保旁觀者即使看過整個握手也無法推得金鑰
+        """
+        material = "\n".join([session.session_id] + list(session.signature_chain)).encode('utf-8')
+        session_key = hmac.new(self.secret_key, b"sit-session-key\n" + material, hashlib.sha256).digest()
+        to_responder = hmac.new(session_key, b"requester->responder", hashlib.sha256).digest()
+        to_requester = hmac.new(session_key, b"responder->requester", hashlib.sha256).digest()
+        if session.requester_id == self.entity_id:
+            return SIT_SessionChannel(send_key=to_responder, recv_key=to_requester)
+        return SIT_SessionChannel(send_key=to_requester, recv_key=to_responder)
+    
     # ========== 工具方法 ==========
     
+    def _canonical(self, data: Dict) -> str:
+        """簽名用的正規化 JSON（不含簽名欄位）"""
+        return _canonical_payload(data)
+    
     def _sign(self, data: Dict) -> str:
         """計算 HMAC 簽名"""
-        # 移除簽名欄位
-        data_copy = {k: v for k, v in data.items() if k != 'signature'}
-        # 使用 JSON 序列化以確保一致的格式 - 添加緩存以優化重複計算
-        return self._sign_cached(json.dumps(data_copy, sort_keys=True, ensure_ascii=False))
-
-    @lru_cache(maxsize=512)
-    def _sign_cached(self, payload_str: str) -> str:
-        """計算 HMAC 簽名（緩存版本）"""
-        payload = payload_str.encode('utf-8')
-        return hmac.new(self.secret_key, payload, hashlib.sha256).hexdigest()
+        return self._hmac(self._canonical(data))
+    
+    def _sign_message(self, message: Any) -> str:
+        """計算訊息的 HMAC 簽名（走專用正規化編碼器）"""
+        return self._hmac(_canonical_message(message))
+    
+    def _hmac(self, payload_str: str) -> str:
+        # 複製預先載入金鑰的 HMAC 物件，省去每次的金鑰填充計算
+        mac = self._hmac_base.copy()
+        mac.update(payload_str.encode('utf-8'))
+        return mac.hexdigest()
     
     def _verify_signature(self, data: Dict, signature: str) -> bool:
         """驗證簽名"""
-        expected = self._sign(data)
-        return hmac.compare_digest(expected, signature or "")
+        return self._verify_payload(self._canonical(data), signature)
+    
+    def _verify_message(self, message: Any) -> bool:
+        """驗證訊息簽名（走專用正規化編碼器）"""
+        return self._verify_payload(_canonical_message(message), message.signature)
     
-    def _is_timeout(self, start_time: datetime, ttl_seconds: int) -> bool:
-        """檢查是否超時"""
-        if isinstance(start_time, str):
-            start_time = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-        elapsed = (datetime.utcnow() - start_time.replace(tzinfo=None)).total_seconds()
-        return elapsed > ttl_seconds
+    def _verify_payload(self, payload_str: str, signature: Optional[str]) -> bool:
+        """驗證正規化內容的簽名（重傳的有效訊息由驗證快取直接命中）"""
+        if not signature:
+            return False
+        if self.verify_cache.contains(payload_str, signature):
+            return True
+        if not hmac.compare_digest(self._hmac(payload_str), signature):
+            return False
+        self.verify_cache.add(payload_str, signature)
+        return True
+    
+    def _is_timeout(self, start_time: Any, ttl_seconds: int) -> bool:
+        """
+        檢查對端時間戳是否超時
+        
+        只用於對端帶來的時間戳（跨主機只能比較牆上時鐘）；
+        本地的待處理握手與會話到期一律由會話表的單調時鐘追蹤
+        """
+        return time.time() - _timestamp_epoch(start_time) > ttl_seconds
     
     def get_session(self, session_id: str) -> Optional[SIT_Session]:
         """取得已建立的會話"""
         return self.established_sessions.get(session_id)
     
     def is_session_valid(self, session_id: str) -> bool:
-        """檢查會話是否有效"""
-        session = self.established_sessions.get(session_id)
-        if not session:
-            return False
+        """檢查會話是否有效（到期時間以單調時鐘記錄於會話表）"""
+        return self.established_sessions.get(session_id) is not None
+    
+    # ========== 到期清掃 ==========
+    
+    def expire_due(self) -> int:
+        """
+        清掃已到期的待處理握手、會話、會話通道與未使用票據
         
-        try:
-            expires = datetime.fromisoformat(session.expires_at.replace('Z', '+00:00'))
-            return datetime.utcnow() < expires.replace(tzinfo=None)
-        except:
-            return False
+        行程內會話表以單調時鐘最小堆索引到期時間，沒有到期項目時只看堆頂，
+        可在請求迴圈中頻繁呼叫
+        
+        Returns:
+            移除的項目數
+        """
+        removed = (
+            self.pending_sessions.sweep()
+            + self.established_sessions.sweep()
+            + self.channels.sweep()
+            + self.tickets.sweep()
+        )
+        with self._reaper_lock:
+            self.reaper_runs += 1
+            self.reaped_count += removed
+        return removed
+    
+    sweep_expired = expire_due
+    
+    def start_reaper(self, interval: Optional[float] = None) -> threading.Thread:
+        """
+        啟動背景清掃執行緒（daemon），每 interval 秒呼叫一次 expire_due
+        
+        已在執行時直接回傳現有執行緒；以 stop_reaper 或 close 停止
+        """
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return self._reaper_thread
+        
+        interval = self.REAPER_INTERVAL_SECONDS if interval is None else interval
+        stop = threading.Event()
+        
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.expire_due()
+                except Exception:
+                    # 共享儲存暫時不可用（如 SQLite 鎖定）時下一輪再試
+                    with self._reaper_lock:
+                        self.reaper_errors += 1
+        
+        self._reaper_stop = stop
+        self._reaper_thread = threading.Thread(
+            target=run, name=f"sit-reaper-{self.entity_id}", daemon=True
+        )
+        self._reaper_thread.start()
+        return self._reaper_thread
+    
+    def stop_reaper(self):
+        """停止背景清掃執行緒"""
+        if self._reaper_thread is None:
+            return
+        self._reaper_stop.set()
+        self._reaper_thread.join()
+        self._reaper_thread = None
+    
+    async def run_reaper(self, interval: Optional[float] = None):
+        """
+        asyncio 版清掃迴圈，取消任務即停止:
+        
+            task = asyncio.create_task(handshake.run_reaper())
+        
+        在事件迴圈執行緒內清掃，不與處理握手的協程競爭；
+        使用 SQLite 儲存時清掃會阻塞迴圈，宜改用 start_reaper
+        """
+        interval = self.REAPER_INTERVAL_SECONDS if interval is None else interval
+        while True:
+            await asyncio.sleep(interval)
+            self.expire_due()
+    
+    def get_memory_stats(self) -> Dict:
+        """取得會話表統計（含各表合計的過期 / 淘汰數）"""
+        tables = {
+            "pending": self.pending_sessions.stats(),
+            "established": self.established_sessions.stats(),
+            "tickets": self.tickets.stats(),
+            "channels": self.channels.stats(),
+        }
+        return {
+            **tables,
+            "verify_cache": self.verify_cache.stats(),
+            "expired": sum(table["expired"] for table in tables.values()),
+            "evicted": sum(table["evicted"] for table in tables.values()),
+            "reaper": {
+                "running": self._reaper_thread is not None and self._reaper_thread.is_alive(),
+                "runs": self.reaper_runs,
+                "reaped": self.reaped_count,
+                "errors": self.reaper_errors,
+            },
+        }
+
+
+# ========== 並行握手 ==========
+
+async def establish_sessions_async(
+    requester: SIT_Handshake,
+    requests: List[Dict],
+    send_syn: Callable[[SIT_SYN], Awaitable[Tuple[Optional[SIT_SYN_ACK], Optional[SIT_HandshakeError]]]],
+    send_ack: Callable[[SIT_ACK], Awaitable[Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]]],
+    concurrency: int = 64,
+    timeout: Optional[float] = None
+) -> List[Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]]:
+    """
+    以 asyncio 並行驅動多個三次握手（請求者端）
+    
+    Args:
+        requester: 請求者的握手管理器
+        requests: 每項為 create_syn 的關鍵字參數
+        send_syn: 傳送 SYN 並等待對端回覆的協程，回傳值同 process_syn
+        send_ack: 傳送 ACK 並等待對端確認的協程，回傳值同 process_ack
+        concurrency: 同時進行的握手上限
+        timeout: 單一握手的逾時秒數
+    
+    Returns:
+        與 requests 對應的 (請求者端 SIT_Session, error) 列表
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def handshake(request: Dict) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        syn = requester.create_syn(
+            intent_scope=request["intent_scope"],
+            semantic_boundary=request.get("semantic_boundary", {}),
+            constraints=request.get("constraints")
+        )
+        syn_ack, error = await send_syn(syn)
+        if error:
+            return None, error
+        
+        ack, error = requester.process_syn_ack(syn_ack)
+        if error:
+            return None, error
+        
+        _, error = await send_ack(ack)
+        if error:
+            requester.established_sessions.pop(syn.session_id, None)
+            return None, error
+        
+        return requester.get_session(syn.session_id), None
+    
+    async def bounded(request: Dict) -> Tuple[Optional[SIT_Session], Optional[SIT_HandshakeError]]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(handshake(request), timeout)
+            except asyncio.TimeoutError:
+                return None, SIT_HandshakeError.TIMEOUT
+    
+    return list(await asyncio.gather(*(bounded(request) for request in requests)))
 
 
 # ========== 測試 ==========
@@ -0,0 +1,577 @@
+"""
+SIT Session Store — SIT 會話表
+
+USCA 協議棧位置: L3 (Transport Layer)
+類比: TCP 連線表 (conntrack)，但追蹤的是「語義會話」
+
+功能:
+- 以單調時鐘 (time.monotonic) 記錄到期時間，避免重複解析 ISO 字串
+- 最小堆到期索引，O(log n) 清掃過期項目
+- 容量上限與淘汰（優先淘汰最早到期者）
+- 記憶體統計（過期 / 淘汰計數）
+- 執行緒安全，可由背景清掃執行緒並行清掃
+- 可插拔儲存介面：行程內記憶體表 / 跨行程 SQLite (WAL) 共享表
+
+實作: Claude (尾德)
+日期: 2026-01-11
+版本: 1.0.0
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import sqlite3
+import itertools
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class SIT_SessionStore:
+    """
+    會話儲存介面
+
+    SIT_Handshake 透過此介面存取 pending / established 會話；
+    值可以是任意物件，需要序列化的後端透過 bind_codec 取得編解碼函數
+    """
+
+    def put(self, key: str, value: Any, ttl_seconds: float):
+        """寫入項目，ttl_seconds 秒後到期"""
+        raise NotImplementedError
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """取得未過期的項目"""
+        raise NotImplementedError
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """移除並回傳項目"""
+        raise NotImplementedError
+
+    def discard_expired(self, key: str) -> bool:
+        """若項目存在但已過期則移除，回傳是否移除"""
+        raise NotImplementedError
+
+    def remaining(self, key: str) -> Optional[float]:
+        """項目剩餘存活秒數；不存在或已過期回傳 None"""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """清掃所有已過期項目，回傳移除數量"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """取得統計"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def bind_codec(self, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        """
+        綁定值的編解碼函數（encode 需回傳可 JSON 序列化的物件）
+
+        行程內後端直接保存物件，預設忽略
+        """
+
+    def flush(self):
+        """寫出緩衝中的變更（無緩衝的後端為 no-op）"""
+
+
+class SIT_SessionTable(SIT_SessionStore):
+    """
+    有界會話表（行程內記憶體後端）
+
+    每個項目帶有單調時鐘到期時間；到期索引為最小堆，
+    採延遲刪除（pop/覆寫時不修改堆，清掃時跳過失效項）
+
+    所有操作以鎖保護，背景清掃執行緒可與處理請求的執行緒並行
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化會話表
+
+        Args:
+            max_size: 最大項目數，超過時淘汰最早到期的項目
+            clock: 時鐘函數（測試時可注入）
+        """
+        self.max_size = max_size
+        self.clock = clock
+
+        # key -> (deadline, seq, value)
+        self._entries: Dict[str, Tuple[float, int, Any]] = {}
+        # (deadline, seq, key)
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+
+        # 計數器
+        self.expired_count = 0
+        self.evicted_count = 0
+
+    # ========== 基本操作 ==========
+
+    def put(self, key: str, value: Any, ttl_seconds: float):
+        """
+        寫入項目
+
+        Args:
+            key: 會話 ID
+            value: 任意值
+            ttl_seconds: 存活秒數
+        """
+        deadline = self.clock() + ttl_seconds
+
+        with self._lock:
+            seq = next(self._seq)
+            if key not in self._entries:
+                self.sweep()
+                while len(self._entries) >= self.max_size and self._evict_one():
+                    pass
+
+            self._entries[key] = (deadline, seq, value)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            self._maybe_compact()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """取得未過期的項目；過期項目會被移除"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] > self.clock():
+            return entry[2]
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+                self.expired_count += 1
+        return default
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """移除並回傳項目（不論是否過期）"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        return entry[2]
+
+    def discard_expired(self, key: str) -> bool:
+        """若項目存在但已過期則移除，回傳是否移除（用於區分「超時」與「不存在」）"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] > self.clock():
+            return False
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return False
+            del self._entries[key]
+            self.expired_count += 1
+        return True
+
+    def remaining(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - self.clock()
+        return remaining if remaining > 0 else None
+
+    def deadline(self, key: str) -> Optional[float]:
+        """取得項目的單調時鐘到期時間"""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def values(self) -> List[Any]:
+        """所有未過期的值"""
+        now = self.clock()
+        return [entry[2] for entry in self._entries.values() if entry[0] > now]
+
+    def clear(self):
+        """清空"""
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+
+    # ========== 到期清掃 ==========
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        清掃所有已過期項目
+
+        Returns:
+            移除的項目數
+        """
+        if now is None:
+            now = self.clock()
+
+        removed = 0
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                deadline, seq, key = heapq.heappop(heap)
+                entry = self._entries.get(key)
+                # 延遲刪除：僅當堆項目仍對應現行項目時才移除
+                if entry is not None and entry[1] == seq:
+                    del self._entries[key]
+                    removed += 1
+
+            self.expired_count += removed
+        return removed
+
+    def _evict_one(self) -> bool:
+        """淘汰最早到期的現行項目"""
+        heap = self._heap
+        while heap:
+            deadline, seq, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == seq:
+                del self._entries[key]
+                self.evicted_count += 1
+                return True
+        return False
+
+    def _maybe_compact(self):
+        """失效堆項目過多時重建堆，避免頻繁覆寫造成堆膨脹"""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [
+                (deadline, seq, key)
+                for key, (deadline, seq, _) in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    # ========== 統計 ==========
+
+    def stats(self) -> Dict:
+        """取得會話表統計（記憶體為容器本身的近似值，不含值物件內容）"""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "heap_size": len(self._heap),
+            "expired": self.expired_count,
+            "evicted": self.evicted_count,
+            "approx_bytes": sys.getsizeof(self._entries) + sys.getsizeof(self._heap)
+                + len(self._heap) * _HEAP_ITEM_BYTES,
+        }
+
+
+class SIT_SQLiteSessionStore(SIT_SessionStore):
+    """
+    跨行程共享會話表（SQLite WAL 後端）
+
+    讓同一埠後方的多個 responder 行程共享握手狀態：
+    SYN 落在 worker A、ACK 落在 worker B 時仍能完成握手。
+
+    - 到期時間使用牆上時鐘 (time.time)，因為單調時鐘無法跨行程比較
+    - 寫入可批次緩衝（batch_size > 1），本行程讀取時會先看緩衝（read-your-writes）；
+      緩衝中的寫入在 flush 前對其他行程不可見，SIT_Handshake 在送出
+      需要對方回覆的封包前會 flush 待處理握手表（批次 API 每批一次）
+    - 讀取可快取 cache_ttl 秒；其他行程的變更最多延遲 cache_ttl 後可見
+    - pop 一律立即寫入且以交易保證原子性，確保同一握手只會被消費一次
+    - fork 之後自動重新連線
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "sessions",
+        max_size: int = 100000,
+        batch_size: int = 1,
+        flush_interval: float = 0.05,
+        cache_ttl: float = 0.0,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        初始化 SQLite 會話表
+
+        Args:
+            path: 資料庫檔案路徑（多個行程指向同一檔案）
+            namespace: 命名空間（同一檔案可存放 pending / established 等多個表）
+            max_size: 最大項目數，超過時淘汰最早到期者
+            batch_size: 寫入緩衝筆數，1 表示每次 put 立即寫入
+            flush_interval: 緩衝最長保留秒數
+            cache_ttl: 讀取快取秒數，0 表示不快取
+            clock: 牆上時鐘函數
+        """
+        self.path = path
+        self.namespace = namespace
+        self.max_size = max_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self.clock = clock
+
+        self._encode: Callable[[Any], Any] = lambda value: value
+        self._decode: Callable[[Any], Any] = lambda value: value
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+        # key -> (value_json, deadline)，僅緩衝 put；pop 一律立即寫入
+        self._write_buffer: Dict[str, Tuple[str, float]] = {}
+        self._last_flush = self.clock()
+        # key -> (value, deadline, cached_at)
+        self._read_cache: Dict[str, Tuple[Any, float, float]] = {}
+
+        # 計數器
+        self.expired_count = 0
+        self.evicted_count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.flush_count = 0
+
+    def bind_codec(self, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        self._encode = encode
+        self._decode = decode
+
+    # ========== 連線 ==========
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得本行程的連線（fork 後重新連線）"""
+        pid = os.getpid()
+        if self._conn is None or self._pid != pid:
+            conn = sqlite3.connect(
+                self.path, timeout=10.0,
+                isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sit_sessions ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " deadline REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS sit_sessions_deadline"
+                " ON sit_sessions (namespace, deadline)"
+            )
+            self._conn = conn
+            self._pid = pid
+            self._write_buffer.clear()
+            self._read_cache.clear()
+        return self._conn
+
+    def close(self):
+        """寫出緩衝並關閉連線"""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self.flush()
+                self._conn.close()
+            self._conn = None
+
+    # ========== 基本操作 ==========
+
+    def put(self, key: str, value: Any, ttl_seconds: float):
+        now = self.clock()
+        deadline = now + ttl_seconds
+        value_json = json.dumps(self._encode(value), ensure_ascii=False)
+
+        with self._lock:
+            # 緩衝中的寫入需要快取以支援 read-your-writes
+            if self.cache_ttl > 0 or self.batch_size > 1:
+                if len(self._read_cache) >= self.max_size:
+                    self._read_cache.clear()
+                self._read_cache[key] = (value, deadline, now)
+            self._write_buffer[key] = (value_json, deadline)
+            if (len(self._write_buffer) >= self.batch_size
+                    or now - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            buffered = self._write_buffer.get(key)
+            cached = self._read_cache.get(key)
+            if cached is not None and (buffered is not None or now - cached[2] < self.cache_ttl):
+                self.cache_hits += 1
+                return cached[0] if cached[1] > now else default
+            self.cache_misses += 1
+
+            row = self._connection().execute(
+                "SELECT value, deadline FROM sit_sessions WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                self._read_cache.pop(key, None)
+                return default
+            if row[1] <= now:
+                return default
+
+            value = self._decode(json.loads(row[0]))
+            if self.cache_ttl > 0:
+                self._read_cache[key] = (value, row[1], now)
+            return value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            self._read_cache.pop(key, None)
+            buffered = self._write_buffer.pop(key, None)
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM sit_sessions WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "DELETE FROM sit_sessions WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            if buffered is not None:
+                return self._decode(json.loads(buffered[0]))
+            if row is None:
+                return default
+            return self._decode(json.loads(row[0]))
+
+    def discard_expired(self, key: str) -> bool:
+        now = self.clock()
+        with self._lock:
+            buffered = self._write_buffer.get(key)
+            if buffered is not None:
+                if buffered[1] > now:
+                    return False
+                self._write_buffer.pop(key)
+            self._read_cache.pop(key, None)
+            cursor = self._connection().execute(
+                "DELETE FROM sit_sessions WHERE namespace = ? AND key = ? AND deadline <= ?",
+                (self.namespace, key, now)
+            )
+            removed = cursor.rowcount > 0 or buffered is not None
+            if removed:
+                self.expired_count += 1
+            return removed
+
+    def remaining(self, key: str) -> Optional[float]:
+        now = self.clock()
+        with self._lock:
+            buffered = self._write_buffer.get(key)
+            if buffered is not None:
+                deadline = buffered[1]
+            else:
+                row = self._connection().execute(
+                    "SELECT deadline FROM sit_sessions WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                deadline = row[0]
+        remaining = deadline - now
+        return remaining if remaining > 0 else None
+
+    def sweep(self) -> int:
+        now = self.clock()
+        with self._lock:
+            self.flush()
+            cursor = self._connection().execute(
+                "DELETE FROM sit_sessions WHERE namespace = ? AND deadline <= ?",
+                (self.namespace, now)
+            )
+            self._read_cache = {
+                key: cached for key, cached in self._read_cache.items() if cached[1] > now
+            }
+            removed = max(cursor.rowcount, 0)
+            self.expired_count += removed
+            return removed
+
+    def flush(self):
+        """以單一交易寫出緩衝，並依容量上限淘汰最早到期者"""
+        with self._lock:
+            self._last_flush = self.clock()
+            if not self._write_buffer:
+                return
+            buffered, self._write_buffer = self._write_buffer, {}
+
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sit_sessions (namespace, key, value, deadline)"
+                    " VALUES (?, ?, ?, ?)",
+                    [
+                        (self.namespace, key, value_json, deadline)
+                        for key, (value_json, deadline) in buffered.items()
+                    ]
+                )
+                size = conn.execute(
+                    "SELECT COUNT(*) FROM sit_sessions WHERE namespace = ?",
+                    (self.namespace,)
+                ).fetchone()[0]
+                if size > self.max_size:
+                    cursor = conn.execute(
+                        "DELETE FROM sit_sessions WHERE rowid IN ("
+                        " SELECT rowid FROM sit_sessions WHERE namespace = ?"
+                        " ORDER BY deadline LIMIT ?)",
+                        (self.namespace, size - self.max_size)
+                    )
+                    self.evicted_count += max(cursor.rowcount, 0)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self.flush_count += 1
+            if self.cache_ttl <= 0:
+                self._read_cache.clear()
+
+    def clear(self):
+        """清空本命名空間"""
+        with self._lock:
+            self._write_buffer.clear()
+            self._read_cache.clear()
+            self._connection().execute(
+                "DELETE FROM sit_sessions WHERE namespace = ?", (self.namespace,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.flush()
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM sit_sessions WHERE namespace = ? AND deadline > ?",
+                (self.namespace, self.clock())
+            ).fetchone()[0]
+
+    # ========== 統計 ==========
+
+    def stats(self) -> Dict:
+        with self._lock:
+            conn = self._connection()
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            return {
+                "size": len(self),
+                "max_size": self.max_size,
+                "expired": self.expired_count,
+                "evicted": self.evicted_count,
+                "buffered_writes": len(self._write_buffer),
+                "flushes": self.flush_count,
+                "cache_size": len(self._read_cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "db_bytes": page_count * page_size,
+                "approx_bytes": sys.getsizeof(self._read_cache) + sys.getsizeof(self._write_buffer),
+            }
+
+
+_MISSING = object()
+
+# 堆項目 (float, int, str) tuple 的近似大小
+_HEAP_ITEM_BYTES = sys.getsizeof((0.0, 0, "")) + sys.getsizeof(0.0) + sys.getsizeof(0)